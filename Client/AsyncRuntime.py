@@ -0,0 +1,962 @@
+import asyncio
+import Utils.logger as loggerManager
+
+from typing import Optional
+from pymodbus.client import AsyncModbusTcpClient
+
+from Maps.Mapping import input_register_handling_plc
+from Maps.Mapping import holding_register_handling_plc
+from Maps.Mapping import input_register_pressing_plc
+from Maps.Mapping import holding_register_pressing_plc
+from Client.MES import MES, stop_writes
+from Client.Scanner import WaitResult
+from Client.Supervisor import ConnectionSupervisor, PLCUnavailableError
+from Client.WIP import UNDEFINED_COLOR
+from Client.Lamps import NO_PRODUCT_LAMPS
+from Client.WriteBatch import coalesce_writes
+from Server.DigitalTwin import DI, INPUT_HR
+from Utils.metrics import ModbusMetrics, modbus_metrics, timed
+
+
+RECONNECT_TIMEOUT = 10.0  # Tempo máximo (s) de uma tentativa de reconexão de um cliente assíncrono
+
+# Setpoints X do braço no Digital Twin (mesmos valores usados pelo MES)
+INPUT_HR_HOME = 1000
+INPUT_HR_REJECT = 6200
+INPUT_HR_DROP = 0
+
+
+class AsyncRuntime:
+    '''
+    Runtime alternativo do MES: um único event loop asyncio com os clientes assíncronos do pymodbus
+    no lugar das quatro threads e dos clientes bloqueantes.
+
+    Métodos:
+        - connect() -> dict[str, bool]: Conecta os clientes assíncronos de todos os PLCs.
+        - run(): Executa a varredura e as tarefas das estações até stop().
+        - stop(): Cancela as tarefas e aguarda seu término.
+        - wait_for(plc, address, value, timeout, cancel_on_stop) -> WaitResult: Espera assíncrona por um sinal.
+        - claim_conveyor(timeout) -> WaitResult: Aguarda a esteira ficar livre e a reserva (como MES.claim_conveyor).
+        - write(plc, address, value) -> bool: Escreve um Holding Register.
+        - write_many(plc, writes) -> bool: Escreve vários Holding Registers agrupando endereços contíguos (FC16).
+        - request(plc, method, **kwargs): Executa uma requisição Modbus registrando latência e resultado.
+        - metrics() -> dict: Varreduras, estouros de ciclo e jitter do scan.
+
+    Observação:
+        - O estado (state_machine, ordens, peças, Digital Twin e robô) continua no MES; as imagens lidas são
+          publicadas nos scanners do MES, de modo que a API e MES.read_input() continuam funcionando.
+        - A cada ciclo todos os PLCs são lidos concorrentemente (asyncio.gather) e o próximo ciclo é agendado
+          em relação ao instante planejado, e não ao fim da leitura, para não acumular atraso.
+        - As esperas são reavaliadas a cada ciclo de varredura, inclusive o cancelamento por mudança de estado.
+        - Chamadas bloqueantes (banco de dados e robô) rodam em threads auxiliares (asyncio.to_thread).
+        - Com MES.pipelined a próxima peça é alimentada por uma tarefa paralela, como em MES.flow_first_plc.
+        - Os tempos máximos das esperas vêm de MES.timeouts; 'supervisor_options' são os parâmetros dos
+          ConnectionSupervisor (seção 'supervisor' do config.json).
+    '''
+
+    def __init__(self, mes: MES, scan_interval: float = 0.02, metrics: Optional[ModbusMetrics] = None,
+                 supervisor_options: Optional[dict] = None):
+        self.logger = loggerManager.LoggerManager()
+
+        self.mes = mes
+        self.supervisor_options = supervisor_options or {}
+        self.scan_interval = scan_interval
+        self.transport_metrics = metrics or modbus_metrics
+
+        self._running = False
+        self._tasks: list[asyncio.Task] = []
+        self._tick: Optional[asyncio.Condition] = None
+
+        self._scans = 0
+        self._overruns = 0
+        self._jitter_total = 0.0
+        self._jitter_max = 0.0
+
+    # ========================================
+    # ============ CICLO DE VIDA =============
+    # ========================================
+
+    async def connect(self) -> dict[str, bool]:
+        '''
+        Conecta os clientes assíncronos de todos os PLCs do MES, cada um com o seu ConnectionSupervisor.
+
+        Returns:
+            dict[str, bool]: Resultado da conexão por PLC.
+
+        Observação:
+            - Um PLC que não conectar fica DOWN e é reconectado em segundo plano (backoff exponencial).
+        '''
+        loop = asyncio.get_running_loop()
+        names = list(self.mes.clients)
+
+        for name in names:
+            reconnect = lambda name=name: self._reconnect_threadsafe(loop, name)
+            self.mes.watch_connection(name, ConnectionSupervisor(name, reconnect, **self.supervisor_options))
+
+        # start() conecta de forma síncrona (fora do event loop, que atende a reconexão)
+        results = await asyncio.gather(*(loop.run_in_executor(None, self.mes.supervisors[name].start) for name in names))
+
+        status = {}
+        for name, result in zip(names, results):
+            status[name] = result
+            print(f"{name} conectado!" if result else f"Falha ao conectar no {name} - reconectando em segundo plano")
+
+        return status
+
+    def _reconnect_threadsafe(self, loop: asyncio.AbstractEventLoop, name: str) -> bool:
+        return asyncio.run_coroutine_threadsafe(self._reconnect(name), loop).result(timeout=RECONNECT_TIMEOUT)
+
+    async def _reconnect(self, name: str) -> bool:
+        client: AsyncModbusTcpClient = self.mes.clients[name]
+        if client.connected:
+            client.close()
+        return bool(await client.connect())
+
+    async def run(self):
+        '''
+        Executa a varredura e as tarefas das estações (lâmpadas, botões, manuseio e prensagem) até stop().
+        '''
+        self._running = True
+        self._tick = asyncio.Condition()
+
+        for scanner in self.mes.scanners.values():
+            scanner.external = True
+
+        self._tasks = [
+            asyncio.create_task(self.scan_loop(), name='scan'),
+            asyncio.create_task(self._supervise('lâmpadas', self.lamp_task), name='lamps'),
+            asyncio.create_task(self._supervise('botões', self.button_task), name='buttons'),
+            asyncio.create_task(self._supervise('handling_task', self.handling_task), name='handling'),
+            asyncio.create_task(self._supervise('pressing_task', self.pressing_task), name='pressing'),
+        ]
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def stop(self):
+        '''
+        Cancela as tarefas do runtime e aguarda seu término.
+        '''
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @property
+    def step_metrics(self):
+        ''' Tempos de cada etapa do ciclo, compartilhados com o MES (mesmas etapas do runtime de threads). '''
+        return self.mes.step_metrics
+
+    def metrics(self) -> dict:
+        '''
+        Retorna as métricas da varredura.
+
+        Returns:
+            dict: scans, overruns (ciclos que estouraram o intervalo), jitter_avg_ms e jitter_max_ms
+                  (atraso do início de cada ciclo em relação ao instante planejado).
+        '''
+        return {
+            'scans': self._scans,
+            'overruns': self._overruns,
+            'scan_interval_ms': self.scan_interval * 1000,
+            'jitter_avg_ms': (self._jitter_total / self._scans * 1000) if self._scans else 0.0,
+            'jitter_max_ms': self._jitter_max * 1000,
+        }
+
+    async def _supervise(self, name: str, task):
+        while True:
+            try:
+                await task()
+                return
+            except asyncio.CancelledError:
+                raise
+            except PLCUnavailableError as e:
+                # A tarefa recomeça quando o supervisor reconectar o PLC
+                print(f"{name} interrompido: {e}")
+                while self._running and not self.mes.supervisors[e.plc].available:
+                    await asyncio.sleep(0.1)
+                if not self._running:
+                    return
+            except Exception as e:
+                print(f"Erro no {name}: {e}")
+                return
+
+    # ========================================
+    # ============== VARREDURA ===============
+    # ========================================
+
+    async def scan_loop(self):
+        '''
+        Lê o bloco de Input Registers de todos os PLCs concorrentemente a cada 'scan_interval' segundos.
+
+        Observação:
+            - Um PLC só é lido quando vence o seu intervalo no PollingScheduler (scanner.interval);
+              intervalos menores que 'scan_interval' valem como 'scan_interval'.
+        '''
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        last_scan: dict[str, float] = {}
+
+        while self._running:
+            lateness = max(0.0, loop.time() - next_tick)
+            self._jitter_total += lateness
+            self._jitter_max = max(self._jitter_max, lateness)
+            self._scans += 1
+
+            now = loop.time()
+            due = {
+                name: scanner for name, scanner in self.mes.scanners.items()
+                if now - last_scan.get(name, float('-inf')) >= scanner.interval - self.scan_interval / 2
+            }
+            last_scan.update(dict.fromkeys(due, now))
+
+            await asyncio.gather(*(self._scan(name, scanner) for name, scanner in due.items()))
+
+            async with self._tick:
+                self._tick.notify_all()
+
+            next_tick += self.scan_interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # Ciclo estourou o intervalo: realinha a partir de agora em vez de disparar ciclos em sequência
+                self._overruns += 1
+                next_tick = loop.time()
+                delay = 0
+
+            await asyncio.sleep(delay)
+
+    async def request(self, plc: str, method: str, **kwargs):
+        '''
+        Executa uma requisição Modbus no cliente assíncrono do PLC, registrando latência e resultado
+        em 'transport_metrics' (mesma instrumentação do ModbusDispatcher no runtime de threads).
+
+        Args:
+            plc (str): Nome do PLC.
+            method (str): Método do cliente (e.g., 'read_input_registers').
+            **kwargs: Argumentos do método.
+
+        Returns:
+            Resposta do cliente pymodbus (exceções do cliente são propagadas).
+
+        Raises:
+            - PLCUnavailableError: Se o PLC estiver fora do ar, sem tocar na rede, ou se a requisição derrubou a conexão.
+        '''
+        client: AsyncModbusTcpClient = self.mes.clients[plc]
+        supervisor = self.mes.supervisors.get(plc)
+        if supervisor is not None:
+            supervisor.check()
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result, error = None, None
+
+        try:
+            result = await getattr(client, method)(**kwargs)
+        except Exception as e:
+            error = e
+
+        outcome = ModbusMetrics.classify(result, error)
+        self.transport_metrics.observe(plc, method, loop.time() - start, outcome)
+        self.transport_metrics.connection_state(plc, bool(getattr(client, 'connected', True)))
+
+        if supervisor is not None:
+            supervisor.record(outcome)
+            if error is not None and not supervisor.available:
+                raise PLCUnavailableError(plc) from error
+
+        if error is not None:
+            raise error
+        return result
+
+    async def _scan(self, name: str, scanner):
+        try:
+            result = await self.request(name, 'read_input_registers', address=scanner.start_address, count=scanner.count, slave=0)
+        except PLCUnavailableError:
+            scanner.error_count += 1
+            return
+        except Exception as e:
+            scanner.error_count += 1
+            self.logger.logger.error(f"Erro na varredura do {name}: {e}")
+            return
+
+        if result.isError():
+            scanner.error_count += 1
+            return
+
+        scanner.publish(result.registers)
+
+    def read_input(self, plc: str, address: int) -> Optional[int]:
+        '''
+        Lê um Input Register a partir da última imagem publicada pela varredura.
+        '''
+        return self.mes.scanners[plc].read(address)
+
+    async def wait_for(self, plc: str, address: int, value: int, timeout: Optional[float] = None, cancel_on_stop: bool = True) -> WaitResult:
+        '''
+        Aguarda um Input Register atingir o valor esperado sem bloquear o event loop.
+
+        Args:
+            plc (str): Nome do PLC (e.g., 'MPS_HANDLING', 'MPS_PRESSING').
+            address (int): Endereço do registrador.
+            value (int): Valor esperado do registrador.
+            timeout (float | None): Tempo limite em segundos (None para esperar indefinidamente).
+            cancel_on_stop (bool): Cancela a espera se 'state_machine' deixar de ser 'running'.
+
+        Returns:
+            WaitResult: OK, TIMEOUT ou CANCELLED.
+        '''
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        with self.mes.polling.motion(plc):
+            async with self._tick:
+                while True:
+                    if cancel_on_stop and self.mes.state_machine != 'running':
+                        return WaitResult.CANCELLED
+
+                    if self.read_input(plc, address) == value:
+                        return WaitResult.OK
+
+                    remaining = None if deadline is None else deadline - loop.time()
+                    if remaining is not None and remaining <= 0:
+                        return WaitResult.TIMEOUT
+
+                    try:
+                        await asyncio.wait_for(self._tick.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+    async def claim_conveyor(self, timeout: float) -> WaitResult:
+        '''
+        Aguarda a esteira ficar livre e a reserva para a próxima peça, sem bloquear o event loop.
+
+        Args:
+            timeout (float): Tempo limite em segundos.
+
+        Returns:
+            WaitResult: OK se a esteira foi reservada, TIMEOUT ou CANCELLED (máquina fora de 'running').
+        '''
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        async with self._tick:
+            while not self.mes.is_conveyor_available:
+                if self.mes.state_machine != 'running':
+                    return WaitResult.CANCELLED
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return WaitResult.TIMEOUT
+
+                try:
+                    await asyncio.wait_for(self._tick.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+        # Sem 'await' entre a verificação e a reserva: nenhuma outra tarefa intercala
+        self.mes.is_conveyor_available = False
+        return WaitResult.OK
+
+    # ========================================
+    # =============== ESCRITAS ===============
+    # ========================================
+
+    async def write(self, plc: str, address: int, value: int) -> bool:
+        '''
+        Escreve um Holding Register em um PLC.
+
+        Returns:
+            bool: True se a escrita foi aceita pelo PLC.
+        '''
+        return await self.write_many(plc, {address: value})
+
+    async def write_many(self, plc: str, writes: dict[int, int]) -> bool:
+        '''
+        Escreve vários Holding Registers, agrupando endereços contíguos numa única requisição (FC16).
+
+        Args:
+            plc (str): Nome do PLC.
+            writes (dict[int, int]): Endereço -> valor.
+
+        Returns:
+            bool: True se todas as requisições foram aceitas pelo PLC.
+
+        Observação:
+            - Uma faixa recusada pelo PLC (e.g., endereço ilegal) é reenviada registrador por registrador,
+              como em WriteTransaction.commit.
+        '''
+        success = True
+
+        for start, values in coalesce_writes(writes):
+            if len(values) == 1:
+                success = await self._write_one(plc, start, values[0]) and success
+                continue
+
+            try:
+                result = await self.request(plc, 'write_registers', address=start, values=values, slave=0)
+            except Exception as e:
+                print(f"Erro ao escrever no {plc} (endereços {start}-{start + len(values) - 1}): {e}")
+                success = False
+                continue
+
+            if result.isError():
+                print(f"Erro ao escrever no {plc} (endereços {start}-{start + len(values) - 1}): {result} - reenviando um a um")
+                written = [await self._write_one(plc, start + offset, value) for offset, value in enumerate(values)]
+                success = all(written) and success
+
+        return success
+
+    async def _write_one(self, plc: str, address: int, value: int) -> bool:
+        try:
+            result = await self.request(plc, 'write_register', address=address, value=value, slave=0)
+        except Exception as e:
+            print(f"Erro ao escrever no {plc} (endereço {address}): {e}")
+            return False
+
+        if result.isError():
+            print(f"Erro ao escrever no {plc} (endereço {address}): {result}")
+            return False
+        return True
+
+    def _twin(self, parameter, value):
+        if self.mes.gemeo:
+            self.mes.gemeo.set_parameter(parameter, value)
+            self.mes.gemeo.commit_all()
+
+    async def set_lamps(self, green: int, yellow: int, red: int) -> bool:
+        '''
+        Atualiza as lâmpadas do Andon no PLC de manuseio (uma requisição) e no Digital Twin.
+        '''
+        success = await self.write_many('MPS_HANDLING', {
+            holding_register_handling_plc.LAMP_GREEN: green,
+            holding_register_handling_plc.LAMP_YELLOW: yellow,
+            holding_register_handling_plc.LAMP_RED: red,
+        })
+
+        if self.mes.gemeo:
+            with self.mes.gemeo.batch():
+                self.mes.gemeo.set_parameter(DI.LAMP_GREEN_DT, bool(green))
+                self.mes.gemeo.set_parameter(DI.LAMP_YELLOW_DT, bool(yellow))
+                self.mes.gemeo.set_parameter(DI.LAMP_RED_DT, bool(red))
+
+        return success
+
+    async def stop_all_operations(self) -> bool:
+        '''
+        Zera os Holding Registers de comando de todos os PLCs, todos ao mesmo tempo.
+
+        Returns:
+            bool: True se todos os PLCs aceitaram as escritas.
+
+        Observação:
+            - Só os endereços mapeados de cada PLC são escritos (MES.stop_writes).
+        '''
+        print("PARANDO TODAS AS OPERAÇÕES...")
+
+        plcs = [plc for plc in ('MPS_HANDLING', 'MPS_PRESSING', 'MPS_SORTING') if plc in self.mes.clients]
+        results = await asyncio.gather(*(self.write_many(plc, stop_writes(plc)) for plc in plcs))
+
+        # O bloco zerado inclui as lâmpadas do Andon (HR 8-10): força o LampController a reescrevê-las
+        self.mes.lamps.invalidate()
+
+        for plc, result in zip(plcs, results):
+            print(f"{plc} parado" if result else f"Erro ao parar {plc}")
+
+        return all(results)
+
+    # ========================================
+    # ================ TAREFAS ===============
+    # ========================================
+
+    async def lamp_task(self):
+        '''
+        Controla as lâmpadas indicadoras de acordo com 'state_machine' (mesmo LampController de MES.handle_lamp).
+
+        Observação:
+            - A roda de temporização avança a cada ciclo de varredura, então uma troca de estado aparece
+              nas lâmpadas no ciclo seguinte; só há escrita quando alguma lâmpada muda.
+        '''
+        while self._running:
+            async with self._tick:
+                await self._tick.wait()
+
+            lamps = self.mes.lamps.poll()
+            if lamps is None:
+                continue
+
+            try:
+                if not await self.set_lamps(*lamps):
+                    self.mes.lamps.invalidate()
+            except Exception as e:
+                print(f"Erro ao controlar lâmpadas: {e}")
+                self.mes.lamps.invalidate()
+
+    async def button_task(self):
+        '''
+        Trata as bordas dos botões de start, stop e reset (mesmo EdgeDetector e mesma lógica de MES.monitor_buttons).
+
+        Observação:
+            - O detector é alimentado pelas imagens que scan_loop publica, então cada borda chega no
+              ciclo de varredura em que foi confirmada, sem leituras próprias.
+        '''
+        events: asyncio.Queue = asyncio.Queue()
+        self.mes.buttons.subscribe(events.put_nowait)
+
+        try:
+            while self._running:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+
+                if not event.pressed:
+                    continue
+
+                try:
+                    if event.button == 'stop':
+                        print("Botão STOP pressionado!")
+                        self.mes.state_machine = "stopped"
+                        await self.stop_all_operations()
+
+                    elif event.button == 'start' and self.mes.state_machine == 'idle':
+                        print("Botão START pressionado!")
+                        self.mes.state_machine = "running"
+                        await self._pulse_button_light(holding_register_handling_plc.LAMP_START, DI.START_BUTTON_LIGHT)
+
+                    elif event.button == 'reset' and self.mes.state_machine in ('stopped', 'cycle'):
+                        print("Botão RESET pressionado!")
+                        self.mes.state_machine = "idle"
+                        await self._pulse_button_light(holding_register_handling_plc.LAMP_RESET, DI.RESET_BUTTON_LIGHT)
+                        await self.reset_to_home_position()
+
+                except Exception as e:
+                    print(f"Erro ao monitorar botões: {e}")
+        finally:
+            self.mes.buttons.unsubscribe(events.put_nowait)
+
+    async def _pulse_button_light(self, register: int, twin_light: DI):
+        await self.write('MPS_HANDLING', register, 1)
+        self._twin(twin_light, True)
+        await asyncio.sleep(0.5)
+        await self.write('MPS_HANDLING', register, 0)
+        self._twin(twin_light, False)
+
+    async def reset_to_home_position(self) -> bool:
+        '''
+        Reseta o sistema: sobe garra, recua magazine, descarta peça presa na garra e vai para home.
+        '''
+        print("RESETANDO SISTEMA...")
+
+        try:
+            print("1. Subindo garra...")
+            await self.gripper_up()
+            await asyncio.sleep(0.5)
+
+            print("2. Recuando magazine...")
+            await self.magazine_eject()
+            await asyncio.sleep(0.5)
+
+            gripper_state = await self.request('MPS_HANDLING', 'read_holding_registers', address=holding_register_handling_plc.GRIPPER_OPEN, count=1, slave=0)
+
+            if not gripper_state.isError() and gripper_state.registers[0] == 0:
+                print("movendo para o rejeito")
+
+                held = self.mes.wip.held()
+                if held:
+                    self.mes.wip.discard(held)
+
+                await self.move_to_reject(cancel_on_stop=False)
+                await self.gripper_down()
+                await asyncio.sleep(0.1)
+                await self.gripper_open()
+                await asyncio.sleep(0.2)
+                await self.gripper_up()
+                await asyncio.sleep(0.5)
+
+            print("3. Movendo para HOME...")
+            await self.write_many('MPS_HANDLING', {
+                holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ: 0,
+                holding_register_handling_plc.GRIPPER_TO_STATION_DIR: 0,
+            })
+            await self.move_arm(holding_register_handling_plc.GRIPPER_TO_STATION_DIR, INPUT_HR_HOME,
+                                input_register_handling_plc.sensor_braco_home, "HOME", cancel_on_stop=False)
+
+            print("Sistema resetado com sucesso!")
+            return True
+
+        except Exception as e:
+            print(f"Erro ao resetar sistema: {e}")
+            return False
+
+    # ========================================
+    # ============== MOVIMENTOS ==============
+    # ========================================
+
+    @timed('gripper_open')
+    async def gripper_open(self) -> bool:
+        print("Abrindo garra...")
+        success = await self.write('MPS_HANDLING', holding_register_handling_plc.GRIPPER_OPEN, 1)
+        self._twin(DI.Crane_Feeder_Claw, False)
+        await asyncio.sleep(0.5)
+        return success
+
+    @timed('gripper_close')
+    async def gripper_close(self) -> bool:
+        print("Fechando garra...")
+        success = await self.write('MPS_HANDLING', holding_register_handling_plc.GRIPPER_OPEN, 0)
+        self._twin(DI.Crane_Feeder_Claw, True)
+        await asyncio.sleep(0.7)
+        return success
+
+    @timed('gripper_down')
+    async def gripper_down(self) -> bool:
+        print("Descendo garra...")
+        if self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_garra_avancada) == 1:
+            return True
+
+        await self.write('MPS_HANDLING', holding_register_handling_plc.GRIPPER_DOWN, 1)
+        self._twin(INPUT_HR.Crane_Fedder_Setpoint_Z, 1000)
+
+        if await self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_garra_avancada, 1, timeout=self.mes.timeouts['gripper'], cancel_on_stop=False):
+            return True
+
+        await self.write('MPS_HANDLING', holding_register_handling_plc.GRIPPER_DOWN, 0)
+        print("ERRO: Timeout ao descer garra\n")
+        return False
+
+    @timed('gripper_up')
+    async def gripper_up(self) -> bool:
+        print("Subindo garra...")
+        if self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_garra_recuada) == 1:
+            return True
+
+        await self.write('MPS_HANDLING', holding_register_handling_plc.GRIPPER_DOWN, 0)
+        self._twin(INPUT_HR.Crane_Fedder_Setpoint_Z, 0)
+
+        result = await self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_garra_recuada, 1, timeout=self.mes.timeouts['gripper'])
+        if not result:
+            print("Operação cancelada - sistema parado" if result is WaitResult.CANCELLED else "ERRO: Timeout ao subir garra")
+        return bool(result)
+
+    async def move_arm(self, register: int, setpoint: int, sensor: int, label: str, cancel_on_stop: bool = True) -> bool:
+        '''
+        Move o braço do manipulador acionando 'register' até 'sensor' sinalizar a chegada.
+
+        Args:
+            register (int): Holding Register de movimento (GRIPPER_TO_MAGAZINE_ESQ ou GRIPPER_TO_STATION_DIR).
+            setpoint (int): Setpoint X do braço no Digital Twin.
+            sensor (int): Input Register de posição a aguardar.
+            label (str): Nome da posição para as mensagens.
+            cancel_on_stop (bool): Cancela o movimento se 'state_machine' deixar de ser 'running'.
+
+        Returns:
+            bool: True se o braço chegou na posição.
+        '''
+        print(f"Movendo para {label}...")
+
+        if self.read_input('MPS_HANDLING', sensor) == 1:
+            print(f"Braço já está na posição {label}")
+            return True
+
+        await self.write('MPS_HANDLING', register, 1)
+        self._twin(INPUT_HR.Crane_Fedder_Setpoint_X, setpoint)
+
+        result = await self.wait_for('MPS_HANDLING', sensor, 1, timeout=self.mes.timeouts['arm'], cancel_on_stop=cancel_on_stop)
+        await self.write('MPS_HANDLING', register, 0)
+
+        if result:
+            print(f"Braço chegou na posição {label}")
+        else:
+            print("Operação cancelada - sistema parado" if result is WaitResult.CANCELLED else f"ERRO: Timeout ao mover para {label}")
+        return bool(result)
+
+    @timed('move_to_home')
+    async def move_to_home(self) -> bool:
+        await self.gripper_up()
+        if self.mes.state_machine != 'running':
+            return False
+        return await self.move_arm(holding_register_handling_plc.GRIPPER_TO_STATION_DIR, INPUT_HR_HOME,
+                                   input_register_handling_plc.sensor_braco_home, "HOME")
+
+    @timed('move_to_drop')
+    async def move_to_drop(self) -> bool:
+        await self.gripper_up()
+        if self.mes.state_machine != 'running':
+            return False
+        return await self.move_arm(holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, INPUT_HR_DROP,
+                                   input_register_handling_plc.sensor_braco_deixa, "DEIXA")
+
+    async def move_to_reject(self, cancel_on_stop: bool = True) -> bool:
+        # O rejeito fica entre as posições: a direção depende de onde o braço está
+        if self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_braco_home) == 1:
+            register = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ
+        else:
+            register = holding_register_handling_plc.GRIPPER_TO_STATION_DIR
+
+        return await self.move_arm(register, INPUT_HR_REJECT, input_register_handling_plc.sensor_braco_rejeito,
+                                   "REJEITO", cancel_on_stop=cancel_on_stop)
+
+    @timed('magazine_eject')
+    async def magazine_eject(self) -> bool:
+        print("Ejetando peça do magazine...")
+        if self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_magazine_entrada_recuado) == 1:
+            return True
+
+        await self.write('MPS_HANDLING', holding_register_handling_plc.MAGAZINE_EJECT, 0)
+        self._twin(DI.Cylinder_Pusher_Feeder, False)
+
+        result = await self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_magazine_entrada_recuado, 1, timeout=self.mes.timeouts['magazine'])
+        if not result:
+            print("Operação cancelada - sistema parado" if result is WaitResult.CANCELLED else "ERRO: Timeout ao ejetar peça")
+        return bool(result)
+
+    @timed('magazine_advance')
+    async def magazine_advance(self) -> bool:
+        print("Avançando magazine...")
+        if self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_magazine_entrada_avancado) == 1:
+            return True
+
+        await self.write('MPS_HANDLING', holding_register_handling_plc.MAGAZINE_EJECT, 1)
+        self._twin(DI.Cylinder_Pusher_Feeder, True)
+
+        result = await self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_magazine_entrada_avancado, 1, timeout=self.mes.timeouts['magazine'])
+        if result is WaitResult.CANCELLED:
+            await self.write('MPS_HANDLING', holding_register_handling_plc.MAGAZINE_EJECT, 0)
+            self._twin(DI.Cylinder_Pusher_Feeder, False)
+            print("Operação cancelada - sistema parado")
+        elif not result:
+            print("ERRO: Timeout ao avançar magazine")
+        return bool(result)
+
+    # ========================================
+    # =============== ESTAÇÕES ===============
+    # ========================================
+
+    async def handling_task(self):
+        '''
+        Fluxo da estação de manuseio (mesma sequência de MES.flow_first_plc).
+        '''
+        print('Iniciando handling_task...')
+        await self.magazine_eject()
+        feeder: Optional[asyncio.Task] = None
+
+        while self._running:
+            if self.mes.state_machine != 'running':
+                await asyncio.sleep(0.1)
+                continue
+
+            if not await asyncio.to_thread(self.mes.get_active_order):
+                print("Nenhuma ordem ativa - aguardando nova ordem...")
+                await asyncio.sleep(2)
+                continue
+
+            cycle_start = asyncio.get_running_loop().time()
+            if feeder is not None:
+                await feeder
+                feeder = None
+
+            # No modo pipelined a peça normalmente já foi alimentada durante o ciclo anterior
+            fed = self.mes.pipelined and self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_peca_suporte) == 1
+            if not fed and not await self._run_steps([self.magazine_advance, self.magazine_eject]):
+                continue
+
+            if self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_peca_suporte) != 1:
+                self.mes.lamps.override(NO_PRODUCT_LAMPS, 5)
+                await asyncio.sleep(5)
+                continue
+
+            pick = [self.gripper_open, self.move_to_drop, self.gripper_down, self.gripper_close, self.gripper_up]
+            if not await self._run_steps(pick):
+                continue
+
+            await asyncio.sleep(0.2)
+            sensor_garra = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_peca_garra)
+
+            if sensor_garra == 0:
+                print("Peça PRETA detectada!")
+                piece = self.mes.wip.pick("preto")
+            else:
+                print("Peça PRATA ou ROSA detectada - aguardando confirmação no PLC 2")
+                piece = self.mes.wip.pick(UNDEFINED_COLOR)
+
+            if self.mes.pipelined:
+                feeder = asyncio.create_task(self._run_steps([self.magazine_advance, self.magazine_eject]))
+
+            await asyncio.sleep(0.1)
+
+            if not await self.move_to_home():
+                continue
+
+            print("Aguardando esteira ficar disponível...")
+            loop = asyncio.get_running_loop()
+            wait_start = loop.time()
+            result = await self.claim_conveyor(timeout=self.mes.timeouts['conveyor_claim'])
+
+            if result is WaitResult.CANCELLED:
+                print("Operação cancelada - sistema parado")
+                return
+
+            if not result:
+                print("ERRO: Timeout ao aguardar liberação da esteira!")
+                self.mes.state_machine = "error"
+                return
+
+            self.step_metrics.record('conveyor_wait', loop.time() - wait_start)
+            print("Esteira disponível! Depositando peça...")
+
+            if not await self._run_steps([self.gripper_down]):
+                continue
+
+            await self.gripper_open()
+            self.mes.wip.deposit(piece)
+            if self.mes.state_machine != 'running':
+                continue
+            await asyncio.sleep(0.1)
+
+            if await self._run_steps([self.gripper_up]):
+                self.step_metrics.record('handling_cycle', loop.time() - cycle_start)
+
+    async def _run_steps(self, steps) -> bool:
+        # Executa os passos em sequência, interrompendo se a máquina sair de 'running'
+        for step in steps:
+            await step()
+            if self.mes.state_machine != 'running':
+                return False
+            await asyncio.sleep(0.1)
+        return True
+
+    async def _conveyor(self, on: bool):
+        await self.write('MPS_PRESSING', holding_register_pressing_plc.MB_LIGA_ESTEIRA, int(on))
+        self._twin(DI.Conveyor_Job, on)
+
+    async def pressing_task(self):
+        '''
+        Fluxo da estação de prensagem e do robô (mesma sequência de MES.flow_second_plc).
+        '''
+        while self._running:
+            if self.mes.state_machine != 'running':
+                await asyncio.sleep(0.1)
+                continue
+
+            if not await asyncio.to_thread(self.mes.get_active_order):
+                print("Nenhuma ordem ativa - aguardando nova ordem...")
+                await asyncio.sleep(2)
+                continue
+
+            if not await self.wait_for('MPS_PRESSING', input_register_pressing_plc.MB_PART_AV, 1, timeout=1):
+                continue
+
+            self.mes.is_conveyor_available = False
+            print("Peça detectada no início da esteira")
+            await asyncio.sleep(1)
+
+            if self.mes.state_machine != 'running':
+                continue
+
+            loop = asyncio.get_running_loop()
+            await self._conveyor(True)
+            conveyor_start = loop.time()
+
+            result = await self.wait_for('MPS_PRESSING', input_register_pressing_plc.MB_BARREIRA_IND, 1)
+            if not result:
+                await self._conveyor(False)
+                continue
+
+            print("Peça chegou na barreira indutiva - identificando cor...")
+            await self._conveyor(False)
+            self.step_metrics.record('barrier_stop', loop.time() - conveyor_start)
+            await asyncio.sleep(0.3)
+
+            sensor_ind = self.read_input('MPS_PRESSING', input_register_pressing_plc.MB_SENSOR_IND)
+            if sensor_ind is not None:
+                piece = self.mes.wip.confirm(sensor_ind == 1)
+                if piece is None:
+                    print("AVISO: Nenhuma peça depositada aguardando identificação!")
+                else:
+                    print(f"Peça #{piece.id} {piece.color.upper()} confirmada!")
+
+            await asyncio.sleep(0.5)
+            await self._conveyor(True)
+            conveyor_start = loop.time()
+
+            result = await self.wait_for('MPS_PRESSING', input_register_pressing_plc.MB_PC_FIM, 1)
+            await self._conveyor(False)
+            if not result:
+                continue
+
+            print("Peça chegou no final da esteira")
+            self.step_metrics.record('conveyor_to_end', loop.time() - conveyor_start)
+            await self._dispatch_to_robot()
+
+    async def _dispatch_to_robot(self):
+        piece = self.mes.wip.arrive_end()
+
+        if piece is None:
+            print("AVISO: Nenhuma peça em processo! Pulando comando do robô.")
+            self.mes.is_conveyor_available = True
+            return
+
+        color = piece.color
+        active_order = await asyncio.to_thread(self.mes.get_active_order)
+
+        if not active_order:
+            print("ERRO: Ordem ativa desapareceu durante processamento!")
+            self.mes.is_conveyor_available = True
+            self.mes.wip.complete(piece)
+            return
+
+        approved = color == active_order['color_requested']
+        print(f"Peça {'APROVADA' if approved else 'REJEITADA'}: {color} (ordem {active_order['order_name']}, "
+              f"cor {active_order['color_requested']}, {active_order['quantity_processed']}/{active_order['quantity_requested']})")
+        await asyncio.to_thread(self.mes.register_piece, color, int(approved), active_order['id'])
+
+        await asyncio.to_thread(self.mes.robot.send_color, color)
+
+        loop = asyncio.get_running_loop()
+        robot_start = loop.time()
+        deadline = robot_start + self.mes.timeouts['robot']
+        conveyor_freed = False
+        robot_finished = False
+
+        while loop.time() < deadline:
+            if self.mes.state_machine != 'running':
+                print("Operação cancelada - parando robô!")
+                await asyncio.to_thread(self.mes.robot.clear_color)
+                return
+
+            if not conveyor_freed and self.read_input('MPS_PRESSING', input_register_pressing_plc.MB_PC_FIM) == 0:
+                print("Sensor final LIBERADO - Peça removida da esteira!")
+                self.mes.is_conveyor_available = True
+                conveyor_freed = True
+                self.mes.wip.complete(piece)
+
+            if await asyncio.to_thread(self.mes.robot.get_digital_out, 5):
+                print("Robô sinalizou conclusão (DO5 = HIGH)")
+                robot_finished = True
+                break
+
+            await asyncio.sleep(0.05)
+
+        self.step_metrics.record('robot_wait', loop.time() - robot_start)
+
+        if not robot_finished:
+            print("TIMEOUT: Robô não sinalizou conclusão em 60s")
+
+        if not conveyor_freed:
+            print("Forçando liberação da esteira (timeout/erro)")
+            result = await self.wait_for('MPS_PRESSING', input_register_pressing_plc.MB_PC_FIM, 0,
+                                         timeout=self.mes.timeouts['conveyor_release'])
+
+            if result:
+                self.mes.is_conveyor_available = True
+                self.mes.wip.complete(piece)
+            elif result is WaitResult.CANCELLED:
+                print("Operação cancelada - sistema parado")
+            else:
+                # Sensor preso ou peça parada no fim: a esteira continua ocupada até um reset
+                self.logger.logger.error(f"Fim da esteira não liberou em {self.mes.timeouts['conveyor_release']:.0f}s")
+                print("ERRO: Timeout ao aguardar liberação do fim da esteira!")
+                self.mes.state_machine = "error"
+
+        await asyncio.to_thread(self.mes.robot.clear_color)
+        print(f"Status: Esteira livre={self.mes.is_conveyor_available} | Peças em processo={len(self.mes.wip)}\n")
+
@@ -0,0 +1,146 @@
+import threading
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+from Client.Scanner import RegisterSnapshot
+from Maps.Mapping import input_register_handling_plc
+
+
+DEBOUNCE = 0.015  # Tempo (s) que uma leitura nova precisa se manter para valer (confirmada na varredura seguinte, de 20 ms)
+BUTTON_SCAN_INTERVAL = 0.03  # Intervalo máximo (s) de varredura do bloco dos botões: um toque de 80 ms rende duas amostras
+
+
+@dataclass(frozen=True)
+class Button:
+    '''
+    Botão lido de um Input Register.
+
+    Atributos:
+        - name (str)       : Nome do botão (e.g., 'start').
+        - address (int)    : Endereço do Input Register.
+        - active_low (bool): True para contatos normalmente fechados (lê 0 quando pressionado, e.g., STOP).
+    '''
+    name: str
+    address: int
+    active_low: bool = False
+
+
+@dataclass(frozen=True)
+class ButtonEvent:
+    '''
+    Borda confirmada de um botão.
+
+    Atributos:
+        - button (str)     : Nome do botão.
+        - pressed (bool)   : True para pressionado, False para solto.
+        - timestamp (float): Instante da varredura que confirmou a borda (time.monotonic).
+    '''
+    button: str
+    pressed: bool
+    timestamp: float
+
+
+HANDLING_BUTTONS = (
+    Button('start', input_register_handling_plc.button_start),
+    Button('stop', input_register_handling_plc.button_stop, active_low=True),
+    Button('reset', input_register_handling_plc.button_reset),
+)
+
+
+class EdgeDetector:
+    '''
+    Detector de bordas de botões sobre as imagens do scanner: todos os botões saem da mesma
+    imagem do bloco de Input Registers, sem requisições próprias.
+
+    Métodos:
+        - update(snapshot): Processa uma imagem do scanner (assinar com RegisterScanner.subscribe).
+        - subscribe(callback): Registra uma função chamada com cada ButtonEvent.
+        - unsubscribe(callback): Remove um assinante.
+        - pressed(name) -> bool | None: Estado confirmado de um botão (None antes da primeira imagem).
+        - metrics() -> dict: Pressionamentos e oscilações descartadas por botão.
+
+    Uso:
+        buttons = EdgeDetector(HANDLING_BUTTONS)
+        mes.scanners['MPS_HANDLING'].subscribe(buttons.update)
+        buttons.subscribe(lambda event: print(event.button, event.pressed))
+
+    Observação:
+        - Uma leitura diferente do estado confirmado só vale depois de se manter por 'debounce' segundos;
+          com debounce = 0 a borda é emitida na primeira varredura.
+        - A primeira imagem define o estado inicial sem emitir eventos (e.g., botão preso na partida).
+        - Os assinantes são chamados na thread do scanner e devem só enfileirar o evento.
+    '''
+
+    def __init__(self, buttons: Iterable[Button], debounce: float = DEBOUNCE):
+        self.buttons = tuple(buttons)
+        self.debounce = debounce
+
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[[ButtonEvent], None]] = []
+        self._state: Dict[str, Optional[bool]] = {button.name: None for button in self.buttons}
+        self._candidate: Dict[str, tuple[bool, float]] = {}
+
+        self.presses = {button.name: 0 for button in self.buttons}
+        self.bounces = {button.name: 0 for button in self.buttons}
+
+    def subscribe(self, callback: Callable[[ButtonEvent], None]):
+        with self._lock:
+            self._listeners = self._listeners + [callback]
+
+    def unsubscribe(self, callback: Callable[[ButtonEvent], None]):
+        with self._lock:
+            self._listeners = [listener for listener in self._listeners if listener != callback]
+
+    def pressed(self, name: str) -> Optional[bool]:
+        return self._state[name]
+
+    def update(self, snapshot: RegisterSnapshot):
+        '''
+        Atualiza o estado dos botões com uma imagem do scanner e emite as bordas confirmadas.
+
+        Args:
+            - snapshot (RegisterSnapshot): Imagem do bloco que contém os endereços dos botões.
+        '''
+        events = []
+
+        with self._lock:
+            for button in self.buttons:
+                pressed = bool(snapshot.get(button.address)) != button.active_low
+                stable = self._state[button.name]
+
+                if stable is None:
+                    self._state[button.name] = pressed
+                    continue
+
+                if pressed == stable:
+                    if self._candidate.pop(button.name, None) is not None:
+                        self.bounces[button.name] += 1
+                    continue
+
+                candidate = self._candidate.get(button.name)
+                if candidate is None or candidate[0] != pressed:
+                    candidate = self._candidate[button.name] = (pressed, snapshot.timestamp)
+
+                if snapshot.timestamp - candidate[1] >= self.debounce:
+                    del self._candidate[button.name]
+                    self._state[button.name] = pressed
+                    if pressed:
+                        self.presses[button.name] += 1
+                    events.append(ButtonEvent(button.name, pressed, snapshot.timestamp))
+
+            listeners = self._listeners
+
+        for event in events:
+            for listener in listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"Erro ao notificar evento do botão {event.button}: {e}")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                name: {'pressed': self._state[name], 'presses': self.presses[name], 'bounces': self.bounces[name]}
+                for name in self._state
+            }
@@ -0,0 +1,264 @@
+import time
+import queue
+import itertools
+import threading
+import Utils.logger as loggerManager
+
+from enum import IntEnum
+from typing import Any, Dict, Optional
+from pymodbus.client import ModbusTcpClient
+
+from Client.Supervisor import ConnectionSupervisor, PLCUnavailableError
+from Utils.metrics import ModbusMetrics, modbus_metrics
+
+
+class Priority(IntEnum):
+    '''
+    Faixas de prioridade das requisições Modbus (menor valor = atendida primeiro).
+
+    Atributos:
+        - SAFETY : Parada e comandos de segurança (e.g., stop_all_operations).
+        - MOTION : Comandos de atuadores (garra, braço, magazine, esteira).
+        - SENSOR : Leituras de sensores (varredura dos Input Registers).
+        - LAMP   : Lâmpadas do Andon e luzes dos botões.
+    '''
+    SAFETY = 0
+    MOTION = 1
+    SENSOR = 2
+    LAMP = 3
+
+
+# Faixa usada quando o chamador não informa a prioridade
+DEFAULT_PRIORITY = {
+    'read_input_registers': Priority.SENSOR,
+    'read_holding_registers': Priority.SENSOR,
+    'read_discrete_inputs': Priority.SENSOR,
+    'read_coils': Priority.SENSOR,
+    'write_register': Priority.MOTION,
+    'write_registers': Priority.MOTION,
+    'write_coil': Priority.MOTION,
+    'write_coils': Priority.MOTION,
+}
+
+
+class _Request:
+    __slots__ = ('priority', 'method', 'args', 'kwargs', 'enqueued_at', 'done', 'result', 'error', 'cancelled')
+
+    def __init__(self, priority: Priority, method: str, args: tuple, kwargs: dict):
+        self.priority = priority
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+
+
+class DispatcherLane:
+    '''
+    Visão de um ModbusDispatcher com prioridade fixa, compatível com ModbusTcpClient.
+
+    Uso:
+        lamps = dispatcher.lane(Priority.LAMP)
+        lamps.write_registers(address=8, values=[1, 0, 0], slave=0)
+    '''
+
+    def __init__(self, dispatcher: 'ModbusDispatcher', priority: Priority):
+        self.dispatcher = dispatcher
+        self.priority = priority
+
+    def __getattr__(self, name: str):
+        if name in DEFAULT_PRIORITY:
+            return lambda *args, **kwargs: self.dispatcher.submit(self.priority, name, *args, **kwargs)
+        return getattr(self.dispatcher, name)
+
+
+class ModbusDispatcher:
+    '''
+    Serializa todas as requisições de um PLC sobre a sua conexão, atendendo-as por prioridade.
+
+    Métodos:
+        - submit(priority, method, *args, **kwargs): Enfileira uma requisição e aguarda o resultado.
+        - lane(priority) -> DispatcherLane: Cliente com prioridade fixa (compatível com ModbusTcpClient).
+        - read_input_registers / read_holding_registers / write_register / write_registers: Mesmas
+          assinaturas do ModbusTcpClient, na faixa padrão (leituras = SENSOR, escritas = MOTION).
+        - connect() / close(): Conexão do cliente, serializadas com as requisições.
+        - reconnect() -> bool: Fecha e reabre a conexão.
+        - supervise(**options) -> ConnectionSupervisor: Passa a supervisionar a conexão (saúde, falha rápida e reconexão).
+        - metrics() -> dict: Profundidade da fila e tempo de espera por faixa.
+
+    Observação:
+        - Uma única thread por PLC executa as requisições: nunca há duas requisições simultâneas na mesma
+          conexão, e uma parada (SAFETY) passa à frente de todas as requisições ainda na fila.
+        - O tempo de espera de uma requisição fica limitado pela duração da requisição em andamento
+          (no máximo o timeout do cliente); ele é medido por faixa em metrics().
+        - Toda requisição tem a latência (ida e volta) e o resultado registrados em 'transport_metrics'
+          (ModbusMetrics), por código de função; mudanças no estado da conexão contam as reconexões.
+        - Com supervisor, leituras e escritas levantam PLCUnavailableError na hora enquanto o PLC estiver
+          fora do ar, em vez de esperar o timeout do cliente em cada requisição.
+        - Usado apenas no runtime de threads; no runtime asyncio o event loop já serializa as requisições.
+    '''
+
+    def __init__(self, name: str, client: ModbusTcpClient, request_timeout: float = 10.0, metrics: Optional[ModbusMetrics] = None):
+        self.logger = loggerManager.LoggerManager()
+
+        self.name = name
+        self.client = client
+        self.request_timeout = request_timeout
+        self.transport_metrics = metrics or modbus_metrics
+        self.supervisor: Optional[ConnectionSupervisor] = None
+
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lanes = {priority: DispatcherLane(self, priority) for priority in Priority}
+        self._lock = threading.Lock()
+
+        self._depth = {priority: 0 for priority in Priority}
+        self._max_depth = {priority: 0 for priority in Priority}
+        self._completed = {priority: 0 for priority in Priority}
+        self._wait_total = {priority: 0.0 for priority in Priority}
+        self._wait_max = {priority: 0.0 for priority in Priority}
+        self._timeouts = 0
+
+        self._thread = threading.Thread(target=self._run, name=f'dispatcher-{name}', daemon=True)
+        self._thread.start()
+
+    def submit(self, priority: Priority, method: str, *args, **kwargs) -> Any:
+        '''
+        Enfileira uma requisição e bloqueia até que ela seja executada.
+
+        Args:
+            - priority (Priority): Faixa de prioridade da requisição.
+            - method (str)       : Método do ModbusTcpClient (e.g., 'write_register').
+            - *args, **kwargs    : Argumentos do método.
+
+        Returns:
+            Any: Resposta do cliente Modbus.
+
+        Raises:
+            - PLCUnavailableError: Se o PLC estiver fora do ar (apenas com supervisor).
+            - TimeoutError       : Se a requisição não for concluída em 'request_timeout' segundos.
+            - Exception          : Erro levantado pelo cliente Modbus.
+        '''
+        if self.supervisor is not None and method in DEFAULT_PRIORITY:
+            self.supervisor.check()
+
+        request = _Request(Priority(priority), method, args, kwargs)
+
+        with self._lock:
+            self._depth[request.priority] += 1
+            self._max_depth[request.priority] = max(self._max_depth[request.priority], self._depth[request.priority])
+
+        self._queue.put((request.priority, next(self._sequence), request))
+
+        if not request.done.wait(self.request_timeout):
+            request.cancelled = True
+            self._timeouts += 1
+            raise TimeoutError(f"Requisição {method} ao {self.name} não atendida em {self.request_timeout}s")
+
+        if request.error is not None:
+            if self.supervisor is not None and not self.supervisor.available:
+                raise PLCUnavailableError(self.name) from request.error
+            raise request.error
+        return request.result
+
+    def lane(self, priority: Priority) -> DispatcherLane:
+        '''
+        Retorna um cliente com prioridade fixa, para ser usado no lugar do ModbusTcpClient.
+        '''
+        return self._lanes[Priority(priority)]
+
+    def read_input_registers(self, *args, **kwargs):
+        return self.submit(Priority.SENSOR, 'read_input_registers', *args, **kwargs)
+
+    def read_holding_registers(self, *args, **kwargs):
+        return self.submit(Priority.SENSOR, 'read_holding_registers', *args, **kwargs)
+
+    def write_register(self, *args, **kwargs):
+        return self.submit(Priority.MOTION, 'write_register', *args, **kwargs)
+
+    def write_registers(self, *args, **kwargs):
+        return self.submit(Priority.MOTION, 'write_registers', *args, **kwargs)
+
+    def connect(self) -> bool:
+        return self.submit(Priority.SAFETY, 'connect')
+
+    def close(self):
+        return self.submit(Priority.SAFETY, 'close')
+
+    def reconnect(self) -> bool:
+        self.close()
+        return bool(self.connect())
+
+    def supervise(self, **options) -> ConnectionSupervisor:
+        '''
+        Cria o supervisor da conexão deste PLC (ainda não iniciado: chamar start()).
+
+        Args:
+            - **options: Parâmetros do ConnectionSupervisor (initial_backoff, max_backoff, failure_threshold, on_change).
+
+        Returns:
+            ConnectionSupervisor: Supervisor que reconecta por reconnect().
+        '''
+        self.supervisor = ConnectionSupervisor(self.name, self.reconnect, **options)
+        return self.supervisor
+
+    @property
+    def connected(self) -> bool:
+        return self.client.connected
+
+    def metrics(self) -> Dict[str, Any]:
+        '''
+        Retorna as métricas da fila por faixa de prioridade.
+
+        Returns:
+            dict: timeouts e, para cada faixa (safety, motion, sensor, lamp): depth, max_depth,
+                  completed, wait_avg_ms e wait_max_ms (tempo entre enfileirar e começar a executar).
+        '''
+        with self._lock:
+            lanes = {
+                priority.name.lower(): {
+                    'depth': self._depth[priority],
+                    'max_depth': self._max_depth[priority],
+                    'completed': self._completed[priority],
+                    'wait_avg_ms': (self._wait_total[priority] / self._completed[priority] * 1000) if self._completed[priority] else 0.0,
+                    'wait_max_ms': self._wait_max[priority] * 1000,
+                }
+                for priority in Priority
+            }
+
+        return {'plc': self.name, 'timeouts': self._timeouts, 'lanes': lanes}
+
+    def _run(self):
+        while True:
+            _, _, request = self._queue.get()
+            waited = time.monotonic() - request.enqueued_at
+
+            with self._lock:
+                self._depth[request.priority] -= 1
+
+            if request.cancelled:
+                continue
+
+            start = time.monotonic()
+            try:
+                request.result = getattr(self.client, request.method)(*request.args, **request.kwargs)
+            except Exception as e:
+                request.error = e
+                self.logger.logger.error(f"Dispatcher {self.name}: erro em {request.method}: {e}")
+
+            if request.method in DEFAULT_PRIORITY:
+                outcome = ModbusMetrics.classify(request.result, request.error)
+                self.transport_metrics.observe(self.name, request.method, time.monotonic() - start, outcome)
+                if self.supervisor is not None:
+                    self.supervisor.record(outcome)
+            self.transport_metrics.connection_state(self.name, bool(getattr(self.client, 'connected', True)))
+
+            with self._lock:
+                self._completed[request.priority] += 1
+                self._wait_total[request.priority] += waited
+                self._wait_max[request.priority] = max(self._wait_max[request.priority], waited)
+
+            request.done.set()
@@ -0,0 +1,262 @@
+import time
+import threading
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+Lamps = Tuple[int, int, int]  # (verde, amarela, vermelha)
+
+# Sequência de fases (lâmpadas, duração em segundos) por estado da máquina.
+# Padrões com uma única fase são fixos e a duração é ignorada.
+LAMP_PATTERNS: Dict[str, List[Tuple[Lamps, float]]] = {
+    'running':    [((1, 0, 0), 0)],
+    'idle':       [((1, 1, 0), 0.5), ((1, 0, 0), 0.2), ((1, 1, 0), 0.2)],
+    'error':      [((0, 1, 1), 0)],
+    'emergency':  [((0, 0, 1), 0.5), ((0, 0, 0), 0.5)],
+    'cycle':      [((0, 0, 1), 1.0), ((0, 1, 0), 1.0), ((1, 0, 0), 1.0)],
+    'stopped':    [((0, 0, 1), 0)],
+    'no_product': [((0, 1, 1), 0)],
+}
+DEFAULT_PATTERN: List[Tuple[Lamps, float]] = [((0, 0, 0), 0)]
+
+NO_PRODUCT_LAMPS: Lamps = (0, 1, 1)  # Magazine sem peça: vermelha e amarela acesas
+
+
+class _Timer:
+    __slots__ = ('callback', 'rounds', 'cancelled')
+
+    def __init__(self, callback: Callable[[], None], rounds: int):
+        self.callback = callback
+        self.rounds = rounds
+        self.cancelled = False
+
+
+class TimerWheel:
+    '''
+    Roda de temporização (hashed timing wheel): 'slots' posições de 'tick' segundos cada,
+    percorridas em círculo; cada timer fica na posição em que vence e conta as voltas que faltam.
+
+    Métodos:
+        - schedule(delay, callback) -> timer: Agenda 'callback' para daqui a 'delay' segundos.
+        - cancel(timer): Cancela um timer agendado (None é ignorado).
+        - advance(now) -> int: Avança até 'now' executando os timers vencidos; retorna quantos foram executados.
+
+    Observação:
+        - Agendar e cancelar são O(1); avançar custa O(ticks decorridos + timers vencidos).
+        - A precisão é de um 'tick'. A roda não é thread-safe: quem a usa serializa o acesso.
+    '''
+
+    def __init__(self, tick: float = 0.05, slots: int = 64, now: Optional[float] = None):
+        self.tick = tick
+        self._slots: List[List[_Timer]] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._last = time.monotonic() if now is None else now
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> _Timer:
+        ticks = max(1, round(delay / self.tick))
+        timer = _Timer(callback, (ticks - 1) // len(self._slots))
+        self._slots[(self._cursor + ticks) % len(self._slots)].append(timer)
+        return timer
+
+    def cancel(self, timer: Optional[_Timer]):
+        if timer is not None:
+            timer.cancelled = True
+
+    def advance(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        fired = 0
+
+        while now - self._last >= self.tick:
+            self._last += self.tick
+            self._cursor = (self._cursor + 1) % len(self._slots)
+
+            slot = self._slots[self._cursor]
+            self._slots[self._cursor] = []
+
+            for timer in slot:
+                if timer.cancelled:
+                    continue
+                if timer.rounds > 0:
+                    timer.rounds -= 1
+                    self._slots[self._cursor].append(timer)
+                    continue
+                timer.callback()
+                fired += 1
+
+        return fired
+
+
+class LampController:
+    '''
+    Controla as lâmpadas do Andon a partir de padrões declarativos (LAMP_PATTERNS): cada estado da
+    máquina é uma sequência de fases e uma TimerWheel agenda a troca de fase.
+
+    Métodos:
+        - set_state(state): Troca o padrão exibido, a partir da primeira fase.
+        - override(lamps, duration): Exibe 'lamps' por 'duration' segundos no lugar do padrão do estado.
+        - poll(now) -> tuple | None: Avança a roda e retorna as lâmpadas a escrever, se mudaram desde a última escrita.
+        - invalidate(): Força a reescrita das lâmpadas no próximo poll (e.g., após falha de escrita).
+        - run(write, stop): Laço bloqueante que escreve as lâmpadas com 'write(green, yellow, red)'.
+        - metrics() -> dict: Estado, lâmpadas, escritas e trocas de fase.
+
+    Uso:
+        lamps = LampController(state='idle')
+        threading.Thread(target=lamps.run, args=(mes.set_lamps,), daemon=True).start()
+        lamps.set_state('running')
+
+    Observação:
+        - Só há escrita quando alguma lâmpada muda: estados fixos (running, stopped) não geram tráfego
+          Modbus e padrões piscantes geram uma escrita por fase.
+        - set_state e override acordam o laço de 'run' na hora; a mudança aparece nas lâmpadas sem
+          esperar o fim da fase em andamento.
+    '''
+
+    def __init__(self, patterns: Optional[Dict[str, List[Tuple[Lamps, float]]]] = None, state: str = 'stopped',
+                 tick: float = 0.05, slots: int = 64):
+        self.patterns = patterns or LAMP_PATTERNS
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._wheel = TimerWheel(tick, slots)
+
+        self._state: Optional[str] = None
+        self._phase = 0
+        self._phase_timer: Optional[_Timer] = None
+        self._override: Optional[Lamps] = None
+        self._override_timer: Optional[_Timer] = None
+        self._written: Optional[Lamps] = None
+
+        self.writes = 0
+        self.phase_changes = 0
+
+        self.set_state(state)
+
+    @property
+    def state(self) -> Optional[str]:
+        return self._state
+
+    @property
+    def lamps(self) -> Lamps:
+        ''' Lâmpadas que devem estar acesas agora. '''
+        with self._lock:
+            return self._current()
+
+    def set_state(self, state: str):
+        '''
+        Troca o padrão exibido para o do estado 'state' (estados sem padrão apagam as lâmpadas).
+        '''
+        with self._lock:
+            if state == self._state:
+                return
+            self._state = state
+            self._start_phase(0)
+
+        self._wakeup.set()
+
+    def override(self, lamps: Lamps, duration: float):
+        '''
+        Exibe 'lamps' por 'duration' segundos no lugar do padrão do estado atual.
+
+        Args:
+            - lamps (tuple)   : (verde, amarela, vermelha).
+            - duration (float): Tempo em segundos; um novo override substitui o anterior.
+        '''
+        with self._lock:
+            self._wheel.cancel(self._override_timer)
+            self._override = tuple(lamps)
+            self._override_timer = self._wheel.schedule(duration, self._end_override)
+
+        self._wakeup.set()
+
+    def clear_override(self):
+        with self._lock:
+            self._wheel.cancel(self._override_timer)
+            self._end_override()
+
+        self._wakeup.set()
+
+    def poll(self, now: Optional[float] = None) -> Optional[Lamps]:
+        '''
+        Avança a roda de temporização até 'now' e retorna as lâmpadas a escrever.
+
+        Returns:
+            tuple | None: (verde, amarela, vermelha) se diferem da última escrita, ou None.
+        '''
+        with self._lock:
+            self._wheel.advance(now)
+
+            lamps = self._current()
+            if lamps == self._written:
+                return None
+
+            self._written = lamps
+            self.writes += 1
+            return lamps
+
+    def invalidate(self):
+        with self._lock:
+            self._written = None
+
+    def run(self, write: Callable[[int, int, int], Optional[bool]], stop: Optional[threading.Event] = None):
+        '''
+        Laço bloqueante: escreve as lâmpadas sempre que mudam, acordando a cada tick da roda
+        ou imediatamente em set_state/override.
+
+        Args:
+            - write (callable)        : Função que escreve (green, yellow, red); retornar False indica falha.
+            - stop (threading.Event)  : Encerra o laço quando sinalizado.
+        '''
+        failing = False
+
+        while stop is None or not stop.is_set():
+            self._wakeup.clear()
+
+            lamps = self.poll()
+            if lamps is not None:
+                try:
+                    failing = write(*lamps) is False
+                except Exception as e:
+                    # Registra só a primeira falha seguida (e.g., PLC fora do ar): a escrita é repetida a cada tick
+                    if not failing:
+                        print(f"Erro ao controlar lâmpadas: {e}")
+                    failing = True
+
+                if failing:
+                    self.invalidate()
+
+            self._wakeup.wait(self._wheel.tick)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'state': self._state,
+                'lamps': self._current(),
+                'override': self._override is not None,
+                'writes': self.writes,
+                'phase_changes': self.phase_changes,
+            }
+
+    def _pattern(self) -> List[Tuple[Lamps, float]]:
+        return self.patterns.get(self._state, DEFAULT_PATTERN)
+
+    def _current(self) -> Lamps:
+        if self._override is not None:
+            return self._override
+        return self._pattern()[self._phase][0]
+
+    def _start_phase(self, phase: int):
+        self._wheel.cancel(self._phase_timer)
+        self._phase_timer = None
+        self._phase = phase
+
+        pattern = self._pattern()
+        if len(pattern) > 1:
+            self._phase_timer = self._wheel.schedule(pattern[phase][1], self._next_phase)
+
+    def _next_phase(self):
+        self.phase_changes += 1
+        self._start_phase((self._phase + 1) % len(self._pattern()))
+
+    def _end_override(self):
+        self._override = None
+        self._override_timer = None
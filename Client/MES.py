@@ -1,7 +1,10 @@
 import time
+import queue
+import threading
 import Utils.logger as loggerManager
 
 from typing import Optional
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass
 from pymodbus.client import ModbusTcpClient
 
@@ -9,84 +12,72 @@ from Maps.Mapping import input_register_handling_plc
 from Maps.Mapping import holding_register_handling_plc
 from Maps.Mapping import input_register_pressing_plc
 from Maps.Mapping import holding_register_pressing_plc
-
-import pyodbc
-
-# ==== robot
-import rtde_io
-import rtde_receive
+from Maps.Mapping import INPUT_REGISTER_MAPS, HOLDING_REGISTER_MAPS, register_addresses, register_block
+from Client.Scanner import RegisterScanner, WaitResult
+from Client.Dispatcher import ModbusDispatcher, Priority
+from Client.WriteBatch import WriteTransaction
+from Client.OrderCache import ActiveOrderCache
+from Client.WriteBehind import WriteBehindQueue
+from Client.ProductionStats import ProductionStats
+from Client.WIP import WIPTracker, UNDEFINED_COLOR
+from Client.Lamps import LampController, NO_PRODUCT_LAMPS
+from Client.Buttons import ButtonEvent, EdgeDetector, HANDLING_BUTTONS
+from Client.Polling import PollingScheduler
+from Client.Supervisor import ConnectionSupervisor, HealthState
+
+from Client.Robot import RobotSession
 from Server.DigitalTwin import DigitalTwin, DI, INPUT_HR
+from Utils.database import ConnectionPool, db_pool, is_permanent_error
+from Utils.events import EventBroadcaster, broadcaster
+from Utils.metrics import StepMetrics, timed
 
 
-def escrever_saida_digital_robot(host, output_id, valor):
-    """
-    Conecta ao robô e escreve um valor na saída digital padrão.
+HOST = "192.168.0.10"
 
-    Args:
-        host (str): Endereço IP do robô.
-        output_id (int): ID da saída digital [0-7] para saídas padrão.
-        valor (bool): True para ligar (HIGH), False para desligar (LOW).
+STOP_REGISTER_COUNT = 20  # HR zerados na parada geral de um PLC sem mapa em Maps.Mapping (e.g., MPS_SORTING)
+RECONCILE_ATTEMPTS = 5  # Releituras da ordem ativa quando uma gravação de peças termina durante a consulta
+
+# Tempo máximo (s) de cada espera do ciclo; sobrescrito pela seção 'timeouts' do config.json
+STEP_TIMEOUTS = {
+    'gripper':          5.0,    # Garra avançar/recuar
+    'arm':              10.0,   # Braço chegar em home, rejeito ou deixa
+    'magazine':         5.0,    # Magazine recuar/avançar
+    'conveyor_claim':   120.0,  # Esteira ficar livre para a próxima peça
+    'robot':            60.0,   # Robô retirar a peça do fim da esteira
+    'conveyor_release': 30.0,   # Fim da esteira liberar quando o robô não sinalizou conclusão (runtime assíncrono)
+}
 
-    Returns:
-        bool: True se o comando foi executado com sucesso.
-    """
-    try:
-        rtde_io_interface = rtde_io.RTDEIOInterface(host)
-        
-        sucesso = rtde_io_interface.setStandardDigitalOut(output_id, valor)
-        
-        if sucesso:
-            estado = "LIGADA" if valor else "DESLIGADA"
-            print(f"Saída digital {output_id} {estado} com sucesso!")
-        else:
-            print(f"Falha ao configurar saída digital {output_id}")
-        
-        # Desconecta
-        rtde_io_interface.disconnect()
-        
-        return sucesso
-    
-    except Exception as e:
-        print(f"Erro ao escrever na saída digital: {e}")
-        return False
+PLC_ROLE_MAP = {
+    "MPS_HANDLING": "handling",
+    "MPS_PRESSING": "pressing",
+    "MPS_SORTING":  "sorting",
+}
 
-def ler_saida_digital_robot(host, output_id):
-    """
-    Conecta ao robô e lê o valor atual da saída digital padrão.
+
+def stop_writes(plc: str) -> dict[int, int]:
+    '''
+    Escritas da parada geral de um PLC: zera só os Holding Registers que existem no PLC.
 
     Args:
-        host (str): Endereço IP do robô.
-        output_id (int): ID da saída digital [0-7] para saídas padrão.
+        - plc (str): Nome do PLC (e.g., 'MPS_PRESSING').
 
     Returns:
-        bool or None: True se HIGH, False se LOW, None se erro.
-    """
-    try:
-        rtde_r = rtde_receive.RTDEReceiveInterface(host)
-        
-        valor_atual = rtde_r.getDigitalOutState(output_id)
-        
-        print(f"[robot] - Saída digital {output_id} está: {valor_atual}")
-
-        rtde_r.disconnect()
-        
-        return valor_atual
-    
-    except Exception as e:
-        print(f"Erro ao ler a saída digital: {e}")
-        return None
-
-HOST = "192.168.0.10"
+        dict[int, int]: Endereço -> 0 para os endereços mapeados em Maps.Mapping (HR 0-19 se o PLC não tiver mapa).
+    '''
+    register_map = HOLDING_REGISTER_MAPS.get(plc)
+    addresses = register_addresses(register_map) if register_map else range(STOP_REGISTER_COUNT)
+    return dict.fromkeys(addresses, 0)
 
-PLC_ROLE_MAP = {
-    "MPS_HANDLING": "handling",
-    "MPS_PRESSING": "pressing",
-    "MPS_SORTING":  "sorting",
-}
 
 @dataclass
-class Piece:
-    id: int
+class PieceCompleted:
+    '''
+    Evento de peça processada, enfileirado para gravação em segundo plano.
+    '''
+    color: str
+    result: int
+    order_id: Optional[int]
+    created_at: datetime
 
 class MES:
     '''
@@ -94,8 +85,22 @@ class MES:
 
     Métodos:
         - get_plc(name: str) -> ModbusTcpClient: Retorna o cliente Modbus do PLC pelo nome.
+        - start_scanners(): Inicia a varredura contínua dos Input Registers de cada PLC.
+        - watch_connection(plc, supervisor): Acompanha a saúde da conexão de um PLC (ConnectionSupervisor).
+        - wait_connected(plc, timeout) -> bool: Aguarda a reconexão de um PLC fora do ar.
+        - read_input(plc, address) -> int | None: Lê um Input Register a partir da imagem do scanner.
+        - wait_for(plc, address, value, timeout) -> WaitResult: Aguarda um sinal atingir um valor, acordando na borda.
+        - claim_conveyor(timeout) -> WaitResult: Aguarda a esteira ficar livre e a reserva para a próxima peça.
+        - write_transaction(plc, priority) -> WriteTransaction: Agrupa escritas de Holding Registers em requisições FC16.
+        - step_metrics (StepMetrics): Tempos de cada etapa do ciclo (p50/p95/p99 por etapa).
+        - wip (WIPTracker): Peças em processo, da garra até a retirada pelo robô.
+        - dispatch_metrics() -> dict: Fila e tempo de espera por prioridade dos PLCs atendidos por ModbusDispatcher.
+        - lamps (LampController): Padrões das lâmpadas do Andon por estado da máquina.
+        - set_lamps(green, yellow, red) -> bool: Atualiza as lâmpadas do Andon no PLC e no Digital Twin.
         - stop_all_operations(): Para todas as operações de todos os PLC's.
         - reset_to_home_position(): Reseta o sistema para a posição home.
+        - polling (PollingScheduler): Intervalo de varredura de cada PLC por estado da máquina e movimento em andamento.
+        - buttons (EdgeDetector): Bordas dos botões start, stop e reset, detectadas nas imagens do scanner de manuseio.
         - monitor_buttons(): Monitora os botões de start, stop e reset.
         - handle_lamp(): Controla as lâmpadas indicadoras de status.
         - gripper_open(): Abre a garra do manipulador.
@@ -109,27 +114,64 @@ class MES:
         - magazine_advance(): Avança o magazine para a posição de pegar peça.
         - flow_first_plc(): Fluxo principal do PLC de manuseio.
         - flow_second_plc(): Fluxo principal do PLC de prensagem.
+
+    Observação:
+        - Com 'pipelined' = True o magazine alimenta a próxima peça em paralelo, enquanto o braço leva a
+          peça atual até HOME e aguarda a esteira; o ciclo seguinte começa com a peça já no suporte.
+        - 'timeouts' sobrescreve os tempos máximos de STEP_TIMEOUTS e 'polling_profiles' os intervalos de
+          POLLING_PROFILES (seções 'timeouts' e 'polling' do config.json).
     '''
-    def __init__(self, clients: Optional[dict[str, ModbusTcpClient]] = None, gemeo: DigitalTwin = None):
+    def __init__(self, clients: Optional[dict[str, ModbusTcpClient]] = None, gemeo: DigitalTwin = None, robot: Optional[RobotSession] = None,
+                 pool: Optional[ConnectionPool] = None, events: Optional[EventBroadcaster] = None, pipelined: bool = False,
+                 timeouts: Optional[dict[str, float]] = None, polling_profiles: Optional[dict[str, dict[str, float]]] = None):
         self.logger = loggerManager.LoggerManager()
         self.logger.set_name('MES of MPS')
 
         self.clients = clients or {}
-        self.parts = []
-
-        self.preemption_lamp_control = False
-
-        self.state_machine = 'running'
+        self.supervisors: dict[str, ConnectionSupervisor] = {}
+
+        self.scanners = {
+            name: RegisterScanner(name, self._lane(name, Priority.SENSOR), *register_block(INPUT_REGISTER_MAPS[name]))
+            for name in self.clients
+            if name in INPUT_REGISTER_MAPS
+        }
+
+        unknown = set(timeouts or {}) - set(STEP_TIMEOUTS)
+        if unknown:
+            raise ValueError(f"Timeouts desconhecidos: {sorted(unknown)} (válidos: {sorted(STEP_TIMEOUTS)})")
+        self.timeouts = {**STEP_TIMEOUTS, **(timeouts or {})}
+
+        self.polling = PollingScheduler(self.scanners, polling_profiles)
+        self.buttons = EdgeDetector(HANDLING_BUTTONS)
+        if 'MPS_HANDLING' in self.scanners:
+            self.scanners['MPS_HANDLING'].subscribe(self.buttons.update)
+
+        self._state_machine = 'running'
+        self.lamps = LampController(state=self._state_machine)
+        self._conveyor_available = True
+        self._conveyor_condition = threading.Condition()
+        self.pipelined = pipelined
+        self._feeder: Optional[threading.Thread] = None
         self.gemeo = gemeo
-
-        self.db_connection_string = (
-            'DRIVER={ODBC Driver 17 for SQL Server};'
-            'SERVER=localhost\\SQLEXPRESS;'
-            'DATABASE=db_mps;'
-            'Trusted_Connection=yes;'
-        )
-
-        self.is_conveyor_available = True
+        self.robot = robot or RobotSession(HOST)
+        self.events = events or broadcaster
+        self.wip = WIPTracker(on_change=lambda snapshot: self.events.publish('wip', snapshot))
+        self.step_metrics = StepMetrics()
+
+        self.db_pool = pool or db_pool
+        self._unsaved_approvals: dict[int, int] = {}  # order_id -> peças aprovadas enfileiradas e ainda não gravadas
+        self._unsaved_lock = threading.RLock()  # Protege só os contadores, nunca o acesso ao banco
+        self._unsaved_version = 0  # Incrementada a cada mudança em _unsaved_approvals
+        self._committing = 0       # Lotes entre conn.commit() e a baixa das aprovações
+        self.order_cache = ActiveOrderCache(self._query_active_order, on_change=self._on_active_order_change)
+        self.piece_writer = WriteBehindQueue(self._persist_piece_batch, name='piece-writer',
+                                             is_permanent=is_permanent_error, on_dead_letter=self._drop_piece)
+        self.production_stats = ProductionStats(self._query_daily_stats)
+        self.production_stats.seed()
+
+        for name, client in self.clients.items():
+            if getattr(client, 'supervisor', None) is not None:
+                self.watch_connection(name, client.supervisor)
 
         if not self.clients:
             self.logger.set_level("ERROR")
@@ -137,60 +179,239 @@ class MES:
             raise ValueError("MES inicializado sem clientes Modbus.")
         
 
+    @property
+    def state_machine(self) -> str:
+        ''' Estado atual da máquina (idle, running, stopped, cycle, error, emergency, no_product). '''
+        return self._state_machine
+
+    @state_machine.setter
+    def state_machine(self, state: str):
+        self._state_machine = state
+        self.lamps.set_state(state)
+        self.polling.set_state(state)
+
+        # Acorda as esperas em andamento para que reavaliem o cancelamento
+        for scanner in getattr(self, 'scanners', {}).values():
+            scanner.notify()
+
+        condition = getattr(self, '_conveyor_condition', None)
+        if condition is not None:
+            with condition:
+                condition.notify_all()
+
+        self.publish_machine_status()
+
+    @property
+    def is_conveyor_available(self) -> bool:
+        ''' Indica se a esteira do PLC de prensagem está livre para receber uma nova peça. '''
+        return self._conveyor_available
+
+    @is_conveyor_available.setter
+    def is_conveyor_available(self, available: bool):
+        with self._conveyor_condition:
+            changed = available != self._conveyor_available
+            self._conveyor_available = available
+            self._conveyor_condition.notify_all()
+
+        if changed:
+            self.publish_machine_status()
+
+    def claim_conveyor(self, timeout: float) -> WaitResult:
+        '''
+        Aguarda a esteira ficar livre e a reserva (is_conveyor_available = False) numa única operação.
+
+        Args:
+            - timeout (float): Tempo máximo de espera em segundos.
+
+        Returns:
+            WaitResult: OK se a esteira foi reservada, TIMEOUT se o tempo expirou,
+                        CANCELLED se a máquina saiu do estado 'running'.
+
+        Observação:
+            - A espera acorda assim que o fluxo de prensagem libera a esteira ou o estado da máquina muda,
+              sem varredura periódica da flag.
+        '''
+        deadline = time.monotonic() + timeout
+
+        with self._conveyor_condition:
+            while not self._conveyor_available:
+                if self.state_machine != 'running':
+                    return WaitResult.CANCELLED
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return WaitResult.TIMEOUT
+
+                self._conveyor_condition.wait(remaining)
+
+            self._conveyor_available = False
+
+        self.publish_machine_status()
+        return WaitResult.OK
+
+    def machine_status(self, cached: bool = False) -> dict:
+        '''
+        Monta o estado atual da máquina exibido no dashboard.
+
+        Args:
+            cached (bool): Usa a ordem ativa em cache sem consultar o banco, mesmo que o cache esteja vencido.
+
+        Returns:
+            dict: status, conveyor_available, active_order (ou None), plcs (saúde da conexão por PLC) e timestamp.
+        '''
+        active_order = None
+        active_order_data = self.order_cache.peek() if cached else self.get_active_order()
+        
+        if active_order_data:
+            active_order = {
+                "order_name": active_order_data['order_name'],
+                "color_requested": active_order_data['color_requested'],
+                "quantity_requested": active_order_data['quantity_requested'],
+                "quantity_processed": active_order_data['quantity_processed'],
+                "quantity_remaining": active_order_data['quantity_requested'] - active_order_data['quantity_processed']
+            }
+        
+        return {
+            "status": self.state_machine,
+            "conveyor_available": self.is_conveyor_available,
+            "active_order": active_order,
+            "plcs": {name: supervisor.state.value for name, supervisor in getattr(self, 'supervisors', {}).items()},
+            "timestamp": time.time()
+        }
+
+    def publish_machine_status(self):
+        '''
+        Publica o estado atual da máquina para os clientes conectados ao fluxo de eventos.
+
+        Observação:
+            - Chamado pelos setters de 'state_machine' e 'is_conveyor_available', que o runtime assíncrono
+              usa no event loop: a ordem ativa vem do cache, sem consultar o banco. Uma recarga do cache
+              publica o estado de novo (_on_active_order_change).
+        '''
+        events = getattr(self, 'events', None)
+        if events is not None:
+            events.publish('machine-status', self.machine_status(cached=True))
+
+    def watch_connection(self, plc: str, supervisor: ConnectionSupervisor):
+        '''
+        Passa a acompanhar a saúde da conexão de um PLC: as mudanças são publicadas no estado da máquina.
+
+        Args:
+            plc (str): Nome do PLC.
+            supervisor (ConnectionSupervisor): Supervisor da conexão do PLC.
+        '''
+        self.supervisors[plc] = supervisor
+        supervisor.on_change = lambda state: self._on_connection_change(plc, state)
+
+    def wait_connected(self, plc: str, timeout: Optional[float] = None) -> bool:
+        '''
+        Aguarda um PLC fora do ar ser reconectado pelo supervisor.
+
+        Returns:
+            bool: True se o PLC está disponível (ou não é supervisionado), False se o tempo expirou.
+        '''
+        supervisor = self.supervisors.get(plc)
+        return supervisor is None or supervisor.wait_connected(timeout)
+
+    def _on_connection_change(self, plc: str, state: HealthState):
+        # Um PLC reiniciado volta com as saídas zeradas: as lâmpadas precisam ser reescritas
+        if state is HealthState.CONNECTED:
+            self.lamps.invalidate()
+        self.publish_machine_status()
+
+    def _on_active_order_change(self, order: Optional[dict]):
+        self.polling.set_order_active(order is not None)
+        self.publish_machine_status()
+        self.events.publish('orders', {'active_order_id': order['id'] if order else None}, retain=False)
+
     def get_db_connection(self):
-        """Cria e retorna uma conexão com o banco de dados."""
-        return pyodbc.connect(self.db_connection_string)
+        """Empresta uma conexão do pool de banco de dados (usar com 'with')."""
+        return self.db_pool.connection()
     
 
     def get_active_order(self):
         """
-        Busca a ordem de produção mais antiga que ainda não foi finalizada.
+        Retorna a ordem de produção mais antiga que ainda não foi finalizada.
         
         Returns:
             dict: Dicionário com os dados da ordem ativa ou None se não houver ordem ativa.
+
+        Observação:
+            - A ordem é servida do cache em memória; o banco só é consultado quando o cache
+              é invalidado ou no intervalo de reconciliação.
         """
-        try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT TOP 1
-                id,
-                order_name,
-                color_requested,
-                quantity_requested,
-                quantity_processed,
-                created_at
-            FROM production_orders
-            WHERE finished_at IS NULL
-            ORDER BY created_at ASC
-            """
-            
-            cursor.execute(query)
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                return {
-                    'id': row.id,
-                    'order_name': row.order_name,
-                    'color_requested': row.color_requested,
-                    'quantity_requested': row.quantity_requested,
-                    'quantity_processed': row.quantity_processed,
-                    'created_at': row.created_at
-                }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Erro ao buscar ordem ativa: {e}")
+        return self.order_cache.get()
+
+    def invalidate_active_order(self):
+        """
+        Invalida o cache da ordem ativa (e.g., após a criação de uma nova ordem pela API).
+        """
+        self.order_cache.invalidate()
+
+    def _query_active_order(self):
+        """
+        Consulta no banco a ordem de produção mais antiga que ainda não foi finalizada.
+        
+        Returns:
+            dict: Dicionário com os dados da ordem ativa ou None se não houver ordem ativa.
+
+        Raises:
+            - pyodbc.Error: Em caso de erro na consulta (o cache mantém a última ordem conhecida).
+            - RuntimeError: Se as gravações de peças não derem uma leitura consistente em RECONCILE_ATTEMPTS tentativas.
+
+        Observação:
+            - As aprovações ainda na fila de gravação são somadas a quantity_processed, para que a
+              reconciliação não faça o progresso em memória voltar atrás.
+            - O lock dos contadores não é mantido durante a consulta: se um commit de peças ou uma mudança
+              nos contadores acontecer no meio dela, a leitura é refeita.
+        """
+        query = """
+        SELECT TOP 1
+            id,
+            order_name,
+            color_requested,
+            quantity_requested,
+            quantity_processed,
+            created_at
+        FROM production_orders
+        WHERE finished_at IS NULL
+        ORDER BY created_at ASC
+        """
+
+        for _ in range(RECONCILE_ATTEMPTS):
+            with self._unsaved_lock:
+                version, committing = self._unsaved_version, self._committing
+
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                row = cursor.fetchone()
+
+            with self._unsaved_lock:
+                if not committing and not self._committing and version == self._unsaved_version:
+                    unsaved = self._unsaved_approvals.get(row.id, 0) if row else 0
+                    break
 
-            return None
+            time.sleep(0.01)
+        else:
+            raise RuntimeError("gravações de peças em andamento durante a leitura da ordem ativa")
+        
+        if row:
+            return {
+                'id': row.id,
+                'order_name': row.order_name,
+                'color_requested': row.color_requested,
+                'quantity_requested': row.quantity_requested,
+                'quantity_processed': row.quantity_processed + unsaved,
+                'created_at': row.created_at
+            }
+        
+        return None
     
 
     def register_piece(self, color: str, result: int, order_id: int = None):
         """
-        Registra uma peça processada no banco de dados.
+        Registra uma peça processada, gravando-a no banco em segundo plano (write-behind).
         
         Args:
             color (str): Cor da peça ('preto', 'prata', 'rosa')
@@ -198,46 +419,111 @@ class MES:
             order_id (int): ID da ordem de produção (opcional)
         
         Returns:
-            bool: True se registrado com sucesso, False caso contrário
+            bool: True se a peça foi enfileirada para gravação, False caso contrário
+
+        Observação:
+            - Peças aprovadas incrementam o progresso da ordem imediatamente no cache em memória,
+              de modo que as decisões de aprovação/rejeição seguintes já enxergam a contagem correta.
+            - Quando a ordem atinge a quantidade solicitada ela é fechada no cache e a fila é descarregada;
+              se a gravação atrasar, não há ordem ativa até o banco marcar a ordem como finalizada,
+              então nenhuma peça é aprovada além da quantidade solicitada.
         """
+        event = PieceCompleted(color, result, order_id, datetime.now())
+        approved = result == 1 and order_id is not None
+
+        # Progresso lido antes de contar a peça como pendente: uma recarga do cache depois disso
+        # já soma a peça a quantity_processed, e o '+ 1' abaixo a contaria duas vezes
+        order = self.get_active_order() if approved else None
+
+        # Contada antes de enfileirar: a gravação pode terminar antes de submit() retornar
+        if approved:
+            self._count_unsaved(order_id, 1)
+        
         try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            query = """
-            INSERT INTO pieces (piece_color, result, order_id, created_at)
-            VALUES (?, ?, ?, GETDATE())
-            """
-            
-            cursor.execute(query, color, result, order_id)
-            conn.commit()
-            conn.close()
-            
-            status = "APROVADA" if result == 1 else "REJEITADA"
-            print(f"Peça {color} {status} registrada no banco (Order ID: {order_id})")
-            return True
-            
+            self.piece_writer.submit(event)
         except Exception as e:
             print(f"Erro ao registrar peça: {e}")
+            if approved:
+                self._count_unsaved(order_id, -1)
             return False
         
+        self.production_stats.record(color, result, event.created_at)
+        
+        self.events.publish('piece', {
+            'piece_color': color,
+            'result': result,
+            'order_id': order_id,
+            'created_at': event.created_at.isoformat()
+        }, retain=False)
+        self.events.publish('production-stats', self.production_stats.snapshot())
+        
+        status = "APROVADA" if result == 1 else "REJEITADA"
+        print(f"Peça {color} {status} enfileirada para o banco (Order ID: {order_id})")
+        
+        if approved and order and order['id'] == order_id:
+            processed = order['quantity_processed'] + 1
+            print(f"Ordem ID {order_id} atualizada: {processed}/{order['quantity_requested']}")
+            
+            if processed >= order['quantity_requested']:
+                # A ordem fica fechada em memória até o banco confirmar, mesmo se a gravação atrasar
+                self.order_cache.finish(order_id)
+                if self.piece_writer.flush(timeout=10):
+                    print(f"Ordem ID {order_id} FINALIZADA!")
+                else:
+                    print(f"Ordem ID {order_id} FINALIZADA (gravação no banco pendente - próxima ordem aguarda a confirmação)")
+            else:
+                self.order_cache.update(order_id, quantity_processed=processed)
+        
+        return True
+
+    def _count_unsaved(self, order_id: int, delta: int):
+        with self._unsaved_lock:
+            self._unsaved_version += 1
+            count = self._unsaved_approvals.get(order_id, 0) + delta
+            if count:
+                self._unsaved_approvals[order_id] = count
+            else:
+                self._unsaved_approvals.pop(order_id, None)
 
-    def update_order_progress(self, order_id: int):
+    def _drop_piece(self, event: PieceCompleted, error: Exception):
         """
-        Incrementa o contador de peças processadas de uma ordem.
-        Se atingir a quantidade solicitada, marca a ordem como finalizada.
-        Sempre atualiza updated_at.
-        
+        Desfaz em memória uma peça que o write-behind descartou por erro permanente.
+
         Args:
-            order_id (int): ID da ordem a ser atualizada
+            event (PieceCompleted): Peça descartada (registrada no log pela fila).
+            error (Exception): Erro da gravação.
+
+        Observação:
+            - Uma aprovação descartada deixa de contar no progresso e a ordem é recarregada do banco,
+              inclusive se ela tinha sido fechada em memória por essa peça.
+        """
+        print(f"Peça {event.color} descartada sem gravar no banco (Order ID: {event.order_id}): {error}")
+
+        if event.result == 1 and event.order_id is not None:
+            self._count_unsaved(event.order_id, -1)
+            self.order_cache.reopen(event.order_id)
+
+    def _persist_piece_batch(self, events: list):
+        """
+        Grava um lote de peças processadas numa única transação (executado pela thread do write-behind).
         
-        Returns:
-            bool: True se atualizado com sucesso, False caso contrário
+        Args:
+            events (list[PieceCompleted]): Peças a serem gravadas, na ordem em que foram processadas.
+
+        Observação:
+            - Peças aprovadas incrementam quantity_processed da ordem e atualizam updated_at.
+            - Ordens que atingirem a quantidade solicitada são marcadas como finalizadas.
+            - O lock dos contadores só é tomado para marcar o commit em andamento e para a baixa das
+              aprovações depois dele; _query_active_order refaz a leitura se cruzar com essa janela.
         """
-        try:
-            conn = self.get_db_connection()
+        with self.get_db_connection() as conn:
             cursor = conn.cursor()
             
+            query_insert = """
+            INSERT INTO pieces (piece_color, result, order_id, created_at)
+            VALUES (?, ?, ?, ?)
+            """
+            
             query_update = """
             UPDATE production_orders
             SET quantity_processed = quantity_processed + 1,
@@ -245,36 +531,94 @@ class MES:
             WHERE id = ?
             """
             
-            cursor.execute(query_update, order_id)
-            
-            query_check = """
-            SELECT quantity_requested, quantity_processed
-            FROM production_orders
+            query_finish = """
+            UPDATE production_orders
+            SET finished_at = GETDATE(),
+                updated_at = GETDATE()
             WHERE id = ?
+              AND finished_at IS NULL
+              AND quantity_processed >= quantity_requested
             """
             
-            cursor.execute(query_check, order_id)
-            row = cursor.fetchone()
+            orders = []
+            for event in events:
+                cursor.execute(query_insert, event.color, event.result, event.order_id, event.created_at)
+                
+                if event.result == 1 and event.order_id is not None:
+                    cursor.execute(query_update, event.order_id)
+                    if event.order_id not in orders:
+                        orders.append(event.order_id)
             
-            if row and row.quantity_processed >= row.quantity_requested:
-                query_finish = """
-                UPDATE production_orders
-                SET finished_at = GETDATE(),
-                    updated_at = GETDATE()
-                WHERE id = ?
-                """
+            for order_id in orders:
                 cursor.execute(query_finish, order_id)
-                print(f"Ordem ID {order_id} FINALIZADA!")
-            
-            conn.commit()
-            conn.close()
+
+            with self._unsaved_lock:
+                self._committing += 1
+
+            committed = False
+            try:
+                conn.commit()
+                committed = True
+            finally:
+                with self._unsaved_lock:
+                    self._committing -= 1
+                    for event in events:
+                        if committed and event.result == 1 and event.order_id is not None:
+                            self._count_unsaved(event.order_id, -1)
+
+    def _query_daily_stats(self, day: date):
+        """
+        Consulta no banco as contagens de peças de um dia, agregadas por hora, cor e resultado.
+        
+        Args:
+            day (date): Dia a ser consultado.
+        
+        Returns:
+            list[tuple]: Linhas (hora, cor, resultado, quantidade).
+
+        Observação:
+            - Usa um intervalo [dia, dia + 1) sobre created_at, que pode usar índice,
+              em vez de CAST(created_at AS DATE).
+            - Descarrega a fila de gravação antes da consulta para não perder peças pendentes.
+        """
+        self.piece_writer.flush(timeout=5)
+        
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
             
-            print(f"Ordem ID {order_id} atualizada: {row.quantity_processed}/{row.quantity_requested}")
-            return True
+            query = """
+            SELECT
+                DATEPART(HOUR, created_at) AS hour,
+                piece_color,
+                result,
+                COUNT(id) AS total
+            FROM pieces
+            WHERE created_at >= ? AND created_at < ?
+            GROUP BY DATEPART(HOUR, created_at), piece_color, result
+            """
             
-        except Exception as e:
-            print(f"Erro ao atualizar ordem: {e}")
-            return False
+            start = datetime.combine(day, datetime.min.time())
+            cursor.execute(query, start, start + timedelta(days=1))
+            rows = cursor.fetchall()
+        
+        return [(row.hour, row.piece_color, row.result, row.total) for row in rows]
+
+    def close(self):
+        """
+        Encerra o MES: grava as peças pendentes, para os scanners, publica o Digital Twin e desconecta do robô.
+        """
+        self.piece_writer.close()
+        
+        for scanner in self.scanners.values():
+            scanner.stop()
+        
+        for supervisor in self.supervisors.values():
+            supervisor.stop()
+        
+        if self.gemeo:
+            self.gemeo.close()
+        
+        self.robot.disconnect()
     
     def get_plc(self, name: str) -> ModbusTcpClient:
         '''
@@ -293,42 +637,128 @@ class MES:
             return self.clients[name]
         except KeyError:
             raise KeyError(f"PLC '{name}' não encontrado no MES.")
+
+    def start_scanners(self):
+        '''
+        Inicia a varredura contínua dos Input Registers de cada PLC.
+
+        Observação:
+            - Cada PLC é lido com uma única requisição por ciclo (bloco completo do Mapping).
+            - Enquanto o scanner não estiver rodando, read_input() faz leituras síncronas do bloco.
+        '''
+        for scanner in self.scanners.values():
+            scanner.start()
+
+    def read_input(self, plc: str, address: int) -> Optional[int]:
+        '''
+        Lê um Input Register a partir da última imagem publicada pelo scanner do PLC.
+
+        Args:
+            plc (str): Nome do PLC (e.g., 'MPS_HANDLING', 'MPS_PRESSING').
+            address (int): Endereço do registrador (e.g., input_register_handling_plc.sensor_braco_home).
+
+        Returns:
+            int | None: Valor do registrador, ou None em caso de erro de leitura.
+        '''
+        scanner = self.scanners.get(plc)
+
+        if scanner is None:
+            result = self.get_plc(plc).read_input_registers(address=address, count=1, slave=0)
+            return None if result.isError() else result.registers[0]
+
+        return scanner.read(address)
+
+    def wait_for(self, plc: str, address: int, value: int, timeout: Optional[float] = None, cancel_on_stop: bool = True) -> WaitResult:
+        '''
+        Aguarda um Input Register atingir o valor esperado, bloqueando na variável de condição do scanner.
+
+        Args:
+            plc (str): Nome do PLC (e.g., 'MPS_HANDLING', 'MPS_PRESSING').
+            address (int): Endereço do registrador (e.g., input_register_handling_plc.sensor_garra_avancada).
+            value (int): Valor esperado do registrador.
+            timeout (float | None): Tempo limite em segundos (None para esperar indefinidamente).
+            cancel_on_stop (bool): Cancela a espera se 'state_machine' deixar de ser 'running'.
+
+        Returns:
+            WaitResult: OK se o sinal atingiu o valor, TIMEOUT ou CANCELLED caso contrário.
+
+        Observação:
+            - A thread acorda assim que a borda do sensor chega na varredura, sem quantização de sleep.
+            - Mudanças de 'state_machine' acordam as esperas imediatamente.
+            - Durante a espera o PLC é varrido na taxa de 'motion' do PollingScheduler.
+        '''
+        cancel = (lambda: self.state_machine != 'running') if cancel_on_stop else None
+        with self.polling.motion(plc):
+            return self.scanners[plc].wait_for(address, value, timeout=timeout, cancel=cancel)
+
+    def write_transaction(self, plc: str, priority: Priority = Priority.MOTION) -> WriteTransaction:
+        '''
+        Cria uma transação de escrita para um PLC.
+
+        Args:
+            plc (str): Nome do PLC (e.g., 'MPS_HANDLING', 'MPS_PRESSING').
+            priority (Priority): Prioridade das requisições quando o PLC é atendido por um ModbusDispatcher.
+
+        Returns:
+            WriteTransaction: Transação que envia escritas em registradores contíguos numa única requisição (FC16).
+        '''
+        return WriteTransaction(self._lane(plc, priority), plc)
+
+    def _lane(self, plc: str, priority: Priority):
+        # Cliente do PLC na faixa de prioridade indicada (o próprio cliente se não houver dispatcher)
+        client = self.get_plc(plc)
+        return client.lane(priority) if isinstance(client, ModbusDispatcher) else client
+
+    def dispatch_metrics(self) -> dict:
+        '''
+        Retorna as métricas dos dispatchers (profundidade da fila e tempo de espera por prioridade) de cada PLC.
+        '''
+        return {
+            name: client.metrics()
+            for name, client in self.clients.items()
+            if isinstance(client, ModbusDispatcher)
+        }
         
 
     def stop_all_operations(self):
         '''
         Método para parar todas as operações de todos os PLC's.
+
+        Returns:
+            bool: True se todos os PLCs aceitaram as escritas.
+
+        Observação:
+            - Cada PLC é parado de forma independente: um PLC fora do ar (PLCUnavailableError)
+              ou que recuse as escritas não impede a parada dos outros.
         '''
         print("PARANDO TODAS AS OPERAÇÕES...")
         
-        try:
-            for register in range(20):
-                self.clients['MPS_HANDLING'].write_register(address=register, value=0, slave=0)
+        stopped = True
+        for plc in ('MPS_HANDLING', 'MPS_PRESSING', 'MPS_SORTING'):
+            if plc not in self.clients:
+                continue
 
-            self.clients['MPS_HANDLING'].write_register(address = 0, value = 0, slave = 0)
-            print("MPS_HANDLING parado")
+            try:
+                transaction = self.write_transaction(plc, Priority.SAFETY)
+                for register, value in stop_writes(plc).items():
+                    transaction.write(register, value)
 
-            
-            for register in range(20):
-                self.clients['MPS_PRESSING'].write_register(address=register, value=0, slave=0)
+                if transaction.commit():
+                    print(f"{plc} parado")
+                else:
+                    print(f"Erro ao parar {plc}")
+                    stopped = False
 
-            self.clients['MPS_PRESSING'].write_register(address=0, value=0, slave=0)
-            print("MPS_PRESSING parado")
-            
+            except Exception as e:
+                print(f"Erro ao parar {plc}: {e}")
+                stopped = False
 
-            if 'MPS_SORTING' in self.clients:
-                for register in range(20):
-                    self.clients['MPS_SORTING'].write_register(address = register, value = 0, slave = 0)
-                
-                self.clients['MPS_SORTING'].write_register(address = 0, value = 0, slave = 0)
-                print("MPS_SORTING parado")
-            
+        # O bloco zerado inclui as lâmpadas do Andon (HR 8-10): força o LampController a reescrevê-las
+        self.lamps.invalidate()
+
+        if stopped:
             print("Todas as operações foram paradas com sucesso!")
-            return True
-            
-        except Exception as e:
-            print(f"Erro ao parar operações: {e}")
-            return False
+        return stopped
 
     def reset_to_home_position(self):
         '''
@@ -349,6 +779,10 @@ class MES:
             
             if(gripper_state.registers[0] == 0):
                 print("movendo para o rejeito")
+                
+                held = self.wip.held()
+                if held:
+                    self.wip.discard(held)
                 self.move_to_reject_reset()
                 
                 self.gripper_down()
@@ -385,74 +819,102 @@ class MES:
         Observação:
             - O estado do sistema é gerenciado pela variável 'state_machine'.
             - As ações dos botões são refletidas nas lâmpadas indicadoras e no Digital Twin.
+            - As bordas vêm do EdgeDetector 'buttons', alimentado a cada varredura do bloco de Input Registers
+              (nenhuma requisição própria); os eventos ficam numa fila e não se perdem durante as ações demoradas.
         '''
+        events: queue.Queue[ButtonEvent] = queue.Queue()
+        self.buttons.subscribe(events.put)
 
-        last_start = 0
-        last_stop = 0
-        last_reset = 0
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    # Sem a thread do scanner, a leitura faz a varredura síncrona que alimenta o detector
+                    self.read_input('MPS_HANDLING', input_register_handling_plc.button_start)
+                    continue
+
+                if event.pressed:
+                    try:
+                        self.handle_button(event.button)
+                    except Exception as e:
+                        print(f"Erro ao monitorar botões: {e}")
+        finally:
+            self.buttons.unsubscribe(events.put)
+
+    def handle_button(self, button: str):
+        '''
+        Executa a ação de um botão pressionado de acordo com o estado da máquina.
+
+        Args:
+            button (str): 'start', 'stop' ou 'reset'.
+        '''
+        if button == 'start' and self.state_machine == 'idle':
+            print("Botão START pressionado!")
+            
+            self.state_machine = "running"
+            self._lane('MPS_HANDLING', Priority.LAMP).write_register(address=holding_register_handling_plc.LAMP_START, value=1, slave=0)
+            self.gemeo.set_parameter(DI.START_BUTTON_LIGHT, True)
+            self.gemeo.commit_all()                    
+            time.sleep(0.5)
+            
+            self._lane('MPS_HANDLING', Priority.LAMP).write_register(address=holding_register_handling_plc.LAMP_START, value=0, slave=0)
+            self.gemeo.set_parameter(DI.START_BUTTON_LIGHT, False)
+            self.gemeo.commit_all()
         
-        while True:
+        elif button == 'stop':
+            print("Botão STOP pressionado!")
+            
+            self.state_machine = "stopped"
+            self.stop_all_operations()
+        
+        elif button == 'reset' and (self.state_machine == 'stopped' or self.state_machine == 'cycle'):
+            print("Botão RESET pressionado!")
+            
+            self.state_machine = "idle"
+            self._lane('MPS_HANDLING', Priority.LAMP).write_register(address=holding_register_handling_plc.LAMP_RESET, value=1, slave=0)
+            self.gemeo.set_parameter(DI.RESET_BUTTON_LIGHT, True)
+            self.gemeo.commit_all()
+            
+            time.sleep(0.5)
+            
+            self._lane('MPS_HANDLING', Priority.LAMP).write_register(address=holding_register_handling_plc.LAMP_RESET, value=0, slave=0)
+            self.gemeo.set_parameter(DI.RESET_BUTTON_LIGHT, False)
+            self.gemeo.commit_all()
+            self.reset_to_home_position()
+    
+    def set_lamps(self, green: int, yellow: int, red: int) -> bool:
+        '''
+        Método que atualiza as lâmpadas do Andon (verde, amarela e vermelha) no PLC de manuseio e no Digital Twin.
 
-            try:
-                result_start = self.clients['MPS_HANDLING'].read_input_registers(address=input_register_handling_plc.button_start, count=1, slave=0)
-                result_stop = self.clients['MPS_HANDLING'].read_input_registers(address=input_register_handling_plc.button_stop, count=1, slave=0)
-                result_reset = self.clients['MPS_HANDLING'].read_input_registers(address=input_register_handling_plc.button_reset, count=1, slave=0)
-                
-                if result_start.isError() or result_stop.isError() or result_reset.isError():
-                    time.sleep(0.1)
-                    continue
-                
-                current_start = result_start.registers[0]
-                current_stop = result_stop.registers[0]
-                current_reset = result_reset.registers[0]
-                
-                if current_start == 1 and last_start == 0 and self.state_machine == 'idle':
-                    print("Botão START pressionado!")
-                    
-                    self.state_machine = "running"
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_START, value=1, slave=0)
-                    self.gemeo.set_parameter(DI.START_BUTTON_LIGHT, True)
-                    self.gemeo.commit_all()                    
-                    time.sleep(0.5)
-                    
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_START, value=0, slave=0)
-                    self.gemeo.set_parameter(DI.START_BUTTON_LIGHT, False)
-                    self.gemeo.commit_all()
-                
-                if current_stop == 0 and last_stop == 1:
-                    print("Botão STOP pressionado!")
-                    
-                    self.state_machine = "stopped"
-                    self.stop_all_operations()
-                
-                if current_reset == 1 and last_reset == 0 and (self.state_machine == 'stopped' or self.state_machine == 'cycle'):
-                    print("Botão RESET pressionado!")
-                    
-                    self.state_machine = "idle"
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RESET, value=1, slave=0)
-                    self.gemeo.set_parameter(DI.RESET_BUTTON_LIGHT, True)
-                    self.gemeo.commit_all()
-                    
-                    time.sleep(0.5)
-                    
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RESET, value=0, slave=0)
-                    self.gemeo.set_parameter(DI.RESET_BUTTON_LIGHT, False)
-                    self.gemeo.commit_all()
-                    self.reset_to_home_position()
-                
-                last_start = current_start
-                last_stop = current_stop
-                last_reset = current_reset
-                
-                time.sleep(0.05)
-                
-            except Exception as e:
-                print(f"Erro ao monitorar botões: {e}")
-                time.sleep(0.1)
+        Args:
+            green (int): 1 para acender a lâmpada verde, 0 para apagar.
+            yellow (int): 1 para acender a lâmpada amarela, 0 para apagar.
+            red (int): 1 para acender a lâmpada vermelha, 0 para apagar.
+
+        Returns:
+            bool: True se o PLC aceitou a escrita.
+
+        Observação:
+            - As três lâmpadas ocupam Holding Registers contíguos e são escritas numa única requisição.
+            - No Digital Twin as três lâmpadas são publicadas juntas (batch), sem combinações intermediárias.
+        '''
+        transaction = self.write_transaction('MPS_HANDLING', Priority.LAMP)
+        transaction.write(holding_register_handling_plc.LAMP_GREEN, green)
+        transaction.write(holding_register_handling_plc.LAMP_YELLOW, yellow)
+        transaction.write(holding_register_handling_plc.LAMP_RED, red)
+        success = transaction.commit()
+
+        with self.gemeo.batch():
+            self.gemeo.set_parameter(DI.LAMP_GREEN_DT, bool(green))
+            self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, bool(yellow))
+            self.gemeo.set_parameter(DI.LAMP_RED_DT, bool(red))
+
+        return success
     
     def handle_lamp(self):
         '''
-        Método que controla as lâmpadas indicadoras de status do sistema.
+        Método que controla as lâmpadas indicadoras de status do sistema (padrões em Client/Lamps.py).
 
         Estados e comportamentos:
             - running: Lâmpada verde acesa.
@@ -463,145 +925,17 @@ class MES:
             - stopped:     Lâmpada vermelha acesa.
         
         Observação:
-            - O estado do sistema é determinado pela variável 'state_machine'.
-            - As lâmpadas são controladas via registros Modbus e atualizadas no Digital Twin.
+            - O estado do sistema é determinado pela variável 'state_machine'; a troca de estado acorda
+              o laço na hora, sem esperar o fim da fase em andamento.
+            - As lâmpadas só são escritas (Modbus e Digital Twin) quando alguma delas muda.
         '''
-        while True:
-
-            if self.preemption_lamp_control: 
-                time.sleep(0.1)
-                continue
-    
-            state = self.state_machine if hasattr(self, 'state_machine') else "stopped"
-            
-            try:
-                if state == "running":
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=1, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=0, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, True)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, False)
-                    self.gemeo.commit_all()
-                    time.sleep(0.1)
-                
-                elif state == "idle":
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=1, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=1, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=0, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, True)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, True)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, False)
-                    self.gemeo.commit_all()
-                    time.sleep(0.5)
-                    
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=0, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, False)
-                    self.gemeo.commit_all()
-                    time.sleep(0.2)
-                    
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=1, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, True)
-                    self.gemeo.commit_all()
-                    time.sleep(0.2)
-                
-                elif state == "error":
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=1, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=1, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, True)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, True)
-                    self.gemeo.commit_all()
-                    time.sleep(0.1)
-                
-                elif state == "emergency":
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=1, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, True)
-                    self.gemeo.commit_all()
-                    time.sleep(0.5)
-                    
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=0, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, False)
-                    self.gemeo.commit_all()
-                    time.sleep(0.5)
-                
-                elif state == "cycle":
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=1, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, True)
-                    self.gemeo.commit_all()
-                    time.sleep(1)
-                    
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=1, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=0, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, True)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, False)
-                    self.gemeo.commit_all()
-                    time.sleep(1)
-                    
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=1, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value= 0, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, True)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, False)
-                    self.gemeo.commit_all()
-                    time.sleep(1)
-                
-                elif state == "stopped":
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=1, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, True)
-                    self.gemeo.commit_all()
-                    time.sleep(0.1)
-
-                elif state == "no_product":
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=1, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=1, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, True)
-                    self.gemeo.commit_all()
-                    time.sleep(0.1)
-
-                elif state == "no_product":
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=1, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=1, slave=0)
-                    time.sleep(0.1)
-                
-                else:
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=0, slave=0)
-                    self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=0, slave=0)
-                    self.gemeo.set_parameter(DI.LAMP_GREEN_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_YELLOW_DT, False)
-                    self.gemeo.set_parameter(DI.LAMP_RED_DT, False)
-                    self.gemeo.commit_all()
-                    time.sleep(0.1)
-            
-            except Exception as e:
-                print(f"Erro ao controlar lâmpadas: {e}")
-                time.sleep(0.1)
+        self.lamps.run(self.set_lamps)
 
     # ============================================
     #  ================ FIRST PLC ================ 
     # ============================================
 
+    @timed('gripper_open')
     def gripper_open(self):
         '''
         Método para abrir a garra do sistema.
@@ -623,6 +957,7 @@ class MES:
         print("Garra aberta")
         return True
 
+    @timed('gripper_close')
     def gripper_close(self):
         '''
         Método para fechar a garra do sistema.
@@ -645,6 +980,7 @@ class MES:
         print("Garra fechada")
         return True
 
+    @timed('gripper_down')
     def gripper_down(self):
         '''
         Método para descer a garra do sistema.
@@ -660,9 +996,9 @@ class MES:
 
         print("Descendo garra...")
         
-        result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_garra_avancada, count = 1, slave = 0)
+        result = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_garra_avancada)
         
-        if not result.isError() and result.registers[0] == 1:
+        if result == 1:
             print("Garra já está embaixo")
             return True
         
@@ -670,28 +1006,15 @@ class MES:
         self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_Z, 1000)
         self.gemeo.commit_all()
         
-        timeout = 5
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            # Checa se parou
-            # if self.state_machine != 'running':
-            #     self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_DOWN, value = 0, slave = 0)
-            #     print("Operação cancelada - sistema parado")
-            #     return False
-                
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_garra_avancada, count = 1, slave = 0)
-            
-            if not result.isError() and result.registers[0] == 1:
-                print("Garra desceu")
-                return True
-            
-            time.sleep(0.05)
+        if self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_garra_avancada, 1, timeout = self.timeouts['gripper'], cancel_on_stop = False):
+            print("Garra desceu")
+            return True
         
         self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_DOWN, value = 0, slave = 0)
         print("ERRO: Timeout ao descer garra\n")
         return False
 
+    @timed('gripper_up')
     def gripper_up(self):
         '''
         Método para subir a garra do sistema.
@@ -707,9 +1030,9 @@ class MES:
 
         print("Subindo garra...")
         
-        result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_garra_recuada, count = 1, slave = 0)
+        result = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_garra_recuada)
         
-        if not result.isError() and result.registers[0] == 1:
+        if result == 1:
             print("Garra já está em cima")
             return True
         
@@ -717,22 +1040,15 @@ class MES:
         self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_Z, 0)
         self.gemeo.commit_all()
         
-        timeout = 5
-        start_time = time.time()
+        result = self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_garra_recuada, 1, timeout = self.timeouts['gripper'])
         
-        while time.time() - start_time < timeout:
-            # Checa se parou
-            if self.state_machine != 'running':
-                print("Operação cancelada - sistema parado")
-                return False
-                
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_garra_recuada, count = 1, slave = 0)
-            
-            if not result.isError() and result.registers[0] == 1:
-                print("Garra subiu")
-                return True
-            
-            time.sleep(0.05)
+        if result is WaitResult.CANCELLED:
+            print("Operação cancelada - sistema parado")
+            return False
+        
+        if result:
+            print("Garra subiu")
+            return True
         
         print("ERRO: Timeout ao subir garra")
         return False
@@ -753,9 +1069,9 @@ class MES:
 
         print("Movendo para HOME (reset)...")
         
-        result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_home, count = 1, slave = 0)
+        result = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_braco_home)
         
-        if not result.isError() and result.registers[0] == 1 and INPUT_HR.Crane_Fedder_Setpoint_X == 1000:
+        if result == 1 and self.gemeo.get_parameter(INPUT_HR.Crane_Fedder_Setpoint_X) == 1000:
             print("Braço já está na posição HOME")
             return True
         
@@ -764,35 +1080,29 @@ class MES:
         self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 1, slave = 0)
 
         self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_X, 1000)
-        print(f"Valor: {INPUT_HR.Crane_Fedder_Setpoint_X}")
+        print(f"Valor: {self.gemeo.get_parameter(INPUT_HR.Crane_Fedder_Setpoint_X)}")
         self.gemeo.commit_all()
         
-        timeout = 10
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_home, count = 1, slave = 0)
+        if self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_braco_home, 1, timeout = self.timeouts['arm'], cancel_on_stop = False):
             
-            if not result.isError() and result.registers[0] == 1:
-                
-                self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 0, slave = 0)
-                self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, value = 0, slave = 0)                
-                
-                self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_X, 1000)
-                
-                print(f"Valor: {INPUT_HR.Crane_Fedder_Setpoint_X}")
-                
-                self.gemeo.commit_all()
-                
-                print("Braço chegou na posição HOME")
-                return True
+            with self.write_transaction('MPS_HANDLING') as transaction:
+                transaction.write(holding_register_handling_plc.GRIPPER_TO_STATION_DIR, 0)
+                transaction.write(holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, 0)
+            
+            self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_X, 1000)
+            
+            print(f"Valor: {self.gemeo.get_parameter(INPUT_HR.Crane_Fedder_Setpoint_X)}")
             
-            time.sleep(0.1)
+            self.gemeo.commit_all()
+            
+            print("Braço chegou na posição HOME")
+            return True
         
         self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 0, slave = 0)
         print("ERRO: Timeout ao mover para HOME")
         return False
     
+    @timed('move_to_home')
     def move_to_home(self):
         '''
         Método para mover o manipulador para a posição home durante a operação normal.
@@ -812,35 +1122,28 @@ class MES:
         
         print("Movendo para HOME...")
         
-        result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_home, count = 1, slave = 0)
+        result = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_braco_home)
         
-        if not result.isError() and result.registers[0] == 1:
+        if result == 1:
             print("Braço já está na posição HOME")
             return True
         
         self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 1, slave = 0)
         self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_X, 1000)
-        print(f"Valor: {INPUT_HR.Crane_Fedder_Setpoint_X}")
+        print(f"Valor: {self.gemeo.get_parameter(INPUT_HR.Crane_Fedder_Setpoint_X)}")
         self.gemeo.commit_all()
         
-        timeout = 10
-        start_time = time.time()
+        result = self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_braco_home, 1, timeout = self.timeouts['arm'])
         
-        while time.time() - start_time < timeout:
-            # Checa se parou
-            if self.state_machine != 'running':
-                self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 0, slave = 0)
-                print("Operação cancelada - sistema parado")
-                return False
-                
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_home, count = 1, slave = 0)
-            
-            if not result.isError() and result.registers[0] == 1:
-                self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 0, slave = 0)
-                print("Braço chegou na posição HOME")
-                return True
-            
-            time.sleep(0.1)
+        if result is WaitResult.CANCELLED:
+            self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 0, slave = 0)
+            print("Operação cancelada - sistema parado")
+            return False
+        
+        if result:
+            self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 0, slave = 0)
+            print("Braço chegou na posição HOME")
+            return True
         
         self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_STATION_DIR, value = 0, slave = 0)
         print("ERRO: Timeout ao mover para HOME")
@@ -865,15 +1168,15 @@ class MES:
         
         print("Movendo para REJEITO...")
         
-        result_rejeito = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_rejeito, count = 1, slave = 0)
+        result_rejeito = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_braco_rejeito)
         
-        if not result_rejeito.isError() and result_rejeito.registers[0] == 1:
+        if result_rejeito == 1:
             print("Braço já está na posição REJEITO")
             return True
         
-        result_home = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_home, count = 1, slave = 0)
+        result_home = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_braco_home)
         
-        if not result_home.isError() and result_home.registers[0] == 1:
+        if result_home == 1:
             register_move = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ
             direction = "esquerda"
         else:
@@ -883,27 +1186,20 @@ class MES:
         print(f"Movendo para {direction}...")
         self.clients['MPS_HANDLING'].write_register(address = register_move, value = 1, slave = 0)
         self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_X, 6200)
-        print(f"Valor: {INPUT_HR.Crane_Fedder_Setpoint_X}")
+        print(f"Valor: {self.gemeo.get_parameter(INPUT_HR.Crane_Fedder_Setpoint_X)}")
         self.gemeo.commit_all()
         
-        timeout = 10
-        start_time = time.time()
+        result = self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_braco_rejeito, 1, timeout = self.timeouts['arm'])
         
-        while time.time() - start_time < timeout:
-            # Checa se parou
-            if self.state_machine != 'running':
-                self.clients['MPS_HANDLING'].write_register(address = register_move, value = 0, slave = 0)
-                print("Operação cancelada - sistema parado")
-                return False
-                
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_rejeito, count = 1, slave = 0)
-            
-            if not result.isError() and result.registers[0] == 1:
-                self.clients['MPS_HANDLING'].write_register(address = register_move, value = 0, slave = 0)
-                print("Braço chegou na posição REJEITO")
-                return True
-            
-            time.sleep(0.05)
+        if result is WaitResult.CANCELLED:
+            self.clients['MPS_HANDLING'].write_register(address = register_move, value = 0, slave = 0)
+            print("Operação cancelada - sistema parado")
+            return False
+        
+        if result:
+            self.clients['MPS_HANDLING'].write_register(address = register_move, value = 0, slave = 0)
+            print("Braço chegou na posição REJEITO")
+            return True
         
         self.clients['MPS_HANDLING'].write_register(address = register_move, value = 0, slave = 0)
         print("ERRO: Timeout ao mover para REJEITO")
@@ -924,15 +1220,15 @@ class MES:
         
         print("Movendo para REJEITO...")
         
-        result_rejeito = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_rejeito, count = 1, slave = 0)
+        result_rejeito = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_braco_rejeito)
         
-        if not result_rejeito.isError() and result_rejeito.registers[0] == 1:
+        if result_rejeito == 1:
             print("Braço já está na posição REJEITO")
             return True
         
-        result_home = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_home, count = 1, slave = 0)
+        result_home = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_braco_home)
         
-        if not result_home.isError() and result_home.registers[0] == 1:
+        if result_home == 1:
             register_move = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ
             direction = "esquerda"
         else:
@@ -944,26 +1240,19 @@ class MES:
         self.clients['MPS_HANDLING'].write_register(address = register_move, value = 1, slave = 0)
         self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_X, 6200)
 
-        print(f"Valor: {INPUT_HR.Crane_Fedder_Setpoint_X}")
+        print(f"Valor: {self.gemeo.get_parameter(INPUT_HR.Crane_Fedder_Setpoint_X)}")
         self.gemeo.commit_all()
         
-        timeout = 10
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_rejeito, count = 1, slave = 0)
-            
-            if not result.isError() and result.registers[0] == 1:
-                self.clients['MPS_HANDLING'].write_register(address = register_move, value = 0, slave = 0)
-                print("Braço chegou na posição REJEITO")
-                return True
-            
-            time.sleep(0.05)
+        if self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_braco_rejeito, 1, timeout = self.timeouts['arm'], cancel_on_stop = False):
+            self.clients['MPS_HANDLING'].write_register(address = register_move, value = 0, slave = 0)
+            print("Braço chegou na posição REJEITO")
+            return True
         
         self.clients['MPS_HANDLING'].write_register(address = register_move, value = 0, slave = 0)
         print("ERRO: Timeout ao mover para REJEITO")
         return False
 
+    @timed('move_to_drop')
     def move_to_drop(self):
         '''
         Método para mover o manipulador para a posição deixa durante a operação normal.
@@ -983,40 +1272,34 @@ class MES:
         
         print("Movendo para DEIXA...")
         
-        result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_deixa, count = 1, slave = 0)
+        result = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_braco_deixa)
         
-        if not result.isError() and result.registers[0] == 1:
+        if result == 1:
             print("Braço já está na posição DEIXA")
             return True
         
         self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, value = 1, slave = 0)
         self.gemeo.set_parameter(INPUT_HR.Crane_Fedder_Setpoint_X, 0)
-        print(f"Valor: {INPUT_HR.Crane_Fedder_Setpoint_X}")
+        print(f"Valor: {self.gemeo.get_parameter(INPUT_HR.Crane_Fedder_Setpoint_X)}")
         self.gemeo.commit_all()
         
-        timeout = 10
-        start_time = time.time()
+        result = self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_braco_deixa, 1, timeout = self.timeouts['arm'])
         
-        while time.time() - start_time < timeout:
-            # Checa se parou
-            if self.state_machine != 'running':
-                self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, value = 0, slave = 0)
-                print("Operação cancelada - sistema parado")
-                return False
-                
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_braco_deixa, count = 1, slave = 0)
-            
-            if not result.isError() and result.registers[0] == 1:
-                self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, value = 0, slave = 0)
-                print("Braço chegou na posição DEIXA")
-                return True
-            
-            time.sleep(0.1)
+        if result is WaitResult.CANCELLED:
+            self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, value = 0, slave = 0)
+            print("Operação cancelada - sistema parado")
+            return False
+        
+        if result:
+            self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, value = 0, slave = 0)
+            print("Braço chegou na posição DEIXA")
+            return True
         
         self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ, value = 0, slave = 0)
         print("ERRO: Timeout ao mover para DEIXA")
         return False
     
+    @timed('magazine_eject')
     def magazine_eject(self):
         '''
         Método para ejetar a peça do magazine.
@@ -1031,9 +1314,9 @@ class MES:
         '''
         print("Ejetando peça do magazine...")
         
-        result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_magazine_entrada_recuado, count = 1, slave = 0)
+        result = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_magazine_entrada_recuado)
         
-        if not result.isError() and result.registers[0] == 1:
+        if result == 1:
             print("Magazine já está recuado")
             return True
         
@@ -1041,26 +1324,20 @@ class MES:
         self.gemeo.set_parameter(DI.Cylinder_Pusher_Feeder, False)
         self.gemeo.commit_all()
         
-        timeout = 5
-        start_time = time.time()
+        result = self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_magazine_entrada_recuado, 1, timeout = self.timeouts['magazine'])
         
-        while time.time() - start_time < timeout:
-            # Checa se parou
-            if self.state_machine != 'running':
-                print("Operação cancelada - sistema parado")
-                return False
-                
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_magazine_entrada_recuado, count = 1, slave = 0)
-            
-            if not result.isError() and result.registers[0] == 1:
-                print("Peça ejetada")
-                return True
-            
-            time.sleep(0.05)
+        if result is WaitResult.CANCELLED:
+            print("Operação cancelada - sistema parado")
+            return False
+        
+        if result:
+            print("Peça ejetada")
+            return True
         
         print("ERRO: Timeout ao ejetar peça")
         return False
 
+    @timed('magazine_advance')
     def magazine_advance(self):
         '''
         Método para avançar o magazine.
@@ -1075,9 +1352,9 @@ class MES:
         '''
         print("Avançando magazine...")
         
-        result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_magazine_entrada_avancado, count = 1, slave = 0)
+        result = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_magazine_entrada_avancado)
         
-        if not result.isError() and result.registers[0] == 1:
+        if result == 1:
             print("Magazine já está avançado")
             return True
         
@@ -1085,25 +1362,18 @@ class MES:
         self.gemeo.set_parameter(DI.Cylinder_Pusher_Feeder, True)
         self.gemeo.commit_all()        
         
-        timeout = 5
-        start_time = time.time()
+        result = self.wait_for('MPS_HANDLING', input_register_handling_plc.sensor_magazine_entrada_avancado, 1, timeout = self.timeouts['magazine'])
         
-        while time.time() - start_time < timeout:
-            # Checa se parou
-            if self.state_machine != 'running':
-                self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.MAGAZINE_EJECT, value = 0, slave = 0)
-                self.gemeo.set_parameter(DI.Cylinder_Pusher_Feeder, False)
-                self.gemeo.commit_all()
-                print("Operação cancelada - sistema parado")
-                return False
-                
-            result = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.sensor_magazine_entrada_avancado, count = 1, slave = 0)
-            
-            if not result.isError() and result.registers[0] == 1:
-                print("Magazine avançado")
-                return True
-            
-            time.sleep(0.05)
+        if result is WaitResult.CANCELLED:
+            self.clients['MPS_HANDLING'].write_register(address = holding_register_handling_plc.MAGAZINE_EJECT, value = 0, slave = 0)
+            self.gemeo.set_parameter(DI.Cylinder_Pusher_Feeder, False)
+            self.gemeo.commit_all()
+            print("Operação cancelada - sistema parado")
+            return False
+        
+        if result:
+            print("Magazine avançado")
+            return True
         
         print("ERRO: Timeout ao avançar magazine")
         return False
@@ -1117,27 +1387,20 @@ class MES:
             None
         
         Observação:
-            - Lê os registradores de entrada correspondentes aos botões.
-            - Exibe o estado atual dos botões a cada 2 segundos.
+            - Os três botões saem da mesma imagem do scanner (uma única leitura do bloco).
+            - Exibe o valor lido e o estado confirmado pelo EdgeDetector a cada 2 segundos.
         '''
         while True:
             time.sleep(2)
-            inputs = []
-            
-            result_start = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.button_start, count=1, slave=0)
-            result_stop = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.button_stop, count=1, slave=0)
-            result_reset = self.clients['MPS_HANDLING'].read_input_registers(address = input_register_handling_plc.button_reset, count=1, slave=0)
             
-            if not result_start.isError():
-                inputs.append(('button_start', result_start.registers))
-            if not result_stop.isError():
-                inputs.append(('button_stop', result_stop.registers))
-            if not result_reset.isError():
-                inputs.append(('button_reset', result_reset.registers))
+            self.read_input('MPS_HANDLING', input_register_handling_plc.button_start)
+            snapshot = self.scanners['MPS_HANDLING'].get_snapshot()
+            if snapshot is None:
+                continue
             
             print("=" * 50)
-            for name, value in inputs:
-                print(f"{name:20} | {value}")
+            for button in self.buttons.buttons:
+                print(f"button_{button.name:13} | {snapshot.get(button.address)} | pressionado: {self.buttons.pressed(button.name)}")
             print("=" * 50)
             print('\n\n')
 
@@ -1158,7 +1421,7 @@ class MES:
         Observação:
             - O fluxo é contínuo e depende do estado da máquina.
             - Utiliza registros Modbus para comunicação com o PLC.
-            - Armazena a classificação das peças em uma lista 'parts'.
+            - Registra cada peça pega no rastreador de peças em processo ('wip'), com a cor provisória.
             - BLOQUEIA processamento se não houver ordem ativa
         '''
 
@@ -1177,17 +1440,22 @@ class MES:
                 time.sleep(2)
                 continue
             
-            self.magazine_advance()
-            if self.state_machine != 'running':
-                continue
-                
-            self.magazine_eject()
-            if self.state_machine != 'running':
-                continue
+            cycle_start = time.monotonic()
+            self._join_feeder()
+            
+            # No modo pipelined a peça normalmente já foi alimentada durante o ciclo anterior
+            if not (self.pipelined and self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_peca_suporte) == 1):
+                self.magazine_advance()
+                if self.state_machine != 'running':
+                    continue
+                    
+                self.magazine_eject()
+                if self.state_machine != 'running':
+                    continue
             
-            result = self.clients['MPS_HANDLING'].read_input_registers(address=input_register_handling_plc.sensor_peca_suporte, count=1, slave=0)
+            result = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_peca_suporte)
             
-            if not result.isError() and result.registers[0] == 1:
+            if result == 1:
                 if self.state_machine != 'running':
                     continue
                     
@@ -1215,15 +1483,17 @@ class MES:
                     continue
                 
                 time.sleep(0.2)
-                result_sensor_garra = self.clients['MPS_HANDLING'].read_input_registers(address=input_register_handling_plc.sensor_peca_garra, count=1, slave=0)
+                result_sensor_garra = self.read_input('MPS_HANDLING', input_register_handling_plc.sensor_peca_garra)
                 
-                if not result_sensor_garra.isError():
-                    if result_sensor_garra.registers[0] == 0:
-                        print("Peça PRETA detectada!")
-                        self.parts.append("preto")
-                    else:
-                        print("Peça PRATA ou ROSA detectada - aguardando confirmação no PLC 2")
-                        self.parts.append("indefinido")
+                if result_sensor_garra == 0:
+                    print("Peça PRETA detectada!")
+                    piece = self.wip.pick("preto")
+                else:
+                    print("Peça PRATA ou ROSA detectada - aguardando confirmação no PLC 2")
+                    piece = self.wip.pick(UNDEFINED_COLOR)
+                
+                if self.pipelined:
+                    self._start_feeder()
                 
                 time.sleep(0.1)
                 
@@ -1234,25 +1504,21 @@ class MES:
                 removido = True
 
                 print("Aguardando esteira ficar disponível...")
-                timeout_esteira = 120 
-                start_wait = time.time()
+                start_wait = time.monotonic()
+                result_esteira = self.claim_conveyor(timeout = self.timeouts['conveyor_claim'])
                 
-                while not self.is_conveyor_available:
-                    if self.state_machine != 'running':
-                        print("Operação cancelada - sistema parado")
-                        return False
-                    
-                    if time.time() - start_wait > timeout_esteira:
-                        print("ERRO: Timeout ao aguardar liberação da esteira!")
-                        self.state_machine = "error"
-                        removido = False
-                        return False
-                    
-                    time.sleep(0.1)
+                if result_esteira is WaitResult.CANCELLED:
+                    print("Operação cancelada - sistema parado")
+                    return False
                 
-                print("Esteira disponível! Depositando peça...")
+                if not result_esteira:
+                    print("ERRO: Timeout ao aguardar liberação da esteira!")
+                    self.state_machine = "error"
+                    removido = False
+                    return False
                 
-                self.is_conveyor_available = False
+                self.step_metrics.record('conveyor_wait', time.monotonic() - start_wait)
+                print("Esteira disponível! Depositando peça...")
                 
                 if removido == True:
                     self.gripper_down()
@@ -1261,6 +1527,7 @@ class MES:
                     time.sleep(0.1)
                     
                     self.gripper_open()
+                    self.wip.deposit(piece)
                     if self.state_machine != 'running':
                         continue
                     time.sleep(0.1)
@@ -1268,19 +1535,31 @@ class MES:
                     self.gripper_up()
                     if self.state_machine != 'running':
                         continue
+                    self.step_metrics.record('handling_cycle', time.monotonic() - cycle_start)
                     time.sleep(0.2)
 
             else:
-                self.preemption_lamp_control = True
-                time.sleep(0.1)
-
-                self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_GREEN, value=0, slave=0)
-                self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=1, slave=0)
-                self.clients['MPS_HANDLING'].write_register(address=holding_register_handling_plc.LAMP_RED, value=1, slave=0)
-                
+                self.lamps.override(NO_PRODUCT_LAMPS, 5)
                 time.sleep(5)
 
-                self.preemption_lamp_control = False
+
+    def _start_feeder(self):
+        # Alimenta o suporte com a próxima peça em paralelo ao restante do ciclo (modo pipelined)
+        self._join_feeder()
+        self._feeder = threading.Thread(target=self._feed_next_piece, name='magazine-feeder', daemon=True)
+        self._feeder.start()
+
+    def _join_feeder(self):
+        if self._feeder is not None:
+            self._feeder.join()
+            self._feeder = None
+
+    def _feed_next_piece(self):
+        try:
+            if self.magazine_advance() and self.state_machine == 'running':
+                self.magazine_eject()
+        except Exception as e:
+            print(f"Erro ao alimentar a próxima peça: {e}")
 
 
     # =============================================
@@ -1306,7 +1585,7 @@ class MES:
         Observação:
             - O fluxo é contínuo e depende do estado da máquina.
             - Utiliza registros Modbus para comunicação com o PLC.
-            - Utiliza a lista 'parts' para armazenar a classificação das peças
+            - A cor confirmada e a retirada são aplicadas à peça depositada mais antiga do rastreador 'wip'
             - Registra peças aprovadas/rejeitadas no banco de dados
             - BLOQUEIA processamento se não houver ordem ativa
         '''
@@ -1323,18 +1602,18 @@ class MES:
                 continue
             
             try:
-                result = self.clients['MPS_PRESSING'].read_input_registers(address=input_register_pressing_plc.MB_PART_AV, count=1, slave=0)
+                result = self.read_input('MPS_PRESSING', input_register_pressing_plc.MB_PART_AV)
             except Exception as e:
                 print(f'Erro ao ler sensor de entrada: {e}')
                 time.sleep(0.1)
                 continue
             
-            if result.isError():
+            if result is None:
                 print("Erro ao ler MB_PART_AV")
                 time.sleep(0.1)
                 continue
                 
-            if result.registers[0] == 1:
+            if result == 1:
                 self.is_conveyor_available = False
                 
                 if self.state_machine != 'running':
@@ -1349,6 +1628,7 @@ class MES:
                 self.clients['MPS_PRESSING'].write_register(address=holding_register_pressing_plc.MB_LIGA_ESTEIRA, value=1, slave=0)
                 self.gemeo.set_parameter(DI.Conveyor_Job, True)
                 self.gemeo.commit_all()
+                conveyor_start = time.monotonic()
                 
                 while True:
                     if self.state_machine != 'running':
@@ -1357,35 +1637,33 @@ class MES:
                         self.gemeo.commit_all()
                         break
                     
-                    result_barreira = self.clients['MPS_PRESSING'].read_input_registers(address=input_register_pressing_plc.MB_BARREIRA_IND, count=1, slave=0)
+                    result_barreira = self.wait_for('MPS_PRESSING', input_register_pressing_plc.MB_BARREIRA_IND, 1, timeout = 1)
                     
-                    if not result_barreira.isError() and result_barreira.registers[0] == 1:
+                    if result_barreira:
                         print("Peça chegou na barreira indutiva - identificando cor...")
                         
                         self.clients['MPS_PRESSING'].write_register(address=holding_register_pressing_plc.MB_LIGA_ESTEIRA, value=0, slave=0)
                         self.gemeo.set_parameter(DI.Conveyor_Job, False)
                         self.gemeo.commit_all()
+                        self.step_metrics.record('barrier_stop', time.monotonic() - conveyor_start)
                         time.sleep(0.3)
                         
-                        result_sensor = self.clients['MPS_PRESSING'].read_input_registers(address=input_register_pressing_plc.MB_SENSOR_IND, count=1, slave=0)
+                        result_sensor = self.read_input('MPS_PRESSING', input_register_pressing_plc.MB_SENSOR_IND)
                         
-                        if not result_sensor.isError():
-                            if result_sensor.registers[0] == 1:
-                                print("Peça PRATA confirmada!")
-                                if self.parts and self.parts[-1] == "indefinido":
-                                    self.parts[-1] = "prata"
+                        if result_sensor is not None:
+                            piece = self.wip.confirm(result_sensor == 1)
+                            
+                            if piece is None:
+                                print("AVISO: Nenhuma peça depositada aguardando identificação!")
                             else:
-                                print("Peça ROSA confirmada!")
-                                if self.parts and self.parts[-1] == "indefinido":
-                                    self.parts[-1] = "rosa"
+                                print(f"Peça #{piece.id} {piece.color.upper()} confirmada!")
                         
                         time.sleep(0.5)
                         self.clients['MPS_PRESSING'].write_register(address=holding_register_pressing_plc.MB_LIGA_ESTEIRA, value=1, slave=0)
                         self.gemeo.set_parameter(DI.Conveyor_Job, True)
                         self.gemeo.commit_all()
+                        conveyor_start = time.monotonic()
                         break
-                    
-                    time.sleep(0.05)
                 
                 while True:
                     if self.state_machine != 'running':
@@ -1394,25 +1672,28 @@ class MES:
                         self.gemeo.commit_all()
                         break
                         
-                    result_fim = self.clients['MPS_PRESSING'].read_input_registers(address=input_register_pressing_plc.MB_PC_FIM, count=1, slave=0)
+                    result_fim = self.wait_for('MPS_PRESSING', input_register_pressing_plc.MB_PC_FIM, 1, timeout = 1)
                     
-                    if not result_fim.isError() and result_fim.registers[0] == 1:
+                    if result_fim:
                         print("Peça chegou no final da esteira")
+                        self.step_metrics.record('conveyor_to_end', time.monotonic() - conveyor_start)
                         
                         self.clients['MPS_PRESSING'].write_register(address=holding_register_pressing_plc.MB_LIGA_ESTEIRA, value=0, slave=0)
                         self.gemeo.set_parameter(DI.Conveyor_Job, False)
                         self.gemeo.commit_all()
                         
-                        if not self.parts:
-                            print("AVISO: Lista de peças vazia! Pulando comando do robô.")
+                        piece = self.wip.arrive_end()
+                        
+                        if piece is None:
+                            print("AVISO: Nenhuma peça em processo! Pulando comando do robô.")
                             self.is_conveyor_available = True
                             break
                         
                         cor_atual: str
-                        cor_atual = self.parts[0]
+                        cor_atual = piece.color
                         print(f"\n========================================")
-                        print(f"Processando peça: {cor_atual.upper()}")
-                        print(f"Histórico: {self.parts}")
+                        print(f"Processando peça #{piece.id}: {cor_atual.upper()}")
+                        print(f"Em processo: {[p['color'] for p in self.wip.snapshot()['pieces']]}")
                         
                         active_order = self.get_active_order()
                         
@@ -1420,7 +1701,7 @@ class MES:
                             print("ERRO: Ordem ativa desapareceu durante processamento!")
                             print("Liberando esteira sem processar")
                             self.is_conveyor_available = True
-                            self.parts.pop(0)
+                            self.wip.complete(piece)
                             print(f"========================================\n")
                             break
                         
@@ -1432,7 +1713,6 @@ class MES:
                             print(f"Peça APROVADA - Cor corresponde à ordem!")
                             piece_approved = True
                             self.register_piece(cor_atual, result=1, order_id=active_order['id'])
-                            self.update_order_progress(active_order['id'])
                         else:
                             print(f"Peça REJEITADA - Cor não corresponde (esperado: {active_order['color_requested']}, recebido: {cor_atual})")
                             piece_approved = False
@@ -1440,49 +1720,34 @@ class MES:
                         
                         print(f"========================================\n")
                         
-                        if cor_atual == 'prata':
-                            escrever_saida_digital_robot(HOST, 0, True)
-                            escrever_saida_digital_robot(HOST, 1, False)
-                            escrever_saida_digital_robot(HOST, 2, True)
-
-                        elif cor_atual == 'rosa':
-                            escrever_saida_digital_robot(HOST, 0, True)
-                            escrever_saida_digital_robot(HOST, 1, True)
-                            escrever_saida_digital_robot(HOST, 2, False)
-
-                        elif cor_atual == 'preto':
-                            escrever_saida_digital_robot(HOST, 0, True)
-                            escrever_saida_digital_robot(HOST, 1, True)
-                            escrever_saida_digital_robot(HOST, 2, True)
+                        self.robot.send_color(cor_atual)
                         
-                        timeout = 60
-                        start_time = time.time()
+                        timeout = self.timeouts['robot']
+                        start_time = time.monotonic()
                         robot_finished = False
                         conveyor_freed = False
                         
-                        while time.time() - start_time < timeout:
+                        while time.monotonic() - start_time < timeout:
                             if self.state_machine != 'running':
                                 print("Operação cancelada - parando robô!")
-                                escrever_saida_digital_robot(HOST, 0, False)
-                                escrever_saida_digital_robot(HOST, 1, False)
-                                escrever_saida_digital_robot(HOST, 2, False)
+                                self.robot.clear_color()
                                 return False
                             
                             try:
-                                result_sensor_fim = self.clients['MPS_PRESSING'].read_input_registers(address=input_register_pressing_plc.MB_PC_FIM, count=1, slave=0)
+                                result_sensor_fim = self.read_input('MPS_PRESSING', input_register_pressing_plc.MB_PC_FIM)
                                 
-                                if not result_sensor_fim.isError() and result_sensor_fim.registers[0] == 0:
+                                if result_sensor_fim == 0:
                                     if not conveyor_freed:
                                         print("Sensor final LIBERADO - Peça removida da esteira!")
                                         self.is_conveyor_available = True
                                         conveyor_freed = True
-                                        self.parts.pop(0)
-                                        print(f"Histórico atualizado: {self.parts}\n")
+                                        self.wip.complete(piece)
+                                        print(f"Peças em processo: {len(self.wip)}\n")
                             except Exception as e:
                                 print(f"Erro ao ler sensor final: {e}")
                             
                             try:
-                                result_robot = ler_saida_digital_robot(HOST, 5)
+                                result_robot = self.robot.get_digital_out(5)
                                 if result_robot == 1:
                                     print("Robô sinalizou conclusão (DO5 = HIGH)")
                                     robot_finished = True
@@ -1492,34 +1757,32 @@ class MES:
                             
                             time.sleep(0.05)
                         
+                        self.step_metrics.record('robot_wait', time.monotonic() - start_time)
+                        
                         if not robot_finished:
                             print("TIMEOUT: Robô não sinalizou conclusão em 60s")
                         
                         if not conveyor_freed:
                             print("Forçando liberação da esteira (timeout/erro)")
                             
-                            while result_sensor_fim.registers[0] == 1:
+                            while result_sensor_fim == 1:
                                 try:
-                                    result_sensor_fim = self.clients['MPS_PRESSING'].read_input_registers(address=input_register_pressing_plc.MB_PC_FIM, count=1, slave=0)
+                                    result_sensor_fim = self.read_input('MPS_PRESSING', input_register_pressing_plc.MB_PC_FIM)
                                     
-                                    if not result_sensor_fim.isError() and result_sensor_fim.registers[0] == 0:
+                                    if result_sensor_fim == 0:
                                         print("Esteira liberada manualmente")
                                         self.is_conveyor_available = True
-                                        self.parts.pop(0)
-                                        print(f"Histórico atualizado: {self.parts}\n")
+                                        self.wip.complete(piece)
+                                        print(f"Peças em processo: {len(self.wip)}\n")
                                         break
                                 except Exception as e:
                                     print(f"Erro na liberação manual: {e}")
                                 
                                 time.sleep(0.1)
                         
-                        escrever_saida_digital_robot(HOST, 0, False)
-                        escrever_saida_digital_robot(HOST, 1, False)
-                        escrever_saida_digital_robot(HOST, 2, False)
+                        self.robot.clear_color()
                         
-                        print(f"Status: Esteira livre={self.is_conveyor_available} | Peças restantes={len(self.parts)}\n")
+                        print(f"Status: Esteira livre={self.is_conveyor_available} | Peças em processo={len(self.wip)}\n")
                         break
-                    
-                    time.sleep(0.05)
             
             time.sleep(0.1)
\ No newline at end of file
@@ -0,0 +1,147 @@
+import time
+import threading
+
+from typing import Callable, Optional
+
+
+class ActiveOrderCache:
+    '''
+    Cache em memória da ordem de produção ativa (a mais antiga ainda não finalizada).
+
+    Métodos:
+        - get() -> dict | None: Retorna uma cópia da ordem ativa, recarregando do banco se necessário.
+        - peek() -> dict | None: Retorna uma cópia da ordem em cache, sem nunca consultar o banco.
+        - invalidate(): Força a recarga na próxima leitura (e.g., nova ordem criada).
+        - update(order_id, **fields): Atualiza campos da ordem em cache sem consultar o banco.
+        - finish(order_id): Fecha a ordem em memória e força a recarga da próxima.
+        - reopen(order_id): Desfaz finish() quando a ordem não vai mais ser finalizada no banco.
+
+    Observação:
+        - O banco só é consultado quando o cache é invalidado ou quando passa 'reconcile_interval'
+          segundos desde a última carga, o que protege contra edições feitas fora do MES.
+        - Se a consulta falhar, a última ordem conhecida é mantida e a carga é tentada novamente na próxima leitura.
+        - 'on_change' é chamado (fora do lock) sempre que a ordem em cache muda.
+        - Uma ordem fechada por finish() continua fechada mesmo que o banco ainda a traga sem finished_at
+          (gravação pendente): até o banco confirmar, não há ordem ativa e a carga é refeita a cada leitura.
+    '''
+
+    def __init__(self, loader: Callable[[], Optional[dict]], reconcile_interval: float = 10.0,
+                 on_change: Optional[Callable[[Optional[dict]], None]] = None):
+        self.loader = loader
+        self.reconcile_interval = reconcile_interval
+        self.on_change = on_change
+
+        self._lock = threading.Lock()
+        self._order: Optional[dict] = None
+        self._loaded_at: Optional[float] = None
+        self._finished: set[int] = set()  # Fechadas em memória, ainda abertas no banco
+
+        self.loads = 0
+        self.hits = 0
+
+    def get(self) -> Optional[dict]:
+        '''
+        Retorna uma cópia da ordem ativa.
+
+        Returns:
+            dict | None: Dados da ordem ativa ou None se não houver ordem ativa.
+        '''
+        with self._lock:
+            previous = self._order
+
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.reconcile_interval:
+                try:
+                    order = self.loader()
+                    self.loads += 1
+
+                    if order and order['id'] in self._finished:
+                        self._order = None
+                    else:
+                        self._order = order
+                        self._loaded_at = time.monotonic()
+                        self._finished.clear()
+                except Exception as e:
+                    print(f"Erro ao buscar ordem ativa: {e}")
+            else:
+                self.hits += 1
+
+            order = dict(self._order) if self._order else None
+
+        if order != previous:
+            self._notify(order)
+
+        return order
+
+    def peek(self) -> Optional[dict]:
+        '''
+        Retorna uma cópia da ordem em cache sem consultar o banco (e.g., em setters chamados no event loop).
+
+        Returns:
+            dict | None: Última ordem carregada, ou None se ainda não houve carga ou não há ordem ativa.
+        '''
+        with self._lock:
+            return dict(self._order) if self._order else None
+
+    def invalidate(self):
+        '''
+        Invalida o cache, forçando a consulta ao banco na próxima leitura.
+        '''
+        with self._lock:
+            self._loaded_at = None
+
+    def update(self, order_id: int, **fields):
+        '''
+        Atualiza campos da ordem em cache (write-through), se ela for a ordem ativa.
+
+        Args:
+            - order_id (int): ID da ordem atualizada.
+            - **fields      : Campos a atualizar (e.g., quantity_processed=3).
+        '''
+        with self._lock:
+            if not (self._order and self._order['id'] == order_id):
+                return
+            self._order.update(fields)
+            order = dict(self._order)
+
+        self._notify(order)
+
+    def finish(self, order_id: int):
+        '''
+        Fecha a ordem em memória; a próxima leitura busca a nova ordem ativa no banco.
+
+        Args:
+            - order_id (int): ID da ordem finalizada.
+
+        Observação:
+            - Enquanto o banco ainda trouxer a ordem como ativa (e.g., gravação das últimas peças pendente),
+              get() retorna None em vez de reabri-la.
+        '''
+        with self._lock:
+            if self._order and self._order['id'] == order_id:
+                self._order = None
+            self._finished.add(order_id)
+            self._loaded_at = None
+
+        self._notify(None)
+
+    def reopen(self, order_id: int):
+        '''
+        Desfaz finish(): a ordem volta a ser servida pelo banco na próxima leitura.
+
+        Args:
+            - order_id (int): ID da ordem fechada em memória.
+
+        Observação:
+            - Usado quando uma peça aprovada da ordem é descartada sem ser gravada: o banco não vai
+              marcar a ordem como finalizada e ela precisa voltar a ser a ordem ativa.
+        '''
+        with self._lock:
+            self._finished.discard(order_id)
+            self._loaded_at = None
+
+    def _notify(self, order: Optional[dict]):
+        if self.on_change:
+            try:
+                self.on_change(order)
+            except Exception as e:
+                print(f"Erro ao notificar mudança da ordem ativa: {e}")
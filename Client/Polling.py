@@ -0,0 +1,135 @@
+import threading
+
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from Client.Buttons import BUTTON_SCAN_INTERVAL
+from Client.Scanner import RegisterScanner
+from Utils.metrics import ModbusMetrics, modbus_metrics
+
+
+# Intervalo (s) de varredura de cada PLC por perfil. 'no_order' vale em 'running' sem ordem ativa,
+# 'motion' enquanto há uma espera por sensor em andamento no PLC e estados sem perfil usam 'running'.
+POLLING_PROFILES: Dict[str, Dict[str, float]] = {
+    'running':  {'MPS_HANDLING': 0.02, 'MPS_PRESSING': 0.02, 'MPS_SORTING': 0.02},
+    'no_order': {'MPS_HANDLING': 0.02, 'MPS_PRESSING': 0.25, 'MPS_SORTING': 0.25},
+    'idle':     {'MPS_HANDLING': 0.02, 'MPS_PRESSING': 0.25, 'MPS_SORTING': 0.25},
+    'stopped':  {'MPS_HANDLING': 0.02, 'MPS_PRESSING': 0.25, 'MPS_SORTING': 0.25},
+    'motion':   {'MPS_HANDLING': 0.01, 'MPS_PRESSING': 0.02, 'MPS_SORTING': 0.02},
+}
+DEFAULT_INTERVAL = 0.02
+
+# Intervalo máximo por PLC, em qualquer perfil (inclusive os vindos do config.json)
+MAX_INTERVALS: Dict[str, float] = {'MPS_HANDLING': BUTTON_SCAN_INTERVAL}
+
+
+class PollingScheduler:
+    '''
+    Define o intervalo de varredura de cada PLC de acordo com o estado da máquina, a existência de
+    ordem ativa e os movimentos em andamento.
+
+    Métodos:
+        - set_state(state): Atualiza o estado da máquina.
+        - set_order_active(active): Informa se há ordem ativa.
+        - motion(plc): Context manager que acelera a varredura do PLC durante uma espera por sensor.
+        - interval(plc) -> float: Intervalo atual do PLC.
+        - report() -> dict: Perfil, intervalo, esperas em andamento e taxa efetiva de requisições por PLC.
+
+    Uso:
+        with mes.polling.motion('MPS_HANDLING'):
+            scanner.wait_for(input_register_handling_plc.sensor_garra_avancada, 1, timeout=5)
+
+    Observação:
+        - Os perfis (POLLING_PROFILES) são configuráveis (seção 'polling' do config.json): 'profiles' sobrepõe
+          só os PLCs que informar em cada perfil. O intervalo de um PLC sem entrada no perfil é DEFAULT_INTERVAL.
+        - Parado, ocioso ou sem ordem a varredura dos PLCs de prensagem e separação desacelera; uma espera
+          por sensor volta à taxa de 'motion' na hora.
+        - 'max_intervals' limita o intervalo de um PLC em qualquer perfil: o manuseio, que tem os botões,
+          fica em BUTTON_SCAN_INTERVAL para o EdgeDetector confirmar toques curtos (START/RESET com a máquina parada).
+        - A taxa efetiva inclui todas as requisições do PLC (varreduras e escritas), medida em 'metrics'.
+    '''
+
+    def __init__(self, scanners: Dict[str, RegisterScanner], profiles: Optional[Dict[str, Dict[str, float]]] = None,
+                 metrics: Optional[ModbusMetrics] = None, max_intervals: Optional[Dict[str, float]] = None):
+        self.scanners = scanners
+        self.max_intervals = MAX_INTERVALS if max_intervals is None else max_intervals
+        self.profiles = {
+            name: {**POLLING_PROFILES.get(name, {}), **(profiles or {}).get(name, {})}
+            for name in {**POLLING_PROFILES, **(profiles or {})}
+        }
+        self.metrics = metrics or modbus_metrics
+
+        self._lock = threading.Lock()
+        self._state = 'running'
+        self._order_active = False
+        self._motions: Dict[str, int] = {name: 0 for name in scanners}
+
+        self._apply()
+
+    @property
+    def profile(self) -> str:
+        ''' Perfil em uso, a partir do estado da máquina e da ordem ativa. '''
+        if self._state == 'running' and not self._order_active:
+            return 'no_order'
+        return self._state if self._state in self.profiles else 'running'
+
+    def set_state(self, state: str):
+        with self._lock:
+            self._state = state
+            self._apply()
+
+    def set_order_active(self, active: bool):
+        with self._lock:
+            self._order_active = active
+            self._apply()
+
+    @contextmanager
+    def motion(self, plc: str):
+        '''
+        Acelera a varredura do PLC para a taxa de 'motion' enquanto o bloco estiver em execução.
+
+        Args:
+            - plc (str): Nome do PLC cujo sensor está sendo aguardado.
+        '''
+        with self._lock:
+            self._motions[plc] = self._motions.get(plc, 0) + 1
+            self._apply()
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._motions[plc] -= 1
+                self._apply()
+
+    def interval(self, plc: str) -> float:
+        interval = self.profiles[self.profile].get(plc, DEFAULT_INTERVAL)
+        if self._motions.get(plc):
+            interval = min(interval, self.profiles.get('motion', {}).get(plc, interval))
+        return min(interval, self.max_intervals.get(plc, interval))
+
+    def report(self) -> dict:
+        '''
+        Retorna, por PLC, o perfil, o intervalo de varredura, as esperas em andamento e a taxa efetiva.
+
+        Returns:
+            dict: profile e plcs (plc -> {interval_s, motions, requests_per_s}).
+        '''
+        rates = self.metrics.request_rates()
+
+        with self._lock:
+            return {
+                'profile': self.profile,
+                'plcs': {
+                    name: {
+                        'interval_s': self.interval(name),
+                        'motions': self._motions.get(name, 0),
+                        'requests_per_s': rates.get(name, 0.0),
+                    }
+                    for name in self.scanners
+                },
+            }
+
+    def _apply(self):
+        for name, scanner in self.scanners.items():
+            scanner.set_interval(self.interval(name))
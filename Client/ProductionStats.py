@@ -0,0 +1,122 @@
+import threading
+
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+class ProductionStats:
+    '''
+    Agregador incremental das estatísticas de produção do dia (totais, por hora e por cor).
+
+    Métodos:
+        - seed() -> bool: Carrega as contagens do dia a partir do banco (via loader).
+        - record(color, result, when): Contabiliza uma peça processada.
+        - snapshot() -> dict: Retorna as estatísticas atuais (totais, por hora e por cor).
+
+    Observação:
+        - O loader recebe o dia e retorna linhas (hora, cor, resultado, quantidade) agregadas no banco.
+        - Na virada do dia as contagens são zeradas automaticamente.
+        - Enquanto a carga inicial não tiver sucesso, ela é tentada novamente a cada snapshot().
+    '''
+
+    def __init__(self, loader: Optional[Callable[[date], Iterable[Tuple[int, str, int, int]]]] = None):
+        self.loader = loader
+
+        self._lock = threading.Lock()
+        self._day = date.today()
+        self._seeded = loader is None
+        self._reset()
+
+    def seed(self) -> bool:
+        '''
+        Substitui as contagens do dia pelas contagens agregadas no banco.
+
+        Returns:
+            bool: True se a carga foi realizada, False em caso de erro.
+        '''
+        if self.loader is None:
+            return True
+
+        day = date.today()
+        try:
+            rows = list(self.loader(day))
+        except Exception as e:
+            print(f"Erro ao carregar estatísticas de produção: {e}")
+            return False
+
+        with self._lock:
+            self._day = day
+            self._reset()
+            for hour, color, result, count in rows:
+                self._add(hour, color, result, count)
+            self._seeded = True
+
+        return True
+
+    def record(self, color: str, result: int, when: Optional[datetime] = None):
+        '''
+        Contabiliza uma peça processada.
+
+        Args:
+            - color (str)              : Cor da peça ('preto', 'prata', 'rosa').
+            - result (int)             : 1 para aprovada, 0 para rejeitada.
+            - when (datetime | None)   : Instante do processamento (padrão: agora).
+        '''
+        when = when or datetime.now()
+
+        with self._lock:
+            self._rollover(when.date())
+            if when.date() == self._day:
+                self._add(when.hour, color, result, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        '''
+        Retorna as estatísticas do dia.
+
+        Returns:
+            dict: total_pieces, approved_pieces, rejected_pieces, by_color (cor -> contagens)
+                  e hourly_data (lista ordenada por hora no formato 'HH:00').
+        '''
+        if not self._seeded:
+            self.seed()
+
+        with self._lock:
+            self._rollover(date.today())
+
+            return {
+                'total_pieces': self._approved + self._rejected,
+                'approved_pieces': self._approved,
+                'rejected_pieces': self._rejected,
+                'by_color': {color: dict(counts) for color, counts in self._by_color.items()},
+                'hourly_data': [
+                    {
+                        'hour': f"{hour:02d}:00",
+                        'total': counts['approved'] + counts['rejected'],
+                        'approved': counts['approved'],
+                        'rejected': counts['rejected'],
+                    }
+                    for hour, counts in sorted(self._hourly.items())
+                ],
+            }
+
+    def _reset(self):
+        self._approved = 0
+        self._rejected = 0
+        self._hourly: Dict[int, Dict[str, int]] = {}
+        self._by_color: Dict[str, Dict[str, int]] = {}
+
+    def _rollover(self, today: date):
+        if today > self._day:
+            self._day = today
+            self._reset()
+
+    def _add(self, hour: int, color: str, result: int, count: int):
+        key = 'approved' if result == 1 else 'rejected'
+
+        if result == 1:
+            self._approved += count
+        else:
+            self._rejected += count
+
+        self._hourly.setdefault(hour, {'approved': 0, 'rejected': 0})[key] += count
+        self._by_color.setdefault(color, {'approved': 0, 'rejected': 0})[key] += count
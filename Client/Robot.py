@@ -0,0 +1,175 @@
+import threading
+import Utils.logger as loggerManager
+
+from typing import Optional
+
+import rtde_io
+import rtde_receive
+
+
+# Combinações das saídas digitais DO0..DO2 que selecionam o subprograma do robô (ver robot-ur-programm/README.md)
+COLOR_BITS = {
+    'prata': (True, False, True),
+    'rosa':  (True, True, False),
+    'preto': (True, True, True),
+}
+
+
+class RobotSession:
+    '''
+    Sessão de longa duração com o robô UR, dona de uma conexão RTDE de IO e uma de recepção.
+
+    Métodos:
+        - connect() -> bool: Abre as conexões RTDE (se ainda não estiverem abertas).
+        - disconnect(): Fecha as conexões RTDE.
+        - set_digital_out(output_id, value) -> bool: Escreve uma saída digital padrão.
+        - get_digital_out(output_id) -> bool | None: Lê uma saída digital padrão.
+        - set_color_bits(bits) -> bool: Escreve DO0..DO2 de forma atômica para selecionar o subprograma.
+        - send_color(color) -> bool: Seleciona o subprograma do robô pela cor da peça.
+        - clear_color() -> bool: Zera DO0..DO2.
+
+    Observação:
+        - Em caso de falha de comunicação a sessão é descartada e reaberta na próxima chamada.
+        - Todas as operações são serializadas por um lock, podendo ser usadas por várias threads.
+    '''
+
+    def __init__(self, host: str):
+        self.logger = loggerManager.LoggerManager()
+
+        self.host = host
+        self._lock = threading.RLock()
+        self._io: Optional[rtde_io.RTDEIOInterface] = None
+        self._receive: Optional[rtde_receive.RTDEReceiveInterface] = None
+
+        self.reconnect_count = 0
+
+    def connect(self) -> bool:
+        '''
+        Abre as conexões RTDE de IO e de recepção, caso ainda não estejam abertas.
+
+        Returns:
+            bool: True se as duas conexões estão disponíveis, False em caso de erro.
+        '''
+        with self._lock:
+            try:
+                if self._io is None:
+                    self._io = rtde_io.RTDEIOInterface(self.host)
+                    self.reconnect_count += 1
+                if self._receive is None:
+                    self._receive = rtde_receive.RTDEReceiveInterface(self.host)
+                return True
+
+            except Exception as e:
+                self.logger.logger.error(f"Erro ao conectar no robô {self.host}: {e}")
+                self.disconnect()
+                return False
+
+    def disconnect(self):
+        '''
+        Fecha as conexões RTDE abertas.
+        '''
+        with self._lock:
+            for interface in (self._io, self._receive):
+                if interface is None:
+                    continue
+                try:
+                    interface.disconnect()
+                except Exception:
+                    pass
+
+            self._io = None
+            self._receive = None
+
+    def set_digital_out(self, output_id: int, value: bool) -> bool:
+        '''
+        Escreve um valor na saída digital padrão do robô.
+
+        Args:
+            output_id (int): ID da saída digital [0-7] para saídas padrão.
+            value (bool): True para ligar (HIGH), False para desligar (LOW).
+
+        Returns:
+            bool: True se o comando foi executado com sucesso.
+        '''
+        with self._lock:
+            if not self.connect():
+                return False
+
+            try:
+                sucesso = self._io.setStandardDigitalOut(output_id, value)
+            except Exception as e:
+                print(f"Erro ao escrever na saída digital: {e}")
+                self.disconnect()
+                return False
+
+            if not sucesso:
+                print(f"Falha ao configurar saída digital {output_id}")
+
+            return sucesso
+
+    def get_digital_out(self, output_id: int) -> Optional[bool]:
+        '''
+        Lê o valor atual da saída digital padrão do robô.
+
+        Args:
+            output_id (int): ID da saída digital [0-7] para saídas padrão.
+
+        Returns:
+            bool or None: True se HIGH, False se LOW, None se erro.
+        '''
+        with self._lock:
+            if not self.connect():
+                return None
+
+            try:
+                return self._receive.getDigitalOutState(output_id)
+            except Exception as e:
+                print(f"Erro ao ler a saída digital: {e}")
+                self.disconnect()
+                return None
+
+    def set_color_bits(self, bits: tuple[bool, bool, bool]) -> bool:
+        '''
+        Escreve DO0..DO2 de forma atômica.
+
+        Args:
+            bits (tuple[bool, bool, bool]): Valores de DO0, DO1 e DO2.
+
+        Returns:
+            bool: True se as três saídas foram escritas com sucesso.
+
+        Observação:
+            - O programa do robô só avalia DO1/DO2 quando DO0 está ligado, por isso DO0 é
+              desligado primeiro e ligado por último: o robô nunca enxerga uma combinação parcial.
+        '''
+        with self._lock:
+            sucesso = self.set_digital_out(0, False)
+            sucesso = self.set_digital_out(1, bits[1]) and sucesso
+            sucesso = self.set_digital_out(2, bits[2]) and sucesso
+
+            if bits[0]:
+                sucesso = self.set_digital_out(0, True) and sucesso
+
+            return sucesso
+
+    def send_color(self, color: str) -> bool:
+        '''
+        Seleciona o subprograma do robô correspondente à cor da peça.
+
+        Args:
+            color (str): Cor da peça ('prata', 'rosa', 'preto').
+
+        Returns:
+            bool: True se o comando foi enviado, False se a cor for desconhecida ou houver erro.
+        '''
+        if color not in COLOR_BITS:
+            print(f"Cor desconhecida para o robô: {color}")
+            return False
+
+        return self.set_color_bits(COLOR_BITS[color])
+
+    def clear_color(self) -> bool:
+        '''
+        Zera DO0..DO2, liberando o robô para o próximo comando.
+        '''
+        return self.set_color_bits((False, False, False))
@@ -0,0 +1,289 @@
+import time
+import threading
+import Utils.logger as loggerManager
+
+from enum import Enum
+from typing import Callable, Optional
+from dataclasses import dataclass
+from pymodbus.client import ModbusTcpClient
+
+from Client.Supervisor import PLCUnavailableError
+
+
+class WaitResult(Enum):
+    '''
+    Resultado de uma espera por sinal (RegisterScanner.wait_for).
+
+    Atributos:
+        - OK        : O sinal atingiu o valor esperado.
+        - TIMEOUT   : O tempo limite expirou antes do sinal atingir o valor.
+        - CANCELLED : A condição de cancelamento foi satisfeita (e.g., mudança de estado da máquina).
+    '''
+    OK = 'ok'
+    TIMEOUT = 'timeout'
+    CANCELLED = 'cancelled'
+
+    def __bool__(self):
+        return self is WaitResult.OK
+
+
+@dataclass(frozen=True)
+class RegisterSnapshot:
+    '''
+    Imagem imutável do bloco de Input Registers de um PLC em um instante de varredura.
+
+    Atributos:
+        - plc (str)                 : Nome do PLC (e.g., 'MPS_HANDLING').
+        - start (int)               : Endereço do primeiro registrador do bloco.
+        - registers (tuple[int,...]): Valores lidos, na ordem dos endereços.
+        - timestamp (float)         : Instante da leitura (time.monotonic).
+        - sequence (int)            : Número sequencial da varredura.
+    '''
+    plc: str
+    start: int
+    registers: tuple[int, ...]
+    timestamp: float
+    sequence: int
+
+    def get(self, address: int) -> int:
+        '''
+        Retorna o valor de um registrador do bloco pelo endereço absoluto.
+
+        Args:
+            - address (int): Endereço do registrador (e.g., input_register_handling_plc.sensor_braco_home).
+
+        Returns:
+            int: Valor do registrador no instante da varredura.
+        '''
+        return self.registers[address - self.start]
+
+    @property
+    def age(self) -> float:
+        ''' Idade da imagem em segundos. '''
+        return time.monotonic() - self.timestamp
+
+
+class RegisterScanner:
+    '''
+    Scanner que lê o bloco contíguo de Input Registers de um PLC em uma única requisição por ciclo
+    e publica o resultado como um RegisterSnapshot imutável.
+
+    Métodos:
+        - start(): Inicia a thread de varredura.
+        - stop(): Para a thread de varredura.
+        - scan_once() -> RegisterSnapshot | None: Executa uma varredura e publica a imagem.
+        - publish(registers) -> RegisterSnapshot: Publica uma imagem lida por outro mecanismo (e.g., runtime assíncrono).
+        - get_snapshot() -> RegisterSnapshot | None: Retorna a última imagem publicada.
+        - read(address) -> int | None: Lê um registrador a partir da última imagem válida.
+        - wait_for(address, value, timeout, cancel) -> WaitResult: Bloqueia até o registrador atingir o valor.
+        - notify(): Acorda as threads bloqueadas em wait_for para reavaliar o cancelamento.
+        - set_interval(interval): Altera o intervalo da varredura (e.g., pelo PollingScheduler).
+        - subscribe(callback): Registra uma função chamada com cada imagem publicada (e.g., EdgeDetector.update).
+
+    Observação:
+        - Com 'external' = True a varredura é feita por outro mecanismo, que publica as imagens via publish();
+          nesse caso read() nunca faz leituras síncronas pelo cliente.
+        - Os assinantes são chamados na thread que publica a imagem e devem retornar rápido.
+    '''
+
+    def __init__(self, name: str, client: ModbusTcpClient, start: int, count: int, interval: float = 0.02, max_age: float = 1.0):
+        self.logger = loggerManager.LoggerManager()
+
+        self.name = name
+        self.client = client
+        self.start_address = start
+        self.count = count
+        self.interval = interval
+        self.max_age = max_age
+
+        self._snapshot: Optional[RegisterSnapshot] = None
+        self._condition = threading.Condition()
+        self._sequence = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._listeners: list[Callable[[RegisterSnapshot], None]] = []
+
+        self.external = False
+        self.scan_count = 0
+        self.error_count = 0
+
+    def start(self):
+        '''
+        Inicia a thread de varredura contínua do PLC.
+        '''
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f'scanner-{self.name}', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        '''
+        Sinaliza a parada da thread de varredura e aguarda seu término.
+        '''
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def scan_once(self) -> Optional[RegisterSnapshot]:
+        '''
+        Lê o bloco completo de Input Registers em uma única requisição e publica a nova imagem.
+
+        Returns:
+            RegisterSnapshot | None: Imagem publicada ou None em caso de erro na leitura.
+        '''
+        try:
+            result = self.client.read_input_registers(address=self.start_address, count=self.count, slave=0)
+        except PLCUnavailableError:
+            # PLC fora do ar: a queda já foi registrada pelo supervisor
+            self.error_count += 1
+            return None
+        except Exception as e:
+            self.error_count += 1
+            self.logger.logger.error(f"Erro na varredura do {self.name}: {e}")
+            return None
+
+        if result.isError():
+            self.error_count += 1
+            return None
+
+        return self.publish(result.registers)
+
+    def publish(self, registers) -> RegisterSnapshot:
+        '''
+        Publica uma nova imagem do bloco e acorda as esperas se algum registrador mudou.
+
+        Args:
+            - registers (list[int]): Valores lidos a partir do endereço inicial do bloco.
+
+        Returns:
+            RegisterSnapshot: Imagem publicada.
+        '''
+        self._sequence += 1
+        snapshot = RegisterSnapshot(
+            plc=self.name,
+            start=self.start_address,
+            registers=tuple(registers[:self.count]),
+            timestamp=time.monotonic(),
+            sequence=self._sequence
+        )
+        self.scan_count += 1
+
+        with self._condition:
+            previous = self._snapshot
+            self._snapshot = snapshot
+            if previous is None or previous.registers != snapshot.registers:
+                self._condition.notify_all()
+
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                self.logger.logger.error(f"Erro em assinante da varredura do {self.name}: {e}")
+
+        return snapshot
+
+    def get_snapshot(self) -> Optional[RegisterSnapshot]:
+        '''
+        Retorna a última imagem publicada, ou None se ainda não houve leitura válida.
+        '''
+        return self._snapshot
+
+    def read(self, address: int) -> Optional[int]:
+        '''
+        Lê um registrador a partir da última imagem válida.
+
+        Args:
+            - address (int): Endereço do registrador.
+
+        Returns:
+            int | None: Valor do registrador, ou None se não houver imagem recente.
+
+        Observação:
+            - Se a thread de varredura não estiver rodando, faz uma varredura síncrona.
+            - Imagens mais antigas que 'max_age' são tratadas como erro de leitura.
+        '''
+        snapshot = self._snapshot
+
+        if not (self._running or self.external):
+            snapshot = self.scan_once()
+
+        if snapshot is None or snapshot.age > self.max_age:
+            return None
+
+        return snapshot.get(address)
+
+    def wait_for(self, address: int, value: int, timeout: Optional[float] = None, cancel: Optional[Callable[[], bool]] = None) -> WaitResult:
+        '''
+        Bloqueia até o registrador atingir o valor esperado, sem varredura ativa do chamador.
+
+        Args:
+            - address (int)                   : Endereço do registrador.
+            - value (int)                     : Valor esperado.
+            - timeout (float | None)          : Tempo limite em segundos (None para esperar indefinidamente).
+            - cancel (Callable[[], bool] | None): Condição de cancelamento, reavaliada a cada notificação.
+
+        Returns:
+            WaitResult: OK, TIMEOUT ou CANCELLED.
+
+        Observação:
+            - A thread é acordada pelo scanner assim que uma varredura publica uma mudança no bloco,
+              ou por notify() quando a condição de cancelamento pode ter mudado.
+            - Se o scanner não estiver rodando, a espera faz varreduras síncronas a cada 'interval'.
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                if cancel is not None and cancel():
+                    return WaitResult.CANCELLED
+
+                if self.read(address) == value:
+                    return WaitResult.OK
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return WaitResult.TIMEOUT
+
+                if self._running or self.external:
+                    # Limita a espera a max_age para reavaliar imagens que ficaram velhas sem mudanças
+                    self._condition.wait(self.max_age if remaining is None else min(remaining, self.max_age))
+                else:
+                    self._condition.wait(self.interval if remaining is None else min(remaining, self.interval))
+
+    def set_interval(self, interval: float):
+        '''
+        Altera o intervalo entre varreduras; se o novo intervalo for menor, a próxima varredura é feita na hora.
+
+        Args:
+            - interval (float): Intervalo em segundos.
+        '''
+        shorter = interval < self.interval
+        self.interval = interval
+        if shorter:
+            self._wakeup.set()
+
+    def subscribe(self, callback: Callable[[RegisterSnapshot], None]):
+        '''
+        Registra uma função chamada com cada imagem publicada, na thread que publica.
+
+        Args:
+            - callback (Callable[[RegisterSnapshot], None]): Função que recebe a nova imagem.
+        '''
+        self._listeners = self._listeners + [callback]
+
+    def notify(self):
+        '''
+        Acorda todas as threads bloqueadas em wait_for para reavaliar suas condições de cancelamento.
+        '''
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self):
+        while self._running:
+            self.scan_once()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
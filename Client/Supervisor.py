@@ -0,0 +1,251 @@
+import time
+import threading
+import Utils.logger as loggerManager
+
+from enum import Enum
+from typing import Callable, Optional
+
+
+class PLCUnavailableError(ConnectionError):
+    '''
+    Requisição recusada sem tentar a rede porque o PLC está fora do ar (HealthState.DOWN).
+
+    Atributos:
+        - plc (str): Nome do PLC.
+    '''
+
+    def __init__(self, plc: str):
+        super().__init__(f"{plc} fora do ar (aguardando reconexão)")
+        self.plc = plc
+
+
+class HealthState(Enum):
+    '''
+    Saúde da conexão com um PLC.
+
+    Atributos:
+        - CONNECTED : Requisições sendo atendidas.
+        - DEGRADED  : Timeouts recentes, mas a conexão ainda é usada.
+        - DOWN      : Conexão perdida; requisições falham na hora e a reconexão roda em segundo plano.
+    '''
+    CONNECTED = 'connected'
+    DEGRADED = 'degraded'
+    DOWN = 'down'
+
+
+# Resultados de requisição (ModbusMetrics.classify) que indicam problema na conexão
+FAILURE_OUTCOMES = ('timeout', 'error')  # 'error': exceção que não é timeout nem erro de conexão
+CONNECTION_OUTCOMES = ('connection_error',)
+
+
+class ConnectionSupervisor:
+    '''
+    Supervisor da conexão com um PLC: acompanha o resultado das requisições, mantém o estado de saúde
+    e reconecta com backoff exponencial enquanto o PLC estiver fora do ar.
+
+    Métodos:
+        - start() -> bool: Faz a primeira conexão e inicia a thread de reconexão.
+        - stop(): Encerra a thread de reconexão.
+        - check(): Levanta PLCUnavailableError se o PLC estiver fora do ar (falha rápida).
+        - record(outcome): Registra o resultado de uma requisição (ver ModbusMetrics.classify).
+        - mark_down(reason): Marca o PLC como fora do ar e dispara a reconexão.
+        - wait_connected(timeout) -> bool: Aguarda o PLC voltar (CONNECTED ou DEGRADED).
+        - metrics() -> dict: Estado, quedas, tempo fora do ar, última recuperação e tentativas de reconexão.
+
+    Uso:
+        supervisor = ConnectionSupervisor('MPS_HANDLING', dispatcher.reconnect)
+        supervisor.start()
+        supervisor.check()   # antes de cada requisição
+        supervisor.record(outcome)
+
+    Observação:
+        - Um erro de conexão derruba o PLC na hora; timeouts e outros erros deixam o PLC DEGRADED e, após
+          'failure_threshold' falhas seguidas, DOWN. Qualquer resposta do PLC (inclusive uma exception
+          response Modbus) volta a CONNECTED.
+        - As tentativas de reconexão esperam 'initial_backoff' segundos, dobrando a cada falha até 'max_backoff'.
+        - O tempo de recuperação é medido da queda até a reconexão; 'on_change' recebe o novo estado.
+    '''
+
+    def __init__(self, name: str, connect: Callable[[], bool], initial_backoff: float = 0.5, max_backoff: float = 30.0,
+                 failure_threshold: int = 3, on_change: Optional[Callable[[HealthState], None]] = None):
+        self.logger = loggerManager.LoggerManager()
+
+        self.name = name
+        self.connect = connect
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.on_change = on_change
+
+        self._lock = threading.Lock()
+        self._down = threading.Event()
+        self._up = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._state = HealthState.CONNECTED
+        self._failures = 0
+        self._down_since: Optional[float] = None
+
+        self.outages = 0
+        self.downtime = 0.0
+        self.last_recovery: Optional[float] = None
+        self.reconnect_attempts = 0
+        self.last_error = ''
+
+        self._up.set()
+
+    @property
+    def state(self) -> HealthState:
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        return self._state is not HealthState.DOWN
+
+    def start(self) -> bool:
+        '''
+        Faz a primeira conexão e inicia a thread de reconexão.
+
+        Returns:
+            bool: True se conectou; caso contrário o PLC começa DOWN e a reconexão segue em segundo plano.
+        '''
+        connected = self._try_connect()
+        if not connected:
+            self.mark_down("falha na conexão inicial")
+
+        self._thread = threading.Thread(target=self._run, name=f'supervisor-{self.name}', daemon=True)
+        self._thread.start()
+        return connected
+
+    def stop(self):
+        self._stopped.set()
+        self._down.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def check(self):
+        '''
+        Levanta PLCUnavailableError se o PLC estiver fora do ar, sem tocar na rede.
+        '''
+        if self._state is HealthState.DOWN:
+            raise PLCUnavailableError(self.name)
+
+    def record(self, outcome: str):
+        '''
+        Registra o resultado de uma requisição e atualiza o estado de saúde.
+
+        Args:
+            - outcome (str): 'ok', 'exception_response', 'timeout', 'connection_error' ou 'error'.
+        '''
+        if outcome in CONNECTION_OUTCOMES:
+            self.mark_down(outcome)
+            return
+
+        with self._lock:
+            if self._state is HealthState.DOWN:
+                return
+
+            if outcome in FAILURE_OUTCOMES:
+                self._failures += 1
+                state = HealthState.DEGRADED
+            else:
+                self._failures = 0
+                state = HealthState.CONNECTED
+
+            failures = self._failures
+            changed = state is not self._state
+            self._state = state
+
+        if failures >= self.failure_threshold:
+            self.mark_down(f"{failures} falhas seguidas ({outcome})")
+        elif changed:
+            self._notify(state)
+
+    def mark_down(self, reason: str):
+        '''
+        Marca o PLC como fora do ar e acorda a thread de reconexão.
+
+        Args:
+            - reason (str): Motivo da queda (registrado no log).
+        '''
+        with self._lock:
+            if self._state is HealthState.DOWN:
+                return
+            self._state = HealthState.DOWN
+            self._down_since = time.monotonic()
+            self.outages += 1
+            self.last_error = reason
+            self._up.clear()
+            self._down.set()
+
+        self.logger.logger.error(f"{self.name} fora do ar: {reason}")
+        print(f"{self.name} fora do ar ({reason}) - reconectando em segundo plano")
+        self._notify(HealthState.DOWN)
+
+    def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        return self._up.wait(timeout)
+
+    def metrics(self) -> dict:
+        '''
+        Retorna o estado de saúde e as métricas de recuperação.
+
+        Returns:
+            dict: state, outages, downtime_s (inclui a queda em andamento), last_recovery_s,
+                  reconnect_attempts e last_error.
+        '''
+        with self._lock:
+            downtime = self.downtime
+            if self._down_since is not None:
+                downtime += time.monotonic() - self._down_since
+
+            return {
+                'state': self._state.value,
+                'outages': self.outages,
+                'downtime_s': downtime,
+                'last_recovery_s': self.last_recovery,
+                'reconnect_attempts': self.reconnect_attempts,
+                'last_error': self.last_error,
+            }
+
+    def _notify(self, state: HealthState):
+        if self.on_change:
+            try:
+                self.on_change(state)
+            except Exception as e:
+                print(f"Erro ao notificar mudança de conexão do {self.name}: {e}")
+
+    def _try_connect(self) -> bool:
+        try:
+            return bool(self.connect())
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._down.wait()
+            if self._stopped.is_set():
+                return
+
+            backoff = self.initial_backoff
+            while not self._stopped.wait(backoff):
+                self.reconnect_attempts += 1
+                if self._try_connect():
+                    break
+                backoff = min(backoff * 2, self.max_backoff)
+            else:
+                return
+
+            with self._lock:
+                recovery = time.monotonic() - self._down_since
+                self.downtime += recovery
+                self.last_recovery = recovery
+                self._down_since = None
+                self._failures = 0
+                self._state = HealthState.CONNECTED
+                self._down.clear()
+                self._up.set()
+
+            print(f"{self.name} reconectado em {recovery:.1f} s")
+            self._notify(HealthState.CONNECTED)
@@ -0,0 +1,187 @@
+import threading
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import count
+from typing import Callable, Optional
+
+
+UNDEFINED_COLOR = 'indefinido'
+
+
+@dataclass(eq=False)
+class Piece:
+    '''
+    Peça em processo na linha, do momento em que é pega no magazine até ser retirada pelo robô.
+
+    Atributos:
+        - id (int)                     : Identificador sequencial da peça.
+        - provisional_color (str)      : Cor lida na garra (sensor_peca_garra): 'preto' ou 'indefinido'.
+        - confirmed_color (str | None) : Cor confirmada na barreira indutiva (MB_SENSOR_IND).
+        - stages (dict[str, datetime]) : Instante de cada etapa (picked, deposited, identified, at_end, removed, discarded).
+    '''
+    id: int
+    provisional_color: str
+    confirmed_color: Optional[str] = None
+    stages: dict = field(default_factory=dict)
+
+    @property
+    def color(self) -> str:
+        ''' Cor mais precisa conhecida: a confirmada, se houver, ou a provisória. '''
+        return self.confirmed_color or self.provisional_color
+
+    @property
+    def stage(self) -> str:
+        ''' Última etapa atingida. '''
+        return next(reversed(self.stages))
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'color': self.color,
+            'provisional_color': self.provisional_color,
+            'confirmed_color': self.confirmed_color,
+            'stage': self.stage,
+            'stages': {stage: moment.isoformat() for stage, moment in self.stages.items()},
+        }
+
+
+class WIPTracker:
+    '''
+    Fila thread-safe das peças em processo, compartilhada pelos fluxos de manuseio e de prensagem.
+
+    Métodos:
+        - pick(provisional_color) -> Piece: Registra a peça pega no magazine (fim da fila).
+        - deposit(piece): Marca a peça como depositada na esteira.
+        - confirm(metallic) -> Piece | None: Confirma a cor da peça mais antiga na esteira ainda não identificada.
+        - arrive_end() -> Piece | None: Marca a chegada ao final da esteira da peça mais antiga depositada.
+        - complete(piece): Retira a peça da fila (removida da esteira).
+        - discard(piece): Retira da fila uma peça que não seguiu na linha (e.g., descartada no rejeito).
+        - held() -> Piece | None: Peça pega e ainda não depositada.
+        - snapshot() -> dict: Peças em processo e as últimas concluídas.
+
+    Observação:
+        - Cada fluxo só atua sobre peças na etapa certa: a cor lida na barreira vai sempre para a peça
+          depositada mais antiga ainda não identificada, nunca para a peça que está na garra.
+        - Entrada e saída da fila são O(1) (deque); 'on_change' é chamado (fora do lock) a cada alteração.
+    '''
+
+    def __init__(self, history: int = 20, on_change: Optional[Callable[[dict], None]] = None):
+        self.on_change = on_change
+
+        self._lock = threading.Lock()
+        self._pieces: deque[Piece] = deque()
+        self._recent: deque[Piece] = deque(maxlen=history)
+        self._ids = count(1)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pieces)
+
+    def pick(self, provisional_color: str) -> Piece:
+        '''
+        Registra uma peça pega no magazine.
+
+        Args:
+            - provisional_color (str): 'preto' ou 'indefinido' (prata ou rosa, a confirmar na prensagem).
+
+        Returns:
+            Piece: Registro da peça, usado pelo fluxo de manuseio nas etapas seguintes.
+        '''
+        with self._lock:
+            piece = Piece(next(self._ids), provisional_color)
+            piece.stages['picked'] = datetime.now()
+            self._pieces.append(piece)
+
+        self._notify()
+        return piece
+
+    def deposit(self, piece: Piece):
+        self._advance(piece, 'deposited')
+
+    def confirm(self, metallic: bool) -> Optional[Piece]:
+        '''
+        Confirma a cor da peça depositada mais antiga ainda não identificada.
+
+        Args:
+            - metallic (bool): Leitura do sensor indutivo (True = prata).
+
+        Returns:
+            Piece | None: Peça identificada ou None se não houver peça na esteira aguardando identificação.
+        '''
+        with self._lock:
+            piece = next((p for p in self._pieces if p.stage == 'deposited'), None)
+            if piece is None:
+                return None
+
+            if piece.provisional_color == UNDEFINED_COLOR:
+                piece.confirmed_color = 'prata' if metallic else 'rosa'
+            else:
+                piece.confirmed_color = piece.provisional_color
+            piece.stages['identified'] = datetime.now()
+
+        self._notify()
+        return piece
+
+    def arrive_end(self) -> Optional[Piece]:
+        '''
+        Marca a chegada ao final da esteira da peça depositada mais antiga.
+
+        Returns:
+            Piece | None: Peça no final da esteira ou None se nenhuma peça foi depositada.
+        '''
+        with self._lock:
+            piece = next((p for p in self._pieces if p.stage in ('deposited', 'identified')), None)
+            if piece is None:
+                return None
+            piece.stages['at_end'] = datetime.now()
+
+        self._notify()
+        return piece
+
+    def complete(self, piece: Piece):
+        self._remove(piece, 'removed')
+
+    def discard(self, piece: Piece):
+        self._remove(piece, 'discarded')
+
+    def held(self) -> Optional[Piece]:
+        with self._lock:
+            return next((p for p in reversed(self._pieces) if p.stage == 'picked'), None)
+
+    def snapshot(self) -> dict:
+        '''
+        Retorna as peças em processo (da mais antiga para a mais recente) e as últimas concluídas.
+        '''
+        with self._lock:
+            return {
+                'count': len(self._pieces),
+                'pieces': [piece.to_dict() for piece in self._pieces],
+                'recent': [piece.to_dict() for piece in reversed(self._recent)],
+            }
+
+    def _advance(self, piece: Piece, stage: str):
+        with self._lock:
+            piece.stages[stage] = datetime.now()
+        self._notify()
+
+    def _remove(self, piece: Piece, stage: str):
+        with self._lock:
+            if self._pieces and self._pieces[0] is piece:
+                self._pieces.popleft()
+            elif piece in self._pieces:
+                self._pieces.remove(piece)
+            else:
+                return
+            piece.stages[stage] = datetime.now()
+            self._recent.append(piece)
+
+        self._notify()
+
+    def _notify(self):
+        if self.on_change:
+            try:
+                self.on_change(self.snapshot())
+            except Exception as e:
+                print(f"Erro ao notificar mudança das peças em processo: {e}")
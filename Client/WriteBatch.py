@@ -0,0 +1,106 @@
+from typing import Optional
+from pymodbus.client import ModbusTcpClient
+
+
+def coalesce_writes(writes: dict[int, int]) -> list[tuple[int, list[int]]]:
+    '''
+    Agrupa escritas de Holding Registers em faixas de endereços contíguos.
+
+    Args:
+        - writes (dict[int, int]): Mapa endereço -> valor a ser escrito.
+
+    Returns:
+        list[tuple[int, list[int]]]: Lista de (endereço inicial, valores) para cada faixa contígua.
+
+    Exemplo:
+        - {8: 1, 9: 0, 10: 0, 17: 1} -> [(8, [1, 0, 0]), (17, [1])]
+    '''
+    runs: list[tuple[int, list[int]]] = []
+
+    for address in sorted(writes):
+        if runs and runs[-1][0] + len(runs[-1][1]) == address:
+            runs[-1][1].append(writes[address])
+        else:
+            runs.append((address, [writes[address]]))
+
+    return runs
+
+
+class WriteTransaction:
+    '''
+    Transação de escrita que acumula escritas de Holding Registers de um PLC e as envia
+    agrupadas: cada faixa contígua de endereços vira uma única requisição write_registers (FC16).
+
+    Métodos:
+        - write(address, value): Agenda a escrita de um registrador (a última escrita prevalece).
+        - commit() -> bool: Envia as escritas agendadas ao PLC.
+
+    Observação:
+        - Se o PLC recusar uma faixa (e.g., endereço ilegal no meio dela), a faixa é reenviada registrador
+          por registrador, para que os endereços válidos ainda sejam escritos.
+        - Ao sair do bloco 'with' o resultado do commit fica em 'committed'; quem precisa dele
+          (e.g., parada geral) deve chamar commit() diretamente.
+
+    Uso:
+        with mes.write_transaction('MPS_HANDLING') as tx:
+            tx.write(holding_register_handling_plc.LAMP_GREEN, 1)
+            tx.write(holding_register_handling_plc.LAMP_YELLOW, 0)
+            tx.write(holding_register_handling_plc.LAMP_RED, 0)
+    '''
+
+    def __init__(self, client: ModbusTcpClient, plc: str = ''):
+        self.client = client
+        self.plc = plc
+        self.writes: dict[int, int] = {}
+        self.committed: Optional[bool] = None
+
+    def write(self, address: int, value: int):
+        '''
+        Agenda a escrita de um Holding Register.
+
+        Args:
+            - address (int): Endereço do registrador.
+            - value (int)  : Valor a ser escrito.
+        '''
+        self.writes[int(address)] = int(value)
+
+    def commit(self) -> bool:
+        '''
+        Envia as escritas agendadas ao PLC, uma requisição por faixa contígua de endereços.
+
+        Returns:
+            bool: True se todas as requisições foram aceitas pelo PLC, False caso contrário.
+        '''
+        success = True
+
+        for address, values in coalesce_writes(self.writes):
+            if len(values) == 1:
+                written = self._write_one(address, values[0])
+            else:
+                result = self.client.write_registers(address=address, values=values, slave=0)
+                written = not result.isError()
+                if not written:
+                    print(f"Erro ao escrever registradores {address}-{address + len(values) - 1} no {self.plc}: {result}"
+                          f" - reenviando um a um")
+                    written = all([self._write_one(address + offset, value) for offset, value in enumerate(values)])
+
+            success = success and written
+
+        self.writes.clear()
+        self.committed = success
+        return success
+
+    def _write_one(self, address: int, value: int) -> bool:
+        result = self.client.write_register(address=address, value=value, slave=0)
+        if result.isError():
+            print(f"Erro ao escrever registrador {address} no {self.plc}: {result}")
+            return False
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
@@ -0,0 +1,225 @@
+import time
+import queue
+import threading
+import Utils.logger as loggerManager
+
+from typing import Any, Callable, Dict, List, Optional
+
+
+class WriteBehindQueue:
+    '''
+    Estágio de persistência assíncrona (write-behind): as threads produtoras enfileiram eventos
+    e uma thread de fundo os grava em lotes através de um handler.
+
+    Métodos:
+        - submit(item): Enfileira um evento (bloqueia se a fila estiver cheia - backpressure).
+        - flush(timeout) -> bool: Aguarda até que todos os eventos enfileirados tenham sido gravados.
+        - close(timeout): Para de aceitar eventos, grava os pendentes e encerra a thread.
+        - metrics() -> dict: Métricas da fila (profundidade, lotes, falhas, bloqueios...).
+
+    Observação:
+        - O handler recebe uma lista de eventos e deve gravá-los numa única transação.
+        - Um lote com erro transitório fica à frente da fila e é reenviado até ser gravado, esperando 'retry_delay'
+          segundos e dobrando a cada falha até 'max_retry_delay'. Durante uma queda longa do banco a fila
+          enche e submit() passa a bloquear (backpressure).
+        - Um erro que 'is_permanent' classifica como permanente (e.g., violação de constraint) não é reenviado:
+          os eventos do lote são gravados um a um e os que falharem de novo vão para a fila de descarte
+          (dead letter) - registrados no log, contados em 'dead_lettered' e repassados a 'on_dead_letter'.
+          Assim um evento inválido não trava a fila nem as threads produtoras.
+        - Só close() desiste de um lote, depois de esgotar o seu timeout; os eventos não gravados são
+          registrados no log, um por linha, para recuperação manual.
+    '''
+
+    def __init__(self, handler: Callable[[List[Any]], None], name: str = 'write-behind', maxsize: int = 256,
+                 batch_size: int = 32, retry_delay: float = 1.0, max_retry_delay: float = 30.0,
+                 is_permanent: Callable[[Exception], bool] = lambda error: False,
+                 on_dead_letter: Optional[Callable[[Any, Exception], None]] = None):
+        self.logger = loggerManager.LoggerManager()
+
+        self.handler = handler
+        self.is_permanent = is_permanent
+        self.on_dead_letter = on_dead_letter
+        self.name = name
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._pending = 0
+        self._pending_condition = threading.Condition()
+        self._closed = False
+        self._abandon = threading.Event()
+
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._failed = 0
+        self._retrying = 0
+        self._lost = 0
+        self._dead_lettered = 0
+        self._max_depth = 0
+        self._blocked_puts = 0
+        self._blocked_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any):
+        '''
+        Enfileira um evento para gravação em segundo plano.
+
+        Args:
+            - item (Any): Evento a ser gravado pelo handler.
+
+        Raises:
+            - RuntimeError: Se a fila já foi encerrada.
+
+        Observação:
+            - Se a fila estiver cheia a chamada bloqueia até haver espaço; o tempo bloqueado
+              é contabilizado nas métricas de backpressure.
+        '''
+        if self._closed:
+            raise RuntimeError(f"Fila {self.name} encerrada")
+
+        with self._pending_condition:
+            self._pending += 1
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            start = time.monotonic()
+            self._queue.put(item)
+            self._blocked_puts += 1
+            self._blocked_time += time.monotonic() - start
+
+        self._enqueued += 1
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        '''
+        Aguarda até que todos os eventos enfileirados tenham sido processados.
+
+        Args:
+            - timeout (float | None): Tempo limite em segundos (None para aguardar indefinidamente).
+
+        Returns:
+            bool: True se a fila foi esvaziada, False se o tempo limite expirou.
+        '''
+        with self._pending_condition:
+            return self._pending_condition.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        '''
+        Para de aceitar eventos, grava os pendentes e encerra a thread de fundo.
+
+        Args:
+            - timeout (float | None): Tempo máximo de espera pela gravação dos pendentes.
+        '''
+        self._closed = True
+        if not self.flush(timeout):
+            self.logger.logger.error(f"{self.name}: {self._pending} eventos não gravados no encerramento")
+            self._abandon.set()
+        self._queue.put(None)
+        self._thread.join(timeout=1)
+
+    def metrics(self) -> Dict[str, Any]:
+        '''
+        Retorna as métricas da fila.
+
+        Returns:
+            dict: depth, max_depth, capacity, enqueued, written, batches, failed (tentativas com erro),
+                  retrying (eventos do lote em reenvio), lost (abandonados no encerramento),
+                  dead_lettered (descartados por erro permanente), blocked_puts e blocked_time_ms.
+        '''
+        return {
+            'depth': self._queue.qsize(),
+            'max_depth': self._max_depth,
+            'capacity': self._queue.maxsize,
+            'enqueued': self._enqueued,
+            'written': self._written,
+            'batches': self._batches,
+            'failed': self._failed,
+            'retrying': self._retrying,
+            'lost': self._lost,
+            'dead_lettered': self._dead_lettered,
+            'blocked_puts': self._blocked_puts,
+            'blocked_time_ms': self._blocked_time * 1000,
+        }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            self._write(batch)
+
+            with self._pending_condition:
+                self._pending -= len(batch)
+                self._pending_condition.notify_all()
+
+    def _write(self, batch: List[Any]):
+        error = self._write_with_retry(batch)
+        if error is None:
+            return
+
+        # Erro permanente: grava um a um para isolar os eventos inválidos e não perder o resto do lote
+        for item in batch:
+            item_error = self._write_with_retry([item]) if len(batch) > 1 else error
+            if item_error is not None:
+                self._dead_letter(item, item_error)
+
+    def _dead_letter(self, item: Any, error: Exception):
+        self._dead_lettered += 1
+        self.logger.logger.error(f"{self.name}: evento descartado por erro permanente ({error}): {item!r}")
+
+        if self.on_dead_letter is not None:
+            try:
+                self.on_dead_letter(item, error)
+            except Exception as e:
+                self.logger.logger.error(f"{self.name}: erro ao notificar evento descartado: {e}")
+
+    def _write_with_retry(self, batch: List[Any]) -> Optional[Exception]:
+        # None se o lote foi gravado (ou abandonado por close()); o erro se ele for permanente
+        delay = self.retry_delay
+        attempt = 0
+
+        while True:
+            attempt += 1
+            try:
+                self.handler(batch)
+                self._written += len(batch)
+                self._batches += 1
+                self._retrying = 0
+                return None
+            except Exception as e:
+                self._failed += 1
+                if self.is_permanent(e):
+                    self._retrying = 0
+                    self.logger.logger.error(f"{self.name}: erro permanente ao gravar lote de {len(batch)} eventos: {e}")
+                    return e
+
+                self._retrying = len(batch)
+                self.logger.logger.error(f"{self.name}: erro ao gravar lote de {len(batch)} eventos "
+                                         f"(tentativa {attempt}, nova tentativa em {delay:.1f} s): {e}")
+
+            # close() desistiu de esperar: registra os eventos no log em vez de perdê-los em silêncio
+            if self._abandon.wait(delay):
+                self._retrying = 0
+                self._lost += len(batch)
+                for item in batch:
+                    self.logger.logger.error(f"{self.name}: evento não gravado: {item!r}")
+                return None
+
+            delay = min(delay * 2, self.max_retry_delay)
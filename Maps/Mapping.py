@@ -84,4 +84,43 @@ class input_register_pressing_plc:
     # Posições e bloqueios
     MB_BLOQ_FRONT             = 8
     MB_COIN_REC               = 9
-    MB_COIN_FRONT             = 10
\ No newline at end of file
+    MB_COIN_FRONT             = 10
+
+def register_addresses(register_map) -> list[int]:
+    '''
+    Lista os endereços declarados numa classe de endereçamento.
+
+    Args:
+        - register_map (type): Classe de endereçamento (e.g., holding_register_pressing_plc).
+
+    Returns:
+        list[int]: Endereços em ordem crescente, sem repetições.
+    '''
+    return sorted({value for name, value in vars(register_map).items() if not name.startswith('_') and isinstance(value, int)})
+
+
+def register_block(register_map) -> tuple[int, int]:
+    '''
+    Calcula o bloco contíguo (endereço inicial, quantidade) coberto por uma classe de endereçamento.
+
+    Args:
+        - register_map (type): Classe de endereçamento (e.g., input_register_handling_plc).
+
+    Returns:
+        tuple[int, int]: Endereço inicial e quantidade de registradores do bloco.
+    '''
+    addresses = register_addresses(register_map)
+    return addresses[0], addresses[-1] - addresses[0] + 1
+
+
+# Blocos de Input Registers lidos de uma só vez pelo scanner de cada PLC
+INPUT_REGISTER_MAPS = {
+    'MPS_HANDLING': input_register_handling_plc,
+    'MPS_PRESSING': input_register_pressing_plc,
+}
+
+# Holding Registers existentes em cada PLC: as escritas em bloco (e.g., parada geral) não passam desses endereços
+HOLDING_REGISTER_MAPS = {
+    'MPS_HANDLING': holding_register_handling_plc,
+    'MPS_PRESSING': holding_register_pressing_plc,
+}
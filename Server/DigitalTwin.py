@@ -1,14 +1,16 @@
+import time
+import threading
 import Utils.logger as loggerManager
 
+from array import array
+from contextlib import contextmanager
 from enum import IntEnum
 from pyModbusTCP.server import ModbusServer
 
 
 DI_SIZE = 30  # Tamanho do array de Discrete Inputs
 INPUT_HR_SIZE = 30  # Tamanho do array de Holding Registers
-
-di = [False] * DI_SIZE  # Array de Discrete Inputs inicializado com False
-input_hr = [False] * INPUT_HR_SIZE  # Array de Holding Registers inicializado com False
+FLUSH_RATE_HZ = 50  # Frequência máxima de publicação das alterações no servidor Modbus
 
 
 class DI(IntEnum):
@@ -53,15 +55,45 @@ class DigitalTwin:
     Classe que representa o Digital Twin do sistema Modular Producing System (MPS) da Festo.
 
     Metodos:
-        - __init__(): Inicializa o servidor Modbus e configura o banco de registradores.
-        - commit_all(): Atualiza todos os Discrete Inputs e Holding Registers no servidor Modbus.
+        - __init__(flush_rate): Inicializa o servidor Modbus, configura o banco de registradores e a thread de publicação.
+        - commit_all(): Solicita a publicação das alterações pendentes no servidor Modbus (não bloqueia).
+        - flush(): Publica imediatamente as faixas de DI e INPUT_HR alteradas desde a última publicação.
         - set_parameter(parameter, value): Define o valor de um parâmetro específico (DI ou INPUT_HR).
+        - get_parameter(parameter) -> int | bool: Retorna o valor atual de um parâmetro (DI ou INPUT_HR).
+        - batch(): Context manager que aplica um grupo de alterações de forma atômica.
+        - metrics() -> dict: Publicações realizadas e quantidade de valores escritos no servidor.
+        - close(): Publica as alterações pendentes e encerra a thread de publicação.
+
+    Observação:
+        - set_parameter() apenas marca o índice alterado; a thread de publicação escreve no servidor
+          somente a faixa alterada, no máximo 'flush_rate' vezes por segundo, agrupando as alterações
+          solicitadas nesse intervalo.
+        - O estado do gêmeo pertence à instância (arrays de DI_SIZE bits e INPUT_HR_SIZE registradores).
+        - As alterações feitas dentro de batch() só são publicadas juntas, ao final do bloco, com uma
+          única escrita por banco; o servidor nunca expõe uma combinação aplicada pela metade.
     """
 
-    def __init__(self):
+    def __init__(self, flush_rate: float = FLUSH_RATE_HZ):
         self.logger = loggerManager.LoggerManager()
         self.logger.set_name("DigitalTwin_MPS_Festo")
 
+        self.flush_interval = 1.0 / flush_rate
+        self.db = None
+
+        self._di = bytearray(DI_SIZE)                  # Discrete Inputs (0 ou 1)
+        self._input_hr = array('H', bytes(2 * INPUT_HR_SIZE))  # Registradores de 16 bits
+
+        self._lock = threading.RLock()
+        self._dirty_di: set[int] = set()
+        self._dirty_hr: set[int] = set()
+        self._flush_requested = threading.Event()
+        self._running = True
+
+        self._flushes = 0
+        self._di_written = 0
+        self._hr_written = 0
+        self._errors = 0
+
         try:
             self.server = ModbusServer(host="127.0.0.1", port=502, no_block=True)
             self.server.start()
@@ -72,19 +104,47 @@ class DigitalTwin:
         except Exception as e:
             self.logger.logger.error(f"Erro ao iniciar o servidor Modbus: {e}")
 
+        self._thread = threading.Thread(target=self._flush_loop, name="DigitalTwin-flush", daemon=True)
+        self._thread.start()
+
     def commit_all(self):
         """
-        Metodo da classe DigitalTwin que atualiza todos os Discrete Inputs e Holding Registers no servidor Modbus.
+        Metodo da classe DigitalTwin que solicita a publicação das alterações pendentes no servidor Modbus.
+
+        Observação:
+            - Não bloqueia: a escrita é feita pela thread de publicação na próxima janela de 'flush_interval'.
+        """
+        self._flush_requested.set()
+
+    def flush(self):
+        """
+        Metodo da classe DigitalTwin que publica no servidor Modbus as faixas de DI e INPUT_HR alteradas.
         """
-        self.db.set_discrete_inputs(0, di)
-        self.logger.logger.info("Discrete inputs committed")
-        # Fazendo o set de todos os INPUT_HR de uma vez
-        if hasattr(self.db, "set_holding_registers"):
-            self.db.set_input_registers(0, input_hr)
-            self.logger.logger.info("Holding registers committed")
-        else:
-            self.db.set_words(0, input_hr)
-            self.logger.logger.info("Words committed")
+        with self._lock:
+            di_span = self._take_span(self._dirty_di, self._di)
+            hr_span = self._take_span(self._dirty_hr, self._input_hr)
+
+        if not (di_span or hr_span) or self.db is None:
+            return
+
+        try:
+            if di_span:
+                self.db.set_discrete_inputs(di_span[0], [bool(bit) for bit in di_span[1]])
+                self._di_written += len(di_span[1])
+
+            if hr_span:
+                if hasattr(self.db, "set_input_registers"):
+                    self.db.set_input_registers(*hr_span)
+                else:
+                    self.db.set_words(*hr_span)
+                self._hr_written += len(hr_span[1])
+
+            self._flushes += 1
+            self.logger.logger.debug(f"Digital Twin publicado: DI {di_span and di_span[0]}, INPUT_HR {hr_span and hr_span[0]}")
+
+        except Exception as e:
+            self._errors += 1
+            self.logger.logger.error(f"Erro ao publicar o Digital Twin: {e}")
 
     def set_parameter(self, parameter, value):
         """
@@ -100,17 +160,101 @@ class DigitalTwin:
 
         try:
             if isinstance(parameter, DI):
-                di[parameter] = bool(value)
-                # self.commit_all()
-                # print(f"DI {parameter.name} set to {value}")
+                with self._lock:
+                    if self._di[parameter] != bool(value):
+                        self._di[parameter] = bool(value)
+                        self._dirty_di.add(int(parameter))
 
             elif isinstance(parameter, INPUT_HR):
-                input_hr[parameter] = int(value)
-                # self.commit_all()
-                #print(f"INPUT_HR {parameter.name} set to {value}")
+                with self._lock:
+                    if self._input_hr[parameter] != int(value):
+                        self._input_hr[parameter] = int(value)
+                        self._dirty_hr.add(int(parameter))
 
             else:
                 self.logger.logger.error(f"Parâmetro desconhecido: {parameter}")
 
         except Exception as e:
             print(f"Erro no set_parameter: {e}")
+
+    def get_parameter(self, parameter):
+        """
+        Metodo da classe DigitalTwin que retorna o valor atual de um parâmetro (DI ou INPUT_HR).
+
+        Args:
+            - parameter (DI | INPUT_HR): O parâmetro a ser lido.
+
+        Returns:
+            bool | int: Valor do parâmetro (inclui alterações ainda não publicadas).
+        """
+        if isinstance(parameter, DI):
+            return bool(self._di[parameter])
+        return self._input_hr[parameter]
+
+    @contextmanager
+    def batch(self):
+        """
+        Metodo da classe DigitalTwin que aplica um grupo de alterações de forma atômica.
+
+        Uso:
+            with gemeo.batch():
+                gemeo.set_parameter(DI.LAMP_GREEN_DT, True)
+                gemeo.set_parameter(DI.LAMP_RED_DT, False)
+
+        Observação:
+            - A thread de publicação aguarda o fim do bloco; ao sair, a publicação é solicitada (commit_all).
+        """
+        with self._lock:
+            yield self
+        self.commit_all()
+
+    def metrics(self) -> dict:
+        """
+        Metodo da classe DigitalTwin que retorna as métricas de publicação.
+
+        Returns:
+            dict: flushes, di_written, hr_written, errors e pending (índices alterados ainda não publicados).
+        """
+        with self._lock:
+            pending = len(self._dirty_di) + len(self._dirty_hr)
+
+        return {
+            'flushes': self._flushes,
+            'di_written': self._di_written,
+            'hr_written': self._hr_written,
+            'errors': self._errors,
+            'pending': pending,
+        }
+
+    def close(self):
+        """
+        Metodo da classe DigitalTwin que publica as alterações pendentes e encerra a thread de publicação.
+        """
+        self._running = False
+        self._flush_requested.set()
+        self._thread.join(timeout=1)
+        self.flush()
+
+    @staticmethod
+    def _take_span(dirty: set, values: list):
+        # Faixa contígua [menor, maior] dos índices alterados; os índices intermediários são reescritos com o valor atual
+        if not dirty:
+            return None
+        first, last = min(dirty), max(dirty)
+        dirty.clear()
+        return first, list(values[first:last + 1])
+
+    def _flush_loop(self):
+        while self._running:
+            self._flush_requested.wait()
+            self._flush_requested.clear()
+            if not self._running:
+                return
+
+            start = time.monotonic()
+            self.flush()
+
+            # Limita a frequência de publicação; pedidos feitos nesse intervalo são agrupados
+            elapsed = time.monotonic() - start
+            if elapsed < self.flush_interval:
+                time.sleep(self.flush_interval - elapsed)
@@ -0,0 +1,82 @@
+import threading
+
+from typing import Optional
+
+from Client.Robot import RobotSession
+from Simulator.Plant import PressingStation
+
+
+ROBOT_PICK = 1.5    # Tempo até o robô retirar a peça do final da esteira
+ROBOT_CYCLE = 5.0   # Tempo até o robô sinalizar conclusão (DO5)
+DONE_OUTPUT = 5
+
+
+class FakeRobot(RobotSession):
+    '''
+    Robô UR simulado, com a mesma interface de RobotSession (saídas digitais DO0..DO7).
+
+    Métodos:
+        - step(dt): Avança o programa do robô em 'dt' segundos simulados.
+        - metrics() -> dict: Programas executados e peças retiradas da esteira.
+
+    Observação:
+        - Ligar DO0 inicia o subprograma selecionado por DO1/DO2: após ROBOT_PICK segundos a peça
+          é retirada do final da esteira e após ROBOT_CYCLE segundos DO5 é ligada (conclusão).
+        - Desligar DO0 (clear_color) aborta o programa e desliga DO5, como no programa do robô real.
+    '''
+
+    def __init__(self, pressing: PressingStation):
+        super().__init__('simulator')
+        self.pressing = pressing
+
+        self._outputs = [False] * 8
+        self._elapsed: Optional[float] = None
+        self._picked = False
+        self._state_lock = threading.Lock()
+
+        self.programs = 0
+        self.picked: list[str] = []
+
+    def connect(self) -> bool:
+        return True
+
+    def disconnect(self):
+        pass
+
+    def set_digital_out(self, output_id: int, value: bool) -> bool:
+        with self._state_lock:
+            started = output_id == 0 and value and not self._outputs[0]
+            self._outputs[output_id] = bool(value)
+
+            if started:
+                self._elapsed = 0.0
+                self._picked = False
+                self.programs += 1
+            elif output_id == 0 and not value:
+                self._elapsed = None
+                self._outputs[DONE_OUTPUT] = False
+
+        return True
+
+    def get_digital_out(self, output_id: int) -> Optional[bool]:
+        with self._state_lock:
+            return self._outputs[output_id]
+
+    def step(self, dt: float):
+        with self._state_lock:
+            if self._elapsed is None:
+                return
+            self._elapsed += dt
+
+            if not self._picked and self._elapsed >= ROBOT_PICK:
+                color = self.pressing.take_end()
+                if color is not None:
+                    self.picked.append(color)
+                self._picked = True
+
+            if self._elapsed >= ROBOT_CYCLE:
+                self._outputs[DONE_OUTPUT] = True
+
+    def metrics(self) -> dict:
+        with self._state_lock:
+            return {'programs': self.programs, 'picked': len(self.picked)}
@@ -0,0 +1,220 @@
+from collections import deque
+from typing import Iterable, Optional
+
+from Maps.Mapping import input_register_handling_plc
+from Maps.Mapping import holding_register_handling_plc
+from Maps.Mapping import input_register_pressing_plc
+from Maps.Mapping import holding_register_pressing_plc
+
+
+# Tempos dos atuadores em segundos simulados (divididos pelo fator de escala de tempo do simulador)
+ARM_TRAVEL = 2.0          # Percurso completo do braço, da posição DEIXA até HOME
+GRIPPER_TRAVEL = 0.4      # Descida/subida da garra
+MAGAZINE_STROKE = 0.5     # Curso do atuador do magazine
+CONVEYOR_TRANSIT = 4.0    # Percurso completo da esteira, do início até o sensor final
+
+# Posições normalizadas (0..1) dos sensores
+ARM_DROP_X = 0.0          # Sensor braço DEIXA (sobre o suporte do magazine)
+ARM_REJECT_X = 0.5        # Sensor braço REJEITO
+ARM_HOME_X = 1.0          # Sensor braço HOME (sobre o início da esteira)
+ARM_WINDOW = 0.03         # Meia largura da janela dos sensores do braço
+
+CONVEYOR_START_WINDOW = 0.1  # Faixa inicial da esteira vista pelo sensor MB_PART_AV
+BARRIER_X = 0.5              # Barreira e sensor indutivo
+BARRIER_WINDOW = 0.03
+
+COLORS = ('preto', 'prata', 'rosa')
+METALLIC = ('prata',)        # Cores detectadas pelo sensor indutivo
+REFLECTIVE = ('prata', 'rosa')  # Cores detectadas pelo sensor óptico da garra
+
+BUTTON_RELEASED = {'start': 0, 'stop': 1, 'reset': 0}  # STOP é normalmente fechado
+
+
+def _approach(value: float, target: float, step: float) -> float:
+    if value < target:
+        return min(target, value + step)
+    return max(target, value - step)
+
+
+class Buttons:
+    '''
+    Botões de uma estação, pressionados por um intervalo de tempo simulado.
+
+    Observação:
+        - STOP é normalmente fechado: lê 1 solto e 0 pressionado, como no painel real.
+    '''
+
+    def __init__(self):
+        self._pressed: dict[str, float] = {}
+
+    def press(self, button: str, duration: float):
+        if button not in BUTTON_RELEASED:
+            raise ValueError(f"Botão desconhecido: {button}")
+        self._pressed[button] = duration
+
+    def step(self, dt: float):
+        for button in list(self._pressed):
+            self._pressed[button] -= dt
+            if self._pressed[button] <= 0:
+                del self._pressed[button]
+
+    def value(self, button: str) -> int:
+        released = BUTTON_RELEASED[button]
+        return 1 - released if button in self._pressed else released
+
+
+class PressingStation:
+    '''
+    Modelo físico da estação de prensagem: esteira, barreira, sensor indutivo e sensor final.
+
+    Métodos:
+        - place(color): Deposita uma peça no início da esteira.
+        - take_end() -> str | None: Retira a peça parada no final da esteira (robô).
+        - step(dt, hr) -> list[int]: Avança 'dt' segundos com os Holding Registers 'hr' e retorna os Input Registers.
+    '''
+
+    INPUT_COUNT = 11
+
+    def __init__(self):
+        self.pieces: list[list] = []  # [posição 0..1, cor]
+        self.buttons = Buttons()
+
+        self.conveyor_busy = 0.0
+        self.placed = 0
+        self.taken = 0
+
+    def place(self, color: str):
+        self.pieces.append([0.0, color])
+        self.placed += 1
+
+    def take_end(self) -> Optional[str]:
+        for piece in self.pieces:
+            if piece[0] >= 1.0:
+                self.pieces.remove(piece)
+                self.taken += 1
+                return piece[1]
+        return None
+
+    def step(self, dt: float, hr: list) -> list:
+        if self.pieces:
+            self.conveyor_busy += dt
+
+        if hr[holding_register_pressing_plc.MB_LIGA_ESTEIRA]:
+            for piece in self.pieces:
+                piece[0] = min(1.0, piece[0] + dt / CONVEYOR_TRANSIT)
+
+        self.buttons.step(dt)
+
+        at_barrier = [color for x, color in self.pieces if abs(x - BARRIER_X) <= BARRIER_WINDOW]
+
+        ir = [0] * self.INPUT_COUNT
+        ir[input_register_pressing_plc.MB_START] = self.buttons.value('start')
+        ir[input_register_pressing_plc.MB_STOP] = self.buttons.value('stop')
+        ir[input_register_pressing_plc.MB_RESET] = self.buttons.value('reset')
+        ir[input_register_pressing_plc.MB_PART_AV] = int(any(x <= CONVEYOR_START_WINDOW for x, _ in self.pieces))
+        ir[input_register_pressing_plc.MB_PC_FIM] = int(any(x >= 1.0 for x, _ in self.pieces))
+        ir[input_register_pressing_plc.MB_BARREIRA_IND] = int(bool(at_barrier))
+        ir[input_register_pressing_plc.MB_SENSOR_IND] = int(any(color in METALLIC for color in at_barrier))
+        return ir
+
+
+class HandlingStation:
+    '''
+    Modelo físico da estação de manuseio: magazine, braço, garra e botões.
+
+    Métodos:
+        - load(colors): Abastece o magazine com peças.
+        - step(dt, hr) -> list[int]: Avança 'dt' segundos com os Holding Registers 'hr' e retorna os Input Registers.
+
+    Observação:
+        - O braço se move enquanto um único sentido estiver acionado (GRIPPER_TO_MAGAZINE_ESQ ou
+          GRIPPER_TO_STATION_DIR) e para nos fins de curso; os sensores DEIXA, REJEITO e HOME só
+          acendem dentro de uma janela em torno da posição.
+        - Fechar a garra embaixo, na posição DEIXA, pega a peça do suporte; abrir a garra embaixo
+          em HOME deposita a peça no início da esteira da estação de prensagem, em REJEITO descarta
+          a peça e em qualquer outra posição a peça cai (contada como perdida).
+        - O atuador do magazine empurra a peça de baixo para o suporte ao chegar no fim do curso.
+    '''
+
+    INPUT_COUNT = 13
+
+    def __init__(self, pressing: PressingStation, magazine: Optional[Iterable[str]] = None):
+        self.pressing = pressing
+        self.magazine = deque(magazine or [])
+        self.buttons = Buttons()
+
+        self.arm_x = ARM_HOME_X
+        self.gripper_z = 0.0        # 0 = em cima, 1 = embaixo
+        self.gripper_open = False
+        self.cylinder = 0.0         # 0 = recuado, 1 = avançado
+        self.pushed = False
+        self.support: Optional[str] = None
+        self.held: Optional[str] = None
+
+        self.fed = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    def load(self, colors: Iterable[str]):
+        for color in colors:
+            if color not in COLORS:
+                raise ValueError(f"Cor desconhecida: {color}")
+            self.magazine.append(color)
+
+    def step(self, dt: float, hr: list) -> list:
+        left = hr[holding_register_handling_plc.GRIPPER_TO_MAGAZINE_ESQ]
+        right = hr[holding_register_handling_plc.GRIPPER_TO_STATION_DIR]
+        if left and not right:
+            self.arm_x = max(ARM_DROP_X, self.arm_x - dt / ARM_TRAVEL)
+        elif right and not left:
+            self.arm_x = min(ARM_HOME_X, self.arm_x + dt / ARM_TRAVEL)
+
+        self.gripper_z = _approach(self.gripper_z, 1.0 if hr[holding_register_handling_plc.GRIPPER_DOWN] else 0.0, dt / GRIPPER_TRAVEL)
+        self._claw(bool(hr[holding_register_handling_plc.GRIPPER_OPEN]))
+
+        self.cylinder = _approach(self.cylinder, 1.0 if hr[holding_register_handling_plc.MAGAZINE_EJECT] else 0.0, dt / MAGAZINE_STROKE)
+        if self.cylinder >= 1.0 and not self.pushed:
+            self.pushed = True
+            if self.magazine and self.support is None:
+                self.support = self.magazine.popleft()
+                self.fed += 1
+        elif self.cylinder <= 0.0:
+            self.pushed = False
+
+        self.buttons.step(dt)
+
+        ir = [0] * self.INPUT_COUNT
+        ir[input_register_handling_plc.sensor_peca_suporte] = int(self.support is not None)
+        ir[input_register_handling_plc.sensor_braco_deixa] = int(self._at(ARM_DROP_X))
+        ir[input_register_handling_plc.sensor_braco_home] = int(self._at(ARM_HOME_X))
+        ir[input_register_handling_plc.sensor_braco_rejeito] = int(self._at(ARM_REJECT_X))
+        ir[input_register_handling_plc.sensor_garra_avancada] = int(self.gripper_z >= 1.0)
+        ir[input_register_handling_plc.sensor_garra_recuada] = int(self.gripper_z <= 0.0)
+        ir[input_register_handling_plc.sensor_peca_garra] = int(self.held in REFLECTIVE)
+        ir[input_register_handling_plc.button_start] = self.buttons.value('start')
+        ir[input_register_handling_plc.button_stop] = self.buttons.value('stop')
+        ir[input_register_handling_plc.button_reset] = self.buttons.value('reset')
+        ir[input_register_handling_plc.sensor_magazine_entrada_recuado] = int(self.cylinder <= 0.0)
+        ir[input_register_handling_plc.sensor_magazine_entrada_avancado] = int(self.cylinder >= 1.0)
+        return ir
+
+    def _at(self, position: float) -> bool:
+        return abs(self.arm_x - position) <= ARM_WINDOW
+
+    def _claw(self, open_: bool):
+        if open_ == self.gripper_open:
+            return
+        self.gripper_open = open_
+        down = self.gripper_z >= 1.0
+
+        if not open_ and down and self._at(ARM_DROP_X) and self.support is not None and self.held is None:
+            self.held, self.support = self.support, None
+
+        elif open_ and self.held is not None:
+            if down and self._at(ARM_HOME_X):
+                self.pressing.place(self.held)
+            elif down and self._at(ARM_REJECT_X):
+                self.rejected += 1
+            else:
+                self.dropped += 1
+            self.held = None
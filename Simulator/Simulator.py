@@ -0,0 +1,181 @@
+import time
+import asyncio
+import threading
+import Utils.logger as loggerManager
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from pymodbus.server import ModbusTcpServer
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusSlaveContext, ModbusServerContext
+
+from Simulator.Plant import COLORS, HandlingStation, PressingStation
+from Simulator.FakeRobot import FakeRobot
+
+
+SIMULATOR_PORTS = {
+    'MPS_HANDLING': 5020,
+    'MPS_PRESSING': 5021,
+}
+HOLDING_REGISTER_COUNT = 32
+TICK_INTERVAL = 0.005
+
+FC_HOLDING = 3
+FC_INPUT = 4
+
+
+class PlantSimulator:
+    '''
+    Simulador dos PLCs de manuseio e prensagem e do robô UR, para rodar o MES sem a planta física.
+
+    Métodos:
+        - start(): Abre os servidores Modbus TCP locais e inicia a simulação em segundo plano.
+        - stop(): Encerra os servidores e a simulação.
+        - endpoints -> dict: (host, porta) do servidor de cada PLC.
+        - load_magazine(colors): Abastece o magazine com peças.
+        - press_button(plc, button, duration): Pressiona um botão (start, stop, reset) do painel.
+        - metrics() -> dict: Peças alimentadas, depositadas na esteira, retiradas pelo robô, rejeitadas e perdidas.
+
+    Uso:
+        simulator = PlantSimulator(time_scale=2.0)
+        simulator.start()
+        client = ModbusTcpClient(*simulator.endpoints['MPS_HANDLING'])
+        mes = MES({'MPS_HANDLING': client, ...}, robot=simulator.robot)
+
+    Observação:
+        - Cada servidor expõe o mapa de Maps/Mapping.py: o MES escreve os Holding Registers e lê os
+          Input Registers, que a simulação atualiza a cada TICK_INTERVAL segundos a partir dos comandos.
+        - 'time_scale' acelera (>1) ou desacelera (<1) a planta e o robô; as pausas do próprio MES não
+          são afetadas. Com escalas muito altas o braço pode atravessar a janela do sensor REJEITO
+          entre duas varreduras do MES.
+        - Toda a simulação roda numa única thread com event loop próprio, junto com os servidores.
+    '''
+
+    def __init__(self, host: str = '127.0.0.1', ports: Optional[Dict[str, int]] = None, time_scale: float = 1.0,
+                 magazine: Optional[Iterable[str]] = None):
+        self.logger = loggerManager.LoggerManager()
+
+        self.host = host
+        self.ports = {**SIMULATOR_PORTS, **(ports or {})}
+        self.time_scale = time_scale
+
+        self.pressing = PressingStation()
+        self.handling = HandlingStation(self.pressing, magazine if magazine is not None else COLORS * 10)
+        self.robot = FakeRobot(self.pressing)
+
+        self._stations = {
+            'MPS_HANDLING': self.handling,
+            'MPS_PRESSING': self.pressing,
+        }
+        self._contexts = {
+            name: ModbusServerContext(slaves=ModbusSlaveContext(
+                hr=ModbusSequentialDataBlock(0, [0] * HOLDING_REGISTER_COUNT),
+                ir=ModbusSequentialDataBlock(0, [0] * station.INPUT_COUNT),
+                zero_mode=True,
+            ), single=True)
+            for name, station in self._stations.items()
+        }
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._servers: list[ModbusTcpServer] = []
+        self._ready = threading.Event()
+        self._stop: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoints(self) -> Dict[str, Tuple[str, int]]:
+        return {name: (self.host, self.ports[name]) for name in self._stations}
+
+    def start(self, timeout: float = 5.0):
+        '''
+        Inicia os servidores e a simulação, aguardando os servidores aceitarem conexões.
+
+        Raises:
+            - RuntimeError: Se os servidores não subirem em 'timeout' segundos.
+        '''
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), name='plant-simulator', daemon=True)
+        self._thread.start()
+
+        if not self._ready.wait(timeout):
+            raise RuntimeError("Simulador não iniciou os servidores Modbus")
+
+        print(f"Simulador da planta iniciado: {self.endpoints} (escala de tempo {self.time_scale}x)")
+
+    def stop(self):
+        '''
+        Encerra os servidores e a simulação.
+        '''
+        if self._loop and self._stop:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def load_magazine(self, colors: Iterable[str]):
+        with self._lock:
+            self.handling.load(colors)
+
+    def press_button(self, plc: str, button: str, duration: float = 0.3):
+        '''
+        Pressiona um botão do painel de uma estação.
+
+        Args:
+            - plc (str)       : Estação ('MPS_HANDLING' ou 'MPS_PRESSING').
+            - button (str)    : 'start', 'stop' ou 'reset'.
+            - duration (float): Tempo pressionado, em segundos reais.
+        '''
+        with self._lock:
+            self._stations[plc].buttons.press(button, duration * self.time_scale)
+
+    def metrics(self) -> dict:
+        '''
+        Retorna os contadores da simulação.
+
+        Returns:
+            dict: fed, delivered, completed, rejected, dropped, magazine, conveyor_busy_s e robot_programs.
+        '''
+        with self._lock:
+            return {
+                'fed': self.handling.fed,
+                'delivered': self.pressing.placed,
+                'completed': self.pressing.taken,
+                'rejected': self.handling.rejected,
+                'dropped': self.handling.dropped,
+                'magazine': len(self.handling.magazine),
+                'conveyor_busy_s': self.pressing.conveyor_busy / self.time_scale,
+                'robot_programs': self.robot.programs,
+            }
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+
+        tasks = []
+        for name, context in self._contexts.items():
+            server = ModbusTcpServer(context, address=(self.host, self.ports[name]))
+            self._servers.append(server)
+            tasks.append(asyncio.create_task(server.serve_forever()))
+
+        # Publica as entradas iniciais antes de liberar os clientes
+        self._tick(0.0)
+        await asyncio.sleep(0.1)
+        self._ready.set()
+
+        last = time.monotonic()
+        while not self._stop.is_set():
+            await asyncio.sleep(TICK_INTERVAL)
+            now = time.monotonic()
+            self._tick((now - last) * self.time_scale)
+            last = now
+
+        for server in self._servers:
+            await server.shutdown()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _tick(self, dt: float):
+        with self._lock:
+            for name, station in self._stations.items():
+                slave = self._contexts[name][0]
+                hr = slave.getValues(FC_HOLDING, 0, HOLDING_REGISTER_COUNT)
+                slave.setValues(FC_INPUT, 0, station.step(dt, hr))
+
+            self.robot.step(dt)
@@ -1,20 +1,198 @@
+import os
 import json
 import Utils.logger as loggerManager
 
 from pathlib import Path
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+
+# Arquivo carregado por padrão: 'config.json' na raiz do projeto, ou o indicado em MPS_CONFIG
+DEFAULT_CONFIG_FILE = os.environ.get('MPS_CONFIG', str(Path(__file__).resolve().parent.parent / 'config.json'))
+
+DEFAULT_PLC_TIMEOUT = 3.0
+
+# Campos aceitos em cada PLC de 'plcs' e tipo esperado
+PLC_FIELDS = {'host': str, 'port': int, 'timeout': float, 'enabled': bool}
+PLC_REQUIRED = ('host', 'port')
+
+# Seções opcionais: campo -> tipo. Os campos são os parâmetros do construtor que recebe a seção
+# (RobotSession, ConnectionPool, uvicorn, PlantSimulator e ConnectionSupervisor).
+SECTION_FIELDS = {
+    'robot':      {'host': str},
+    'database':   {'connection_string': str, 'max_size': int, 'max_idle': float, 'health_check_after': float,
+                   'acquire_timeout': float},
+    'api':        {'host': str, 'port': int},
+    'simulator':  {'host': str, 'ports': dict},
+    'supervisor': {'initial_backoff': float, 'max_backoff': float, 'failure_threshold': int},
+}
+SECTION_REQUIRED = {'robot': ('host',)}
+
+# Seções de mapas: 'timeouts' (etapa -> segundos) e 'polling' (perfil -> PLC -> segundos)
+MAP_SECTIONS = ('timeouts', 'polling')
+
+
+class ConfigurationError(ValueError):
+    '''
+    Arquivo de configuração com campos ausentes ou inválidos.
+
+    Atributos:
+        - errors (list[str]): Um item por problema encontrado (e.g., "plcs.MPS_HANDLING.port: esperado int").
+    '''
+
+    def __init__(self, config_file: Path, errors: List[str]):
+        super().__init__(f"Configuração inválida em {config_file}:\n  - " + "\n  - ".join(errors))
+        self.errors = errors
+
+
+@dataclass(frozen=True)
+class PLCConfig:
+    '''
+    Endereço de um PLC lido de 'plcs'.
+
+    Atributos:
+        - name (str)     : Nome do PLC (e.g., 'MPS_HANDLING').
+        - host (str)     : IP ou hostname.
+        - port (int)     : Porta Modbus TCP.
+        - timeout (float): Timeout das requisições do cliente Modbus, em segundos.
+        - enabled (bool) : False mantém o PLC no arquivo sem conectar.
+    '''
+    name: str
+    host: str
+    port: int
+    timeout: float = DEFAULT_PLC_TIMEOUT
+    enabled: bool = True
+
+
+def _check_type(value: Any, expected: type) -> bool:
+    if expected is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, expected)
+
+
+def _check_fields(path: str, values: Any, fields: Dict[str, type], required: tuple, errors: List[str]):
+    if not isinstance(values, dict):
+        errors.append(f"{path}: esperado objeto")
+        return
+
+    for key in required:
+        if key not in values:
+            errors.append(f"{path}.{key}: campo obrigatório")
+
+    for key, value in values.items():
+        if key not in fields:
+            errors.append(f"{path}.{key}: campo desconhecido")
+        elif not _check_type(value, fields[key]):
+            errors.append(f"{path}.{key}: esperado {fields[key].__name__}, recebido {value!r}")
+        elif fields[key] in (int, float) and value <= 0:
+            errors.append(f"{path}.{key}: deve ser positivo")
+
+
+def _check_seconds(path: str, values: Any, errors: List[str]):
+    if not isinstance(values, dict):
+        errors.append(f"{path}: esperado objeto")
+        return
+
+    for key, value in values.items():
+        if not _check_type(value, float) or value <= 0:
+            errors.append(f"{path}.{key}: esperado número positivo de segundos, recebido {value!r}")
+
+
+def validate(config: Any) -> List[str]:
+    '''
+    Valida a configuração carregada.
+
+    Args:
+        - config (dict): Conteúdo do arquivo de configuração.
+
+    Returns:
+        list[str]: Problemas encontrados (vazia se a configuração é válida).
+    '''
+    if not isinstance(config, dict):
+        return ["a raiz do arquivo deve ser um objeto"]
+
+    errors: List[str] = []
+
+    for section in config:
+        if section != 'plcs' and section not in SECTION_FIELDS and section not in MAP_SECTIONS:
+            errors.append(f"{section}: seção desconhecida")
+
+    plcs = config.get('plcs')
+    if not isinstance(plcs, dict) or not plcs:
+        errors.append("plcs: seção obrigatória com pelo menos um PLC")
+        plcs = {}
+
+    for name, plc in plcs.items():
+        _check_fields(f"plcs.{name}", plc, PLC_FIELDS, PLC_REQUIRED, errors)
+        if isinstance(plc, dict) and _check_type(plc.get('port'), int) and plc['port'] > 65535:
+            errors.append(f"plcs.{name}.port: fora do intervalo 1-65535")
+
+    for section, fields in SECTION_FIELDS.items():
+        if section in config:
+            _check_fields(section, config[section], fields, SECTION_REQUIRED.get(section, ()), errors)
+
+    ports = config.get('simulator', {}).get('ports', {}) if isinstance(config.get('simulator'), dict) else {}
+    if isinstance(ports, dict):
+        for name, port in ports.items():
+            if name not in plcs:
+                errors.append(f"simulator.ports.{name}: PLC não declarado em plcs")
+            if not _check_type(port, int) or not 0 < port <= 65535:
+                errors.append(f"simulator.ports.{name}: porta inválida {port!r}")
+
+    supervisor = config.get('supervisor')
+    if isinstance(supervisor, dict):
+        initial, maximum = supervisor.get('initial_backoff', 0), supervisor.get('max_backoff', float('inf'))
+        if _check_type(initial, float) and _check_type(maximum, float) and initial > maximum:
+            errors.append("supervisor.initial_backoff: maior que max_backoff")
+
+    if 'timeouts' in config:
+        _check_seconds('timeouts', config['timeouts'], errors)
+
+    polling = config.get('polling', {})
+    if not isinstance(polling, dict):
+        errors.append("polling: esperado objeto")
+        polling = {}
+
+    for profile, intervals in polling.items():
+        _check_seconds(f"polling.{profile}", intervals, errors)
+        for name in intervals if isinstance(intervals, dict) else ():
+            if name not in plcs:
+                errors.append(f"polling.{profile}.{name}: PLC não declarado em plcs")
+
+    return errors
+
 
 class ConfigurationManager:
+    '''
+    Gerenciador de configuração que carrega e valida a topologia da planta de um arquivo JSON:
+    PLCs, robô, banco de dados, API, simulador, supervisor de conexão, timeouts e perfis de varredura.
+
+    Métodos:
+        - load_config() -> dict: Lê e valida o arquivo (levanta ConfigurationError se inválido).
+        - plcs(include_disabled) -> dict[str, PLCConfig]: PLCs declarados em 'plcs'.
+        - section(name, default) -> dict: Cópia de uma seção, para repassar como parâmetros (e.g., **config.section('supervisor')).
+
+    Uso:
+        config = ConfigurationManager('cells/celula2.json')
+        clients = {name: ModbusTcpClient(plc.host, port=plc.port, timeout=plc.timeout) for name, plc in config.plcs().items()}
+
+    Observação:
+        - Só 'plcs' é obrigatória; uma seção ausente mantém os valores padrão do código.
+        - Campos desconhecidos são rejeitados para que um erro de digitação não passe despercebido.
+        - Instanciar de novo com outro arquivo recarrega a instância única.
+    '''
 
     _instance = None
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
-            cls._instance = super(ConfigurationManager, cls).__new__(cls, *args, **kwargs)
+            cls._instance = super(ConfigurationManager, cls).__new__(cls)
         return cls._instance
 
     """ Gerenciador de configuração que carrega parâmetros de um arquivo JSON. """
-    def __init__(self, config_file: str = "./config.json"):
+    def __init__(self, config_file: str = DEFAULT_CONFIG_FILE):
         self.logger = loggerManager.LoggerManager()
         self.logger.set_name('ConfigurationManager')
         self.config_file = Path(config_file).resolve()
@@ -27,7 +205,7 @@ class ConfigurationManager:
             raise
 
     def load_config(self) -> Dict[str, Any]:
-        
+
         try:
             if not self.config_file.exists():
                 raise FileNotFoundError(f"Arquivo de configuração não encontrado: {self.config_file}")
@@ -35,6 +213,10 @@ class ConfigurationManager:
             with open(self.config_file, 'r', encoding='utf-8') as file:
                 self.config_clps = json.load(file)
 
+            errors = validate(self.config_clps)
+            if errors:
+                raise ConfigurationError(self.config_file, errors)
+
             self.logger.logger.info(f"Configuração carregada de {self.config_clps.keys()}")
             return self.config_clps
         except json.JSONDecodeError as e:
@@ -42,5 +224,24 @@ class ConfigurationManager:
             self.logger.logger.error(f"Erro ao decodificar JSON: {e}")
             raise
 
+    def plcs(self, include_disabled: bool = False) -> Dict[str, PLCConfig]:
+        '''
+        Retorna os PLCs declarados em 'plcs'.
+
+        Args:
+            - include_disabled (bool): Inclui os PLCs com "enabled": false.
+
+        Returns:
+            dict[str, PLCConfig]: Nome do PLC -> endereço e timeout.
+        '''
+        plcs = {name: PLCConfig(name, **values) for name, values in self.config['plcs'].items()}
+        return {name: plc for name, plc in plcs.items() if include_disabled or plc.enabled}
+
+    def section(self, name: str, default: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        '''
+        Retorna uma cópia da seção 'name', ou 'default' se ela não estiver no arquivo.
+        '''
+        return dict(self.config.get(name, default or {}))
+
 """ Instância única do gerenciador de configuração. """
-config = ConfigurationManager()
\ No newline at end of file
+config = ConfigurationManager()
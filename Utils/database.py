@@ -0,0 +1,283 @@
+import time
+import pyodbc
+import threading
+import Utils.logger as loggerManager
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+
+DB_CONNECTION_STRING = (
+    'DRIVER={ODBC Driver 17 for SQL Server};'
+    'SERVER=localhost\\SQLEXPRESS;'
+    'DATABASE=db_mps;'
+    'Trusted_Connection=yes;'
+)
+
+
+# Erros que se repetem a cada tentativa com os mesmos dados (e.g., violação de constraint, valor inválido)
+PERMANENT_ERRORS = (pyodbc.IntegrityError, pyodbc.DataError, pyodbc.ProgrammingError)
+
+
+def is_permanent_error(error: Exception) -> bool:
+    '''
+    Indica se um erro de gravação não vai se resolver sozinho (reenviar os mesmos dados falharia de novo).
+
+    Args:
+        - error (Exception): Erro levantado pela gravação.
+
+    Returns:
+        bool: True para erros de dados ou de SQL; False para erros transitórios (e.g., conexão perdida).
+    '''
+    return isinstance(error, PERMANENT_ERRORS)
+
+
+class ConnectionPool:
+    '''
+    Pool limitado e thread-safe de conexões pyodbc compartilhado pelo MES e pela API.
+
+    Métodos:
+        - connection(): Context manager que empresta uma conexão e a devolve ao final.
+        - acquire() -> pyodbc.Connection: Empresta uma conexão (aguarda se o pool estiver cheio).
+        - release(conn, discard): Devolve uma conexão ao pool ou a descarta.
+        - metrics() -> dict: Métricas do pool (em uso, ociosas, criadas, tempo de espera...).
+        - configure(**options): Altera os parâmetros do pool (string de conexão, tamanho, timeouts).
+        - close_all(): Fecha todas as conexões ociosas.
+
+    Observação:
+        - Conexões ociosas há mais de 'max_idle' segundos são fechadas (eviction).
+        - Conexões ociosas há mais de 'health_check_after' segundos são validadas com 'SELECT 1'.
+        - Ao devolver uma conexão, transações não confirmadas são desfeitas (rollback).
+    '''
+
+    def __init__(self, connection_string: str = DB_CONNECTION_STRING, max_size: int = 8, max_idle: float = 300.0,
+                 health_check_after: float = 30.0, acquire_timeout: float = 10.0, connect: Callable[[str], Any] = None):
+        self.logger = loggerManager.LoggerManager()
+
+        self.connection_string = connection_string
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._connect = connect or pyodbc.connect
+
+        self._idle: deque = deque()  # (conexão, instante em que ficou ociosa)
+        self._condition = threading.Condition()
+        self._size = 0
+        self._in_use = 0
+
+        self._created = 0
+        self._closed = 0
+        self._evicted = 0
+        self._health_failures = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    @contextmanager
+    def connection(self):
+        '''
+        Empresta uma conexão do pool durante o bloco 'with'.
+
+        Uso:
+            with db_pool.connection() as conn:
+                cursor = conn.cursor()
+                ...
+                conn.commit()
+
+        Observação:
+            - Se o bloco levantar um erro de banco (pyodbc.Error), a conexão é descartada.
+        '''
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except pyodbc.Error:
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def acquire(self):
+        '''
+        Empresta uma conexão do pool.
+
+        Returns:
+            pyodbc.Connection: Conexão pronta para uso.
+
+        Raises:
+            - TimeoutError: Se nenhuma conexão ficar disponível em 'acquire_timeout' segundos.
+            - pyodbc.Error: Se não for possível abrir uma nova conexão.
+        '''
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+
+        while True:
+            with self._condition:
+                conn, check = self._reserve(deadline)
+
+            if conn is None:
+                break
+
+            # Health check fora do lock: um 'SELECT 1' lento não bloqueia as outras threads
+            if not check or self._is_healthy(conn):
+                with self._condition:
+                    self._checkout(start)
+                return conn
+
+            with self._condition:
+                self._health_failures += 1
+                self._discard(conn)
+                self._condition.notify()
+
+        # Abre a conexão fora do lock para não bloquear as outras threads
+        try:
+            conn = self._connect(self.connection_string)
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._created += 1
+            self._checkout(start)
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        '''
+        Devolve uma conexão ao pool.
+
+        Args:
+            - conn (pyodbc.Connection): Conexão emprestada por acquire().
+            - discard (bool)          : Fecha a conexão em vez de devolvê-la (e.g., conexão quebrada).
+        '''
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._condition:
+            self._in_use -= 1
+            if discard:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def metrics(self) -> Dict[str, Any]:
+        '''
+        Retorna as métricas do pool.
+
+        Returns:
+            dict: in_use, idle, size, max_size, created, closed, evicted, health_check_failures,
+                  acquired, timeouts, wait_time_avg_ms e wait_time_max_ms.
+        '''
+        with self._condition:
+            return {
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'size': self._size,
+                'max_size': self.max_size,
+                'created': self._created,
+                'closed': self._closed,
+                'evicted': self._evicted,
+                'health_check_failures': self._health_failures,
+                'acquired': self._acquired,
+                'timeouts': self._timeouts,
+                'wait_time_avg_ms': (self._wait_time_total / self._acquired * 1000) if self._acquired else 0.0,
+                'wait_time_max_ms': self._wait_time_max * 1000,
+            }
+
+    def configure(self, **options):
+        '''
+        Altera os parâmetros do pool (e.g., a seção 'database' do config.json) antes do primeiro uso.
+
+        Args:
+            - **options: connection_string, max_size, max_idle, health_check_after e acquire_timeout.
+
+        Observação:
+            - As conexões ociosas são fechadas; as próximas usam os novos parâmetros.
+        '''
+        unknown = set(options) - {'connection_string', 'max_size', 'max_idle', 'health_check_after', 'acquire_timeout'}
+        if unknown:
+            raise ValueError(f"Parâmetros desconhecidos do pool: {sorted(unknown)}")
+
+        with self._condition:
+            for name, value in options.items():
+                setattr(self, name, value)
+            self._condition.notify_all()
+
+        self.close_all()
+
+    def close_all(self):
+        '''
+        Fecha todas as conexões ociosas do pool.
+        '''
+        with self._condition:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+    def _reserve(self, deadline: float):
+        '''
+        Retira uma conexão ociosa ou reserva espaço para uma nova (chamar com o lock).
+
+        Returns:
+            tuple: (conexão, precisa de health check) ou (None, False) se o chamador deve abrir uma nova conexão.
+        '''
+        while True:
+            self._evict_idle()
+
+            if self._idle:
+                conn, idle_since = self._idle.pop()
+                return conn, time.monotonic() - idle_since > self.health_check_after
+
+            if self._size < self.max_size:
+                self._size += 1
+                return None, False
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._timeouts += 1
+                raise TimeoutError(f"Pool de conexões esgotado ({self.max_size} conexões em uso)")
+
+            self._condition.wait(remaining)
+
+    def _checkout(self, start: float):
+        waited = time.monotonic() - start
+        self._in_use += 1
+        self._acquired += 1
+        self._wait_time_total += waited
+        self._wait_time_max = max(self._wait_time_max, waited)
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        # As conexões mais antigas ficam no início da fila
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._evicted += 1
+            self._discard(conn)
+
+    def _discard(self, conn):
+        self._size -= 1
+        self._closed += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            conn.cursor().execute("SELECT 1").fetchone()
+            return True
+        except Exception as e:
+            self.logger.logger.error(f"Conexão do pool descartada no health check: {e}")
+            return False
+
+
+""" Pool único de conexões compartilhado pelo MES e pela API. """
+db_pool = ConnectionPool()
@@ -0,0 +1,104 @@
+import json
+import asyncio
+import threading
+
+from typing import Any, AsyncIterator, Dict, Tuple
+
+
+class EventBroadcaster:
+    '''
+    Difusor único de eventos do MES para os clientes conectados (Server-Sent Events).
+
+    Métodos:
+        - publish(event, data): Publica um evento para todos os assinantes (pode ser chamado de qualquer thread).
+        - subscribe() -> AsyncIterator[(event, data)]: Gerador assíncrono de eventos para um cliente.
+        - format_sse(event, data) -> str: Formata um evento no protocolo text/event-stream.
+        - metrics() -> dict: Número de assinantes, eventos publicados e eventos descartados.
+
+    Observação:
+        - O último valor de cada tipo de evento fica guardado e é enviado a cada novo assinante,
+          de modo que o cliente recebe o estado atual sem precisar de uma requisição extra.
+        - Cada assinante tem uma fila limitada; se um cliente lento enchê-la, o evento mais antigo é descartado.
+    '''
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        self._subscribers: list[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._latest: Dict[str, Any] = {}
+
+        self._published = 0
+        self._dropped = 0
+
+    def publish(self, event: str, data: Any, retain: bool = True):
+        '''
+        Publica um evento para todos os assinantes.
+
+        Args:
+            - event (str)  : Tipo do evento (e.g., 'machine-status', 'production-stats', 'piece').
+            - data (Any)   : Conteúdo serializável em JSON.
+            - retain (bool): Guarda o evento como estado atual para novos assinantes.
+        '''
+        with self._lock:
+            if retain:
+                self._latest[event] = data
+            subscribers = list(self._subscribers)
+            self._published += 1
+
+        for loop, subscriber in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, subscriber, (event, data))
+            except RuntimeError:
+                # Loop encerrado: o assinante será removido ao sair de subscribe()
+                pass
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, Any]]:
+        '''
+        Assina o fluxo de eventos.
+
+        Yields:
+            tuple[str, Any]: (tipo do evento, conteúdo), começando pelo estado atual de cada tipo.
+        '''
+        loop = asyncio.get_running_loop()
+        subscriber: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+
+        with self._lock:
+            for item in self._latest.items():
+                subscriber.put_nowait(item)
+            self._subscribers.append((loop, subscriber))
+
+        try:
+            while True:
+                yield await subscriber.get()
+        finally:
+            with self._lock:
+                self._subscribers.remove((loop, subscriber))
+
+    def metrics(self) -> Dict[str, Any]:
+        '''
+        Retorna as métricas do difusor.
+        '''
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self._published,
+                'dropped': self._dropped,
+            }
+
+    @staticmethod
+    def format_sse(event: str, data: Any) -> str:
+        '''
+        Formata um evento no protocolo text/event-stream.
+        '''
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    def _deliver(self, subscriber: asyncio.Queue, item: Tuple[str, Any]):
+        if subscriber.full():
+            subscriber.get_nowait()
+            self._dropped += 1
+        subscriber.put_nowait(item)
+
+
+""" Instância única do difusor de eventos, compartilhada pelo MES e pela API. """
+broadcaster = EventBroadcaster()
@@ -0,0 +1,408 @@
+import math
+import time
+import asyncio
+import functools
+import threading
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+
+# Limites (em segundos) dos buckets de latência das requisições Modbus no formato Prometheus
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Janela (s) da taxa efetiva de requisições por PLC
+RATE_WINDOW = 10.0
+
+# Código de função Modbus de cada método do cliente pymodbus
+FUNCTION_CODES = {
+    'read_coils': 1,
+    'read_discrete_inputs': 2,
+    'read_holding_registers': 3,
+    'read_input_registers': 4,
+    'write_coil': 5,
+    'write_register': 6,
+    'write_coils': 15,
+    'write_registers': 16,
+}
+
+
+class LatencyHistogram:
+    '''
+    Histograma de durações com buckets logarítmicos (estilo HDR): o erro relativo de qualquer
+    percentil fica limitado por 'precision', com memória proporcional ao número de buckets usados.
+
+    Métodos:
+        - record(value): Registra uma duração em segundos.
+        - merge(other): Soma as contagens de outro histograma com a mesma configuração.
+        - percentile(q) -> float: Valor (em segundos) abaixo do qual estão q% das amostras.
+    '''
+
+    def __init__(self, precision: float = 0.01, min_value: float = 1e-5):
+        self.precision = precision
+        self.min_value = min_value
+
+        self._log_base = math.log1p(precision)
+        self._buckets: Dict[int, int] = {}
+
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        '''
+        Registra uma duração.
+
+        Args:
+            - value (float): Duração em segundos.
+        '''
+        index = 0 if value <= self.min_value else int(math.log(value / self.min_value) / self._log_base) + 1
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram'):
+        '''
+        Soma as contagens de outro histograma a este.
+        '''
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        '''
+        Retorna o percentil q (0-100) em segundos (limite superior do bucket, nunca acima do máximo observado).
+        '''
+        if not self.count:
+            return 0.0
+
+        target = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= target:
+                return min(self.min_value * (1 + self.precision) ** index, self.max)
+
+        return self.max
+
+
+class RollingHistogram:
+    '''
+    Histograma das durações registradas nos últimos 'window' segundos.
+
+    Observação:
+        - A janela é dividida em 'slices' fatias; a fatia mais antiga é descartada inteira quando expira,
+          de modo que o custo de registrar é constante.
+    '''
+
+    def __init__(self, window: float = 600.0, slices: int = 10, precision: float = 0.01):
+        self.window = window
+        self.slice_duration = window / slices
+        self.precision = precision
+
+        self._slices: deque = deque()  # (início da fatia, LatencyHistogram)
+
+    def record(self, value: float, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+
+        if not self._slices or now - self._slices[-1][0] >= self.slice_duration:
+            self._slices.append((now, LatencyHistogram(self.precision)))
+        self._slices[-1][1].record(value)
+
+        self._expire(now)
+
+    def merged(self, now: Optional[float] = None) -> LatencyHistogram:
+        '''
+        Retorna um histograma com todas as amostras da janela.
+        '''
+        self._expire(time.monotonic() if now is None else now)
+
+        histogram = LatencyHistogram(self.precision)
+        for _, part in self._slices:
+            histogram.merge(part)
+        return histogram
+
+    def _expire(self, now: float):
+        while self._slices and now - self._slices[0][0] > self.window:
+            self._slices.popleft()
+
+
+class StepMetrics:
+    '''
+    Tempos de cada etapa do ciclo de produção (magazine, garra, braço, esteira, robô...).
+
+    Métodos:
+        - time(step): Context manager que mede a duração do bloco com relógio monotônico.
+        - record(step, seconds): Registra uma duração medida pelo chamador.
+        - snapshot() -> dict: count, mean, p50, p95, p99 e max (ms) de cada etapa na janela.
+
+    Uso:
+        with mes.step_metrics.time('gripper_down'):
+            ...
+    '''
+
+    def __init__(self, window: float = 600.0):
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._steps: Dict[str, RollingHistogram] = {}
+
+    @contextmanager
+    def time(self, step: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(step, time.monotonic() - start)
+
+    def record(self, step: str, seconds: float):
+        '''
+        Registra a duração de uma etapa.
+
+        Args:
+            - step (str)     : Nome da etapa (e.g., 'magazine_advance').
+            - seconds (float): Duração em segundos.
+        '''
+        with self._lock:
+            histogram = self._steps.get(step)
+            if histogram is None:
+                histogram = self._steps[step] = RollingHistogram(self.window)
+            histogram.record(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        '''
+        Retorna as estatísticas de cada etapa na janela.
+
+        Returns:
+            dict: etapa -> {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}.
+        '''
+        with self._lock:
+            merged = {step: histogram.merged() for step, histogram in self._steps.items()}
+
+        return {
+            step: {
+                'count': histogram.count,
+                'mean_ms': (histogram.total / histogram.count * 1000) if histogram.count else 0.0,
+                'p50_ms': histogram.percentile(50) * 1000,
+                'p95_ms': histogram.percentile(95) * 1000,
+                'p99_ms': histogram.percentile(99) * 1000,
+                'max_ms': histogram.max * 1000,
+            }
+            for step, histogram in sorted(merged.items())
+        }
+
+
+def timed(step: str):
+    '''
+    Decorador que mede a duração de um método em 'self.step_metrics' (funções síncronas ou corrotinas).
+
+    Uso:
+        @timed('gripper_down')
+        def gripper_down(self): ...
+    '''
+    def decorator(method):
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                with self.step_metrics.time(step):
+                    return await method(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.step_metrics.time(step):
+                return method(self, *args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def format_metric(name: str, kind: str, description: str, samples) -> list[str]:
+    '''
+    Formata uma métrica no formato de texto do Prometheus.
+
+    Args:
+        - name (str)       : Nome da métrica (e.g., 'mps_modbus_requests_total').
+        - kind (str)       : Tipo ('counter', 'gauge', 'histogram' ou 'summary').
+        - description (str): Texto do HELP.
+        - samples          : Lista de (sufixo, labels, valor); o sufixo é concatenado ao nome (e.g., '_bucket').
+
+    Returns:
+        list[str]: Linhas HELP, TYPE e uma linha por amostra.
+    '''
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+
+    for suffix, labels, value in samples:
+        label_text = ','.join(f'{key}="{value_}"' for key, value_ in labels.items())
+        lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+
+    return lines
+
+
+class ModbusMetrics:
+    '''
+    Instrumentação de transporte das requisições Modbus, por PLC e código de função.
+
+    Métodos:
+        - observe(plc, function, seconds, outcome): Registra uma requisição concluída.
+        - classify(result, error) -> str: Classifica o resultado de uma requisição.
+        - connection_state(plc, connected): Acompanha o estado da conexão e conta as reconexões.
+        - render() -> list[str]: Linhas no formato de texto do Prometheus.
+        - snapshot() -> dict: Contagem de requisições por PLC, função e resultado, e reconexões.
+        - request_rates() -> dict: Requisições por segundo de cada PLC nos últimos RATE_WINDOW segundos.
+
+    Observação:
+        - Resultados: 'ok', 'exception_response' (o PLC respondeu com código de exceção Modbus),
+          'timeout' (sem resposta), 'connection_error' (conexão recusada ou perdida) e 'error' (demais erros).
+    '''
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+
+        self._lock = threading.Lock()
+        self._latency: Dict[tuple, list] = {}   # (plc, função) -> [contagem por bucket..., soma]
+        self._requests: Dict[tuple, int] = {}   # (plc, função, resultado) -> contagem
+        self._connected: Dict[str, bool] = {}
+        self._reconnects: Dict[str, int] = {}
+        self._recent: Dict[str, deque] = {}     # plc -> instantes das requisições na janela da taxa
+
+    def observe(self, plc: str, function: str, seconds: float, outcome: str = 'ok'):
+        '''
+        Registra uma requisição concluída.
+
+        Args:
+            - plc (str)      : Nome do PLC.
+            - function (str) : Método do cliente (e.g., 'read_input_registers').
+            - seconds (float): Duração da requisição (ida e volta).
+            - outcome (str)  : Resultado (ver classify()).
+        '''
+        with self._lock:
+            latency = self._latency.get((plc, function))
+            if latency is None:
+                latency = self._latency[(plc, function)] = [0] * (len(self.buckets) + 1) + [0.0]
+
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    latency[i] += 1
+                    break
+            else:
+                latency[len(self.buckets)] += 1
+            latency[-1] += seconds
+
+            key = (plc, function, outcome)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+            now = time.monotonic()
+            recent = self._recent.setdefault(plc, deque())
+            recent.append(now)
+            while recent[0] < now - RATE_WINDOW:
+                recent.popleft()
+
+    @staticmethod
+    def classify(result: Any = None, error: Optional[BaseException] = None) -> str:
+        '''
+        Classifica o resultado de uma requisição Modbus.
+
+        Args:
+            - result (Any)                   : Resposta do cliente pymodbus (quando não houve exceção).
+            - error (BaseException | None)   : Exceção levantada pelo cliente.
+
+        Returns:
+            str: 'ok', 'exception_response', 'timeout', 'connection_error' ou 'error'.
+        '''
+        if error is not None:
+            if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+                return 'timeout'
+            if type(error).__name__ == 'ConnectionException' or isinstance(error, ConnectionError):
+                return 'connection_error'
+            return 'error'
+
+        if result is None or not result.isError():
+            return 'ok'
+
+        # ExceptionResponse traz o código de exceção do PLC; ModbusIOException indica ausência de resposta
+        if hasattr(result, 'exception_code'):
+            return 'exception_response'
+        return 'timeout'
+
+    def connection_state(self, plc: str, connected: bool):
+        '''
+        Atualiza o estado da conexão de um PLC; cada retorno ao estado conectado conta como reconexão.
+        '''
+        with self._lock:
+            previous = self._connected.get(plc)
+            self._connected[plc] = connected
+            if previous is False and connected:
+                self._reconnects[plc] = self._reconnects.get(plc, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        '''
+        Retorna as contagens de requisições.
+
+        Returns:
+            dict: requests (plc -> função -> resultado -> contagem) e reconnects (plc -> contagem).
+        '''
+        with self._lock:
+            requests: Dict[str, Dict[str, Dict[str, int]]] = {}
+            for (plc, function, outcome), count in self._requests.items():
+                requests.setdefault(plc, {}).setdefault(function, {})[outcome] = count
+            return {'requests': requests, 'reconnects': dict(self._reconnects)}
+
+    def request_rates(self, window: float = RATE_WINDOW) -> Dict[str, float]:
+        '''
+        Retorna a taxa efetiva de requisições (leituras e escritas) de cada PLC.
+
+        Args:
+            - window (float): Janela em segundos (no máximo RATE_WINDOW).
+
+        Returns:
+            dict: plc -> requisições por segundo.
+        '''
+        window = min(window, RATE_WINDOW)
+        since = time.monotonic() - window
+
+        with self._lock:
+            return {plc: sum(1 for moment in recent if moment >= since) / window for plc, recent in self._recent.items()}
+
+    def render(self) -> list[str]:
+        '''
+        Retorna as métricas no formato de texto do Prometheus.
+        '''
+        with self._lock:
+            latency = {key: list(values) for key, values in self._latency.items()}
+            requests = dict(self._requests)
+            connected = dict(self._connected)
+            reconnects = dict(self._reconnects)
+
+        histogram = []
+        for (plc, function), values in sorted(latency.items()):
+            labels = {'plc': plc, 'function': function, 'fc': FUNCTION_CODES.get(function, '')}
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values):
+                cumulative += count
+                histogram.append(('_bucket', {**labels, 'le': bound}, cumulative))
+            histogram.append(('_sum', labels, values[-1]))
+            histogram.append(('_count', labels, cumulative))
+
+        lines = format_metric('mps_modbus_request_duration_seconds', 'histogram',
+                              'Duração das requisições Modbus (ida e volta) por PLC e função.', histogram)
+        lines += format_metric('mps_modbus_requests_total', 'counter',
+                               'Requisições Modbus por PLC, função e resultado.',
+                               [('', {'plc': plc, 'function': function, 'fc': FUNCTION_CODES.get(function, ''), 'outcome': outcome}, count)
+                                for (plc, function, outcome), count in sorted(requests.items())])
+        lines += format_metric('mps_modbus_connected', 'gauge', 'Conexão Modbus ativa (1) ou não (0).',
+                               [('', {'plc': plc}, int(state)) for plc, state in sorted(connected.items())])
+        lines += format_metric('mps_modbus_reconnects_total', 'counter', 'Reconexões Modbus por PLC.',
+                               [('', {'plc': plc}, reconnects.get(plc, 0)) for plc in sorted(connected)])
+        return lines
+
+
+""" Instância única da instrumentação Modbus, compartilhada pelos dispatchers e pelo runtime asyncio. """
+modbus_metrics = ModbusMetrics()
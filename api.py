@@ -1,12 +1,19 @@
 import time
-import pyodbc
-from fastapi import FastAPI, Query, HTTPException, Depends
+import base64
+import asyncio
+from fastapi import FastAPI, Query, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional
 from jose import JWTError, jwt
 
+from Utils.database import db_pool
+from Utils.events import broadcaster
+from Utils.metrics import format_metric, modbus_metrics
+
 # ========================================
 # CONFIGURAÇÕES DE SEGURANÇA
 # ========================================
@@ -15,6 +22,9 @@ SECRET_KEY = "sua-chave-secreta-super-segura-mude-isso-em-producao-123456"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 480  # 8 horas
 
+STREAM_KEEPALIVE_SECONDS = 15  # Comentário SSE enviado para manter a conexão aberta
+PIECES_COUNT_TTL = 30          # Validade (s) do total de peças em cache para dias anteriores
+
 security = HTTPBearer()
 
 # ========================================
@@ -83,13 +93,12 @@ app.add_middleware(
 # ========================================
 
 def get_db_connection():
-    conn = pyodbc.connect(
-        'DRIVER={ODBC Driver 17 for SQL Server};'
-        'SERVER=localhost\\SQLEXPRESS;'
-        'DATABASE=db_mps;'
-        'Trusted_Connection=yes;'
-    )
-    return conn
+    """Empresta uma conexão do pool compartilhado com o MES (usar com 'with')"""
+    return db_pool.connection()
+
+mes_instance = None
+
+_pieces_count_cache = {}  # início do dia -> (total, instante da contagem)
 
 def set_mes_instance(mes):
     global mes_instance
@@ -102,19 +111,17 @@ def set_mes_instance(mes):
 @app.post("/api/login", response_model=LoginResponse)
 def login(credentials: LoginRequest):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        query = """
-        SELECT username 
-        FROM users 
-        WHERE username = ? AND password = ?
-        """
+            query = """
+            SELECT username 
+            FROM users 
+            WHERE username = ? AND password = ?
+            """
         
-        cursor.execute(query, (credentials.username, credentials.password))
-        result = cursor.fetchone()
-        
-        conn.close()
+            cursor.execute(query, (credentials.username, credentials.password))
+            result = cursor.fetchone()
         
         if result:
             # Cria o token JWT
@@ -145,27 +152,8 @@ def login(credentials: LoginRequest):
 
 @app.get("/api/machine-status")
 def get_machine_status():
-    active_order = None
-    
     if mes_instance:
-        active_order_data = mes_instance.get_active_order()
-        
-        if active_order_data:
-            remaining = active_order_data['quantity_requested'] - active_order_data['quantity_processed']
-            active_order = {
-                "order_name": active_order_data['order_name'],
-                "color_requested": active_order_data['color_requested'],
-                "quantity_requested": active_order_data['quantity_requested'],
-                "quantity_processed": active_order_data['quantity_processed'],
-                "quantity_remaining": remaining
-            }
-        
-        return {
-            "status": mes_instance.state_machine,
-            "conveyor_available": mes_instance.is_conveyor_available,
-            "active_order": active_order,
-            "timestamp": time.time()
-        }
+        return mes_instance.machine_status()
     else:
         return {
             "status": "unknown",
@@ -174,30 +162,127 @@ def get_machine_status():
             "timestamp": time.time()
         }
 
-@app.get("/api/production-stats")
-def get_production_stats():
+@app.get("/api/stream")
+async def stream_events(request: Request):
+    """
+    Fluxo de eventos (Server-Sent Events) com as mudanças do MES.
+
+    Eventos:
+        - machine-status  : estado da máquina, esteira e ordem ativa (enviado também ao conectar).
+        - production-stats: totais, produção por hora e por cor (enviado também ao conectar).
+        - piece           : peça recém-processada.
+        - orders          : a lista de ordens mudou (ordem criada, atualizada ou finalizada).
+        - wip             : peças em processo mudaram (etapa ou cor confirmada).
+    """
+    async def event_generator():
+        events = broadcaster.subscribe()
+        next_event = None
+        
+        try:
+            while not await request.is_disconnected():
+                if next_event is None:
+                    next_event = asyncio.ensure_future(events.__anext__())
+                
+                done, _ = await asyncio.wait({next_event}, timeout=STREAM_KEEPALIVE_SECONDS)
+                
+                if not done:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                event, data = next_event.result()
+                next_event = None
+                yield broadcaster.format_sse(event, data)
+        finally:
+            if next_event is not None:
+                next_event.cancel()
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def today_range():
+    """Intervalo [hoje 00:00, amanhã 00:00) para filtros em created_at que podem usar índice"""
+    return day_range(None)
+
+def day_range(day: Optional[date]):
+    """Intervalo [dia 00:00, dia seguinte 00:00) para o dia informado (padrão: hoje)"""
+    start = datetime.combine(day or datetime.now().date(), datetime.min.time())
+    return start, start + timedelta(days=1)
+
+def encode_piece_cursor(created_at: datetime, piece_id: int) -> str:
+    """Cursor opaco com a chave (created_at, id) da última peça de uma página"""
+    raw = f"{created_at.isoformat()}|{piece_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_piece_cursor(cursor: str):
+    """Decodifica o cursor de encode_piece_cursor; levanta ValueError se for inválido"""
     try:
-        conn = get_db_connection()
+        created_at, piece_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(piece_id)
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+def count_pieces(start: datetime, end: datetime) -> int:
+    """
+    Total de peças no intervalo, usado só para exibir "Página X de Y".
+    O dia atual vem do agregador do MES; os demais dias ficam em cache por PIECES_COUNT_TTL segundos.
+    """
+    if mes_instance and (start, end) == today_range():
+        return mes_instance.production_stats.snapshot()['total_pieces']
+    
+    cached = _pieces_count_cache.get(start)
+    if cached and time.monotonic() - cached[1] < PIECES_COUNT_TTL:
+        return cached[0]
+    
+    with get_db_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) AS total FROM pieces WHERE created_at >= ? AND created_at < ?", start, end)
+        total = cursor.fetchone().total
+    
+    now = time.monotonic()
+    for day in [day for day, (_, counted_at) in _pieces_count_cache.items() if now - counted_at >= PIECES_COUNT_TTL]:
+        del _pieces_count_cache[day]
+    
+    _pieces_count_cache[start] = (total, now)
+    return total
+
+@app.get("/api/production-stats")
+def get_production_stats():
+    if mes_instance:
+        stats = mes_instance.production_stats.snapshot()
         
-        query = """
-        SELECT 
-            COUNT(id) AS total_pieces,
-            SUM(CASE WHEN result = 1 THEN 1 ELSE 0 END) AS approved_pieces,
-            SUM(CASE WHEN result = 0 THEN 1 ELSE 0 END) AS rejected_pieces
-        FROM pieces
-        WHERE CAST(created_at AS DATE) = CAST(GETDATE() AS DATE)
-        """
+        return {
+            "total_pieces": stats['total_pieces'],
+            "approved_pieces": stats['approved_pieces'],
+            "rejected_pieces": stats['rejected_pieces'],
+            "by_color": stats['by_color'],
+            "timestamp": time.time()
+        }
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute(query)
-        row = cursor.fetchone()
+            query = """
+            SELECT 
+                COUNT(id) AS total_pieces,
+                SUM(CASE WHEN result = 1 THEN 1 ELSE 0 END) AS approved_pieces,
+                SUM(CASE WHEN result = 0 THEN 1 ELSE 0 END) AS rejected_pieces
+            FROM pieces
+            WHERE created_at >= ? AND created_at < ?
+            """
         
-        conn.close()
+            cursor.execute(query, *today_range())
+            row = cursor.fetchone()
         
         return {
             "total_pieces": row.total_pieces or 0,
             "approved_pieces": row.approved_pieces or 0,
             "rejected_pieces": row.rejected_pieces or 0,
+            "by_color": {},
             "timestamp": time.time()
         }
         
@@ -207,36 +292,41 @@ def get_production_stats():
             "total_pieces": 0,
             "approved_pieces": 0,
             "rejected_pieces": 0,
+            "by_color": {},
             "timestamp": time.time()
         }
 
 @app.get("/api/hourly-production")
 def get_hourly_production():
+    if mes_instance:
+        return {
+            "hourly_data": mes_instance.production_stats.snapshot()['hourly_data'],
+            "timestamp": time.time()
+        }
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = """
-        SELECT 
-            FORMAT(created_at, 'HH:00') AS hour,
-            COUNT(id) AS total,
-            SUM(CASE WHEN result = 1 THEN 1 ELSE 0 END) AS approved,
-            SUM(CASE WHEN result = 0 THEN 1 ELSE 0 END) AS rejected
-        FROM pieces
-        WHERE CAST(created_at AS DATE) = CAST(GETDATE() AS DATE)
-        GROUP BY FORMAT(created_at, 'HH:00')
-        ORDER BY FORMAT(created_at, 'HH:00')
-        """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+        
+            query = """
+            SELECT 
+                DATEPART(HOUR, created_at) AS hour,
+                COUNT(id) AS total,
+                SUM(CASE WHEN result = 1 THEN 1 ELSE 0 END) AS approved,
+                SUM(CASE WHEN result = 0 THEN 1 ELSE 0 END) AS rejected
+            FROM pieces
+            WHERE created_at >= ? AND created_at < ?
+            GROUP BY DATEPART(HOUR, created_at)
+            ORDER BY DATEPART(HOUR, created_at)
+            """
+        
+            cursor.execute(query, *today_range())
+            rows = cursor.fetchall()
         
         hourly_data = []
         for row in rows:
             hourly_data.append({
-                "hour": row.hour,
+                "hour": f"{row.hour:02d}:00",
                 "total": row.total,
                 "approved": row.approved,
                 "rejected": row.rejected
@@ -260,49 +350,56 @@ def get_hourly_production():
 def get_recent_pieces(
     page: int = Query(1, ge=1),
     page_size: int = Query(8, ge=1, le=50),
-    date_filter: str = Query(None)
+    date_filter: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor da página anterior")
 ):
+    # Paginação por chave (created_at, id): cada página custa o mesmo, independente da profundidade
+    start, end = day_range(date_filter)
+    
+    # 'page' só é ecoado de volta: sem cursor a resposta é sempre a primeira página
+    if page > 1 and not cursor:
+        raise HTTPException(status_code=400, detail="Paginação por cursor: envie o next_cursor da página anterior em vez de page")
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_piece_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            db_cursor = conn.cursor()
+        
+            query = """
+            SELECT TOP (?)
+                p.id,
+                p.piece_color,
+                p.result,
+                p.order_id,
+                p.created_at,
+                po.order_name
+            FROM pieces p
+            LEFT JOIN production_orders po ON p.order_id = po.id
+            WHERE p.created_at >= ? AND p.created_at < ?
+            """
+            params = [page_size + 1, start, end]
+            
+            if after:
+                query += """
+                AND (p.created_at < CAST(? AS DATETIME)
+                     OR (p.created_at = CAST(? AS DATETIME) AND p.id < ?))
+                """
+                params += [after[0], after[0], after[1]]
+            
+            query += "ORDER BY p.created_at DESC, p.id DESC"
         
-        offset = (page - 1) * page_size
+            db_cursor.execute(query, *params)
+            rows = db_cursor.fetchall()
         
-        date_condition = ""
-        if date_filter:
-            date_condition = f"WHERE CAST(p.created_at AS DATE) = '{date_filter}'"
-        else:
-            date_condition = "WHERE CAST(p.created_at AS DATE) = CAST(GETDATE() AS DATE)"
-        
-        count_query = f"""
-        SELECT COUNT(*) AS total
-        FROM pieces p
-        {date_condition}
-        """
-        
-        cursor.execute(count_query)
-        total_count = cursor.fetchone().total
-        
-        query = f"""
-        SELECT 
-            p.id,
-            p.piece_color,
-            p.result,
-            p.order_id,
-            p.created_at,
-            po.order_name
-        FROM pieces p
-        LEFT JOIN production_orders po ON p.order_id = po.id
-        {date_condition}
-        ORDER BY p.created_at DESC
-        OFFSET {offset} ROWS
-        FETCH NEXT {page_size} ROWS ONLY
-        """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        conn.close()
+        # Uma linha a mais indica se existe próxima página
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
         
         pieces = []
         for row in rows:
@@ -315,6 +412,9 @@ def get_recent_pieces(
                 "created_at": row.created_at.isoformat() if row.created_at else None
             })
         
+        next_cursor = encode_piece_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+        
+        total_count = count_pieces(start, end)
         total_pages = (total_count + page_size - 1) // page_size
         
         return {
@@ -323,6 +423,8 @@ def get_recent_pieces(
             "page": page,
             "page_size": page_size,
             "total_pages": total_pages,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
             "timestamp": time.time()
         }
         
@@ -336,32 +438,32 @@ def get_recent_pieces(
             "page": page,
             "page_size": page_size,
             "total_pages": 0,
+            "has_more": False,
+            "next_cursor": None,
             "timestamp": time.time()
         }
 
 @app.get("/api/recent-orders")
 def get_recent_orders():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = """
-        SELECT TOP 10
-            id,
-            order_name,
-            color_requested,
-            quantity_requested,
-            quantity_processed,
-            created_at,
-            finished_at
-        FROM production_orders
-        ORDER BY created_at DESC
-        """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+        
+            query = """
+            SELECT TOP 10
+                id,
+                order_name,
+                color_requested,
+                quantity_requested,
+                quantity_processed,
+                created_at,
+                finished_at
+            FROM production_orders
+            ORDER BY created_at DESC
+            """
+        
+            cursor.execute(query)
+            rows = cursor.fetchall()
         
         orders = []
         for row in rows:
@@ -390,21 +492,174 @@ def get_recent_orders():
         }
 
 
+@app.get("/api/db-pool")
+def get_db_pool_metrics():
+    """Métricas do pool de conexões com o banco"""
+    return {
+        **db_pool.metrics(),
+        "timestamp": time.time()
+    }
+
+
+@app.get("/api/piece-writer")
+def get_piece_writer_metrics():
+    """Métricas da fila de gravação assíncrona de peças (write-behind)"""
+    if not mes_instance:
+        return {"timestamp": time.time()}
+    
+    return {
+        **mes_instance.piece_writer.metrics(),
+        "timestamp": time.time()
+    }
+
+
+
+@app.get("/api/cycle-times")
+def get_cycle_times():
+    """Tempos de cada etapa do ciclo (magazine, garra, braço, esteira, robô) nos últimos 10 minutos: p50/p95/p99 em ms"""
+    if not mes_instance:
+        return {"steps": {}, "timestamp": time.time()}
+    
+    return {
+        "steps": mes_instance.step_metrics.snapshot(),
+        "window_seconds": mes_instance.step_metrics.window,
+        "timestamp": time.time()
+    }
+
+@app.get("/api/wip")
+def get_wip():
+    """Peças em processo (cor provisória/confirmada e etapas com horário) e as últimas concluídas"""
+    if not mes_instance:
+        return {"count": 0, "pieces": [], "recent": [], "timestamp": time.time()}
+
+    return {**mes_instance.wip.snapshot(), "timestamp": time.time()}
+
+@app.get("/api/connections")
+def get_connections():
+    """Saúde da conexão de cada PLC (connected, degraded, down), quedas, tempo fora do ar e tempo da última recuperação"""
+    if not mes_instance:
+        return {"plcs": {}, "timestamp": time.time()}
+
+    return {
+        "plcs": {name: supervisor.metrics() for name, supervisor in mes_instance.supervisors.items()},
+        "timestamp": time.time()
+    }
+
+@app.get("/api/polling")
+def get_polling():
+    """Perfil de varredura em uso e, por PLC, intervalo de varredura, esperas em andamento e requisições por segundo"""
+    if not mes_instance:
+        return {"profile": None, "plcs": {}, "timestamp": time.time()}
+
+    return {**mes_instance.polling.report(), "timestamp": time.time()}
+
+@app.get("/api/modbus-dispatch")
+def get_modbus_dispatch_metrics():
+    """Fila e tempo de espera por prioridade (safety, motion, sensor, lamp) das requisições de cada PLC"""
+    if not mes_instance:
+        return {"timestamp": time.time()}
+    
+    return {
+        "plcs": mes_instance.dispatch_metrics(),
+        "timestamp": time.time()
+    }
+
+def render_metrics() -> str:
+    """Métricas do MES no formato de texto do Prometheus"""
+    lines = modbus_metrics.render()
+    
+    pool = db_pool.metrics()
+    lines += format_metric("mps_db_pool_in_use", "gauge", "Conexões do pool em uso.", [("", {}, pool["in_use"])])
+    lines += format_metric("mps_db_pool_timeouts_total", "counter", "Esperas por conexão que expiraram.", [("", {}, pool["timeouts"])])
+    
+    if mes_instance:
+        lanes = [
+            (plc, lane, values)
+            for plc, dispatcher in mes_instance.dispatch_metrics().items()
+            for lane, values in dispatcher["lanes"].items()
+        ]
+        lines += format_metric("mps_dispatch_queue_depth", "gauge", "Requisições Modbus na fila por PLC e prioridade.",
+                               [("", {"plc": plc, "lane": lane}, values["depth"]) for plc, lane, values in lanes])
+        lines += format_metric("mps_dispatch_wait_seconds_max", "gauge", "Maior espera na fila por PLC e prioridade.",
+                               [("", {"plc": plc, "lane": lane}, values["wait_max_ms"] / 1000) for plc, lane, values in lanes])
+        
+        scanners = mes_instance.scanners.items()
+        lines += format_metric("mps_scan_total", "counter", "Varreduras de Input Registers por PLC.",
+                               [("", {"plc": plc}, scanner.scan_count) for plc, scanner in scanners])
+        lines += format_metric("mps_scan_errors_total", "counter", "Varreduras com erro por PLC.",
+                               [("", {"plc": plc}, scanner.error_count) for plc, scanner in scanners])
+        
+        steps = mes_instance.step_metrics.snapshot()
+        summary = []
+        for step, values in steps.items():
+            for quantile, percentile in (("0.5", 50), ("0.95", 95), ("0.99", 99)):
+                summary.append(("", {"step": step, "quantile": quantile}, values[f"p{percentile}_ms"] / 1000))
+            summary.append(("_sum", {"step": step}, values["mean_ms"] * values["count"] / 1000))
+            summary.append(("_count", {"step": step}, values["count"]))
+        lines += format_metric("mps_step_duration_seconds", "summary", "Duração das etapas do ciclo (últimos 10 minutos).", summary)
+        
+        writer = mes_instance.piece_writer.metrics()
+        lines += format_metric("mps_piece_writer_depth", "gauge", "Peças aguardando gravação no banco.", [("", {}, writer["depth"])])
+        lines += format_metric("mps_piece_writer_failed_total", "counter", "Tentativas de gravação de lotes com erro.", [("", {}, writer["failed"])])
+        lines += format_metric("mps_piece_writer_retrying", "gauge", "Peças do lote aguardando nova tentativa de gravação.", [("", {}, writer["retrying"])])
+        lines += format_metric("mps_piece_writer_lost_total", "counter", "Peças não gravadas no encerramento (registradas no log).", [("", {}, writer["lost"])])
+        lines += format_metric("mps_piece_writer_dead_lettered_total", "counter", "Peças descartadas por erro permanente de gravação (registradas no log).", [("", {}, writer["dead_lettered"])])
+        lines += format_metric("mps_robot_reconnects_total", "counter", "Reconexões RTDE com o robô.", [("", {}, mes_instance.robot.reconnect_count)])
+
+        polling = mes_instance.polling.report()["plcs"]
+        lines += format_metric("mps_scan_interval_seconds", "gauge", "Intervalo de varredura em uso por PLC.",
+                               [("", {"plc": name}, plc["interval_s"]) for name, plc in polling.items()])
+        lines += format_metric("mps_modbus_requests_per_second", "gauge", "Taxa efetiva de requisições Modbus por PLC (últimos 10 s).",
+                               [("", {"plc": name}, plc["requests_per_s"]) for name, plc in polling.items()])
+
+        connections = {name: supervisor.metrics() for name, supervisor in mes_instance.supervisors.items()}
+        if connections:
+            lines += format_metric("mps_plc_health", "gauge", "Saúde da conexão por PLC (1 no estado atual).",
+                                   [("", {"plc": name, "state": state}, int(plc["state"] == state))
+                                    for name, plc in connections.items() for state in ("connected", "degraded", "down")])
+            lines += format_metric("mps_plc_outages_total", "counter", "Quedas de conexão por PLC.",
+                                   [("", {"plc": name}, plc["outages"]) for name, plc in connections.items()])
+            lines += format_metric("mps_plc_downtime_seconds_total", "counter", "Tempo fora do ar por PLC.",
+                                   [("", {"plc": name}, plc["downtime_s"]) for name, plc in connections.items()])
+            lines += format_metric("mps_plc_last_recovery_seconds", "gauge", "Duração da última queda, da perda até a reconexão.",
+                                   [("", {"plc": name}, plc["last_recovery_s"]) for name, plc in connections.items() if plc["last_recovery_s"] is not None])
+
+        lamps = mes_instance.lamps.metrics()
+        lines += format_metric("mps_lamp_writes_total", "counter", "Escritas das lâmpadas do Andon (só quando alguma muda).", [("", {}, lamps["writes"])])
+
+        buttons = mes_instance.buttons.metrics()
+        lines += format_metric("mps_button_presses_total", "counter", "Pressionamentos confirmados por botão.",
+                               [("", {"button": name}, button["presses"]) for name, button in buttons.items()])
+        lines += format_metric("mps_button_bounces_total", "counter", "Oscilações descartadas pelo debounce por botão.",
+                               [("", {"button": name}, button["bounces"]) for name, button in buttons.items()])
+    
+    return "\n".join(lines) + "\n"
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Métricas no formato Prometheus: latência e erros Modbus por PLC e função, filas, varreduras e etapas do ciclo"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/create-order")
 def create_order(order: dict, username: str = Depends(verify_token)):
     """Criar ordem - REQUER AUTENTICAÇÃO"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+        
+            query = """
+            INSERT INTO production_orders (order_name, quantity_requested, quantity_processed, color_requested)
+            VALUES (?, ?, 0, ?)
+            """
+        
+            cursor.execute(query, order['orderName'], order['quantity'], order['color'])
+            conn.commit()
         
-        query = """
-        INSERT INTO production_orders (order_name, quantity_requested, quantity_processed, color_requested)
-        VALUES (?, ?, 0, ?)
-        """
+        if mes_instance:
+            mes_instance.invalidate_active_order()
         
-        cursor.execute(query, order['orderName'], order['quantity'], order['color'])
-        conn.commit()
-        conn.close()
+        broadcaster.publish('orders', {'created': order['orderName']}, retain=False)
         
         print(f"Nova ordem criada por {username}: {order}")
         return {
@@ -0,0 +1,315 @@
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import statistics
+import subprocess
+import contextlib
+
+from datetime import date, datetime
+from pathlib import Path
+from pymodbus.client import ModbusTcpClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Client.MES import MES
+from Client.Dispatcher import ModbusDispatcher
+from Server.DigitalTwin import DigitalTwin
+from Simulator.Plant import COLORS
+from Simulator.Simulator import PlantSimulator
+from Utils.events import EventBroadcaster
+from Utils.metrics import ModbusMetrics
+
+
+class BenchDatabase:
+    '''
+    Banco em memória com as mesmas operações que o MES faz no SQL Server, contando cada comando.
+
+    Métodos:
+        - active_order() -> dict | None: Ordem mais antiga ainda não finalizada.
+        - persist(events): Grava peças, incrementa e finaliza ordens (mesma lógica de _persist_piece_batch).
+        - daily_stats(day) -> list[tuple]: Contagens do dia por hora, cor e resultado.
+    '''
+
+    def __init__(self, orders: list[tuple[str, int]]):
+        self._lock = threading.Lock()
+        self.orders = [
+            {'id': i + 1, 'order_name': f'bench-{i + 1}', 'color_requested': color, 'quantity_requested': quantity,
+             'quantity_processed': 0, 'created_at': datetime.now(), 'finished_at': None}
+            for i, (color, quantity) in enumerate(orders)
+        ]
+        self.pieces: list[tuple[str, int, int, datetime]] = []
+        self.counters = {'select_active_order': 0, 'insert_piece': 0, 'update_order': 0, 'finish_order': 0,
+                         'select_daily_stats': 0, 'transactions': 0}
+
+    def active_order(self):
+        with self._lock:
+            self.counters['select_active_order'] += 1
+            for order in self.orders:
+                if order['finished_at'] is None:
+                    return {key: value for key, value in order.items() if key != 'finished_at'}
+            return None
+
+    def persist(self, events: list):
+        with self._lock:
+            self.counters['transactions'] += 1
+            touched = []
+            for event in events:
+                self.pieces.append((event.color, event.result, event.order_id, event.created_at))
+                self.counters['insert_piece'] += 1
+
+                if event.result == 1 and event.order_id is not None:
+                    self.orders[event.order_id - 1]['quantity_processed'] += 1
+                    self.counters['update_order'] += 1
+                    if event.order_id not in touched:
+                        touched.append(event.order_id)
+
+            for order_id in touched:
+                self.counters['finish_order'] += 1
+                order = self.orders[order_id - 1]
+                if order['finished_at'] is None and order['quantity_processed'] >= order['quantity_requested']:
+                    order['finished_at'] = datetime.now()
+
+    def daily_stats(self, day: date):
+        with self._lock:
+            self.counters['select_daily_stats'] += 1
+            totals = {}
+            for color, result, _, created_at in self.pieces:
+                if created_at.date() == day:
+                    key = (created_at.hour, color, result)
+                    totals[key] = totals.get(key, 0) + 1
+            return [(hour, color, result, total) for (hour, color, result), total in totals.items()]
+
+
+class BenchMES(MES):
+    ''' MES com as consultas ao SQL Server redirecionadas para o BenchDatabase. '''
+
+    def __init__(self, database: BenchDatabase, *args, **kwargs):
+        self.database = database
+        super().__init__(*args, **kwargs)
+
+    def _query_active_order(self):
+        return self.database.active_order()
+
+    def _persist_piece_batch(self, events: list):
+        self.database.persist(events)
+
+    def _query_daily_stats(self, day: date):
+        return self.database.daily_stats(day)
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    '''
+    Lê a mistura de cores no formato 'preto=1,prata=2,rosa=1'.
+    '''
+    mix = {}
+    for item in text.split(','):
+        color, _, weight = item.partition('=')
+        if color not in COLORS:
+            raise argparse.ArgumentTypeError(f"Cor desconhecida: {color}")
+        mix[color] = float(weight or 1)
+    return mix
+
+
+def build_workload(mix: dict[str, float], pieces: int, order_size: int, seed: int) -> tuple[list[str], list[tuple[str, int]]]:
+    '''
+    Gera o conteúdo do magazine e as ordens de produção a partir da mistura de cores.
+
+    Args:
+        - mix (dict)      : Peso de cada cor.
+        - pieces (int)    : Peças colocadas no magazine.
+        - order_size (int): Quantidade solicitada por ordem.
+        - seed (int)      : Semente do gerador, para execuções reproduzíveis.
+
+    Returns:
+        tuple: Cores do magazine (na ordem de alimentação) e ordens (cor, quantidade).
+    '''
+    rng = random.Random(seed)
+    colors, weights = list(mix), list(mix.values())
+
+    magazine = rng.choices(colors, weights, k=pieces)
+    orders = [(rng.choices(colors, weights)[0], order_size) for _ in range(-(-pieces // order_size))]
+    return magazine, orders
+
+
+def percentiles(samples: list[float]) -> dict:
+    '''
+    Calcula média, p50, p95 e máximo de uma lista de amostras.
+    '''
+    if not samples:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'max': None}
+
+    samples = sorted(samples)
+    return {
+        'count': len(samples),
+        'mean': statistics.mean(samples),
+        'p50': samples[int(len(samples) * 0.50)],
+        'p95': samples[max(0, int(len(samples) * 0.95) - 1)],
+        'max': samples[-1],
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip()
+    except Exception:
+        return ''
+
+
+def run(args) -> dict:
+    '''
+    Executa o MES completo (fluxos, lâmpadas e botões) contra a planta simulada e mede a produção.
+
+    Returns:
+        dict: Resultado da execução (ver README, seção Benchmarks).
+    '''
+    magazine, orders = build_workload(args.mix, args.pieces, args.order_size, args.seed)
+
+    simulator = PlantSimulator(ports={'MPS_HANDLING': args.port, 'MPS_PRESSING': args.port + 1},
+                               time_scale=args.time_scale, magazine=magazine)
+    simulator.start()
+
+    transport = ModbusMetrics()
+    clients = {
+        name: ModbusDispatcher(name, ModbusTcpClient(host, port=port, timeout=3), metrics=transport)
+        for name, (host, port) in simulator.endpoints.items()
+    }
+    for client in clients.values():
+        client.connect()
+
+    database = BenchDatabase(orders)
+    output = sys.stdout if args.verbose else io.StringIO()
+
+    with contextlib.redirect_stdout(output):
+        mes = BenchMES(database, clients, gemeo=DigitalTwin(), robot=simulator.robot, events=EventBroadcaster(), pipelined=args.pipelined)
+        mes.state_machine = 'idle'
+        mes.start_scanners()
+
+        for target in (mes.handle_lamp, mes.monitor_buttons, mes.flow_first_plc, mes.flow_second_plc):
+            threading.Thread(target=target, daemon=True).start()
+
+        time.sleep(0.5)
+        simulator.press_button('MPS_HANDLING', 'start')
+        while mes.state_machine != 'running':
+            time.sleep(0.05)
+
+        baseline = simulator.metrics()
+        start = time.monotonic()
+        completions = []
+
+        while time.monotonic() - start < args.duration:
+            plant = simulator.metrics()
+            now = time.monotonic()
+            completions += [now] * (plant['completed'] - baseline['completed'] - len(completions))
+
+            if plant['completed'] + plant['rejected'] + plant['dropped'] >= args.pieces:
+                break
+            time.sleep(0.05)
+
+        elapsed = time.monotonic() - start
+        plant = simulator.metrics()
+
+        mes.state_machine = 'stopped'
+        simulator.stop()
+        mes.close()
+
+    # Intervalo entre peças concluídas; a primeira peça (enchimento da linha) é reportada à parte
+    cycle_times = [b - a for a, b in zip(completions, completions[1:])]
+    busy = plant['conveyor_busy_s'] - baseline['conveyor_busy_s']
+    modbus = transport.snapshot()
+    requests = sum(count for functions in modbus['requests'].values() for outcomes in functions.values() for count in outcomes.values())
+
+    return {
+        'benchmark': 'throughput',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'config': {
+            'duration_s': args.duration,
+            'pieces': args.pieces,
+            'order_size': args.order_size,
+            'mix': args.mix,
+            'seed': args.seed,
+            'time_scale': args.time_scale,
+            'pipelined': args.pipelined,
+        },
+        'elapsed_s': elapsed,
+        'pieces_completed': len(completions),
+        'pieces_per_hour': len(completions) / elapsed * 3600 if elapsed else 0.0,
+        'pieces_approved': sum(1 for _, result, _, _ in database.pieces if result == 1),
+        'pieces_rejected': sum(1 for _, result, _, _ in database.pieces if result == 0),
+        'orders_finished': sum(1 for order in database.orders if order['finished_at'] is not None),
+        'first_piece_s': completions[0] - start if completions else None,
+        'cycle_time_s': percentiles(cycle_times),
+        'conveyor': {'busy_s': busy, 'idle_s': elapsed - busy, 'idle_ratio': (elapsed - busy) / elapsed if elapsed else 0.0},
+        'steps': mes.step_metrics.snapshot(),
+        'modbus': {
+            'total': requests,
+            'per_second': requests / elapsed if elapsed else 0.0,
+            'requests': modbus['requests'],
+            'dispatch': mes.dispatch_metrics(),
+        },
+        'database': database.counters,
+        'simulator': plant,
+    }
+
+
+def compare(result: dict, previous: dict):
+    '''
+    Exibe a variação das métricas principais em relação a uma execução anterior.
+    '''
+    rows = [
+        ('peças/hora', result['pieces_per_hour'], previous['pieces_per_hour']),
+        ('ciclo médio (s)', result['cycle_time_s']['mean'], previous['cycle_time_s']['mean']),
+        ('ciclo p95 (s)', result['cycle_time_s']['p95'], previous['cycle_time_s']['p95']),
+        ('esteira ociosa', result['conveyor']['idle_ratio'], previous['conveyor']['idle_ratio']),
+        ('Modbus req/s', result['modbus']['per_second'], previous['modbus']['per_second']),
+    ]
+
+    print(f"\n{'métrica':20} | {'anterior':>10} | {'atual':>10} | {'variação':>9}")
+    print('-' * 60)
+    for name, current, before in rows:
+        if current is None or before is None:
+            continue
+        delta = f"{(current - before) / before * 100:+8.1f}%" if before else f"{'-':>9}"
+        print(f"{name:20} | {before:10.2f} | {current:10.2f} | {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de produção (peças/hora) do MES contra a planta simulada.')
+    parser.add_argument('--duration', type=float, default=300, help='tempo máximo de produção, em segundos')
+    parser.add_argument('--pieces', type=int, default=30, help='peças colocadas no magazine')
+    parser.add_argument('--order-size', type=int, default=5, help='quantidade solicitada por ordem')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('preto=1,prata=1,rosa=1'), help="pesos das cores, e.g. 'preto=1,prata=2,rosa=1'")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--time-scale', type=float, default=1.0, help='fator de escala de tempo da planta simulada')
+    parser.add_argument('--pipelined', action='store_true', help='executa o MES no modo pipelined')
+    parser.add_argument('--port', type=int, default=5040, help='porta do PLC de manuseio simulado (prensagem = porta + 1)')
+    parser.add_argument('--output', default='bench_throughput.json', help='arquivo JSON com o resultado')
+    parser.add_argument('--compare', help='resultado JSON de uma execução anterior para comparação')
+    parser.add_argument('--verbose', action='store_true', help='exibe as mensagens do MES durante a execução')
+    args = parser.parse_args()
+
+    result = run(args)
+    Path(args.output).write_text(json.dumps(result, indent=2, default=str), encoding='utf-8')
+
+    cycle = result['cycle_time_s']
+    print(f"peças concluídas : {result['pieces_completed']} em {result['elapsed_s']:.1f} s "
+          f"({result['pieces_approved']} aprovadas, {result['pieces_rejected']} rejeitadas)")
+    print(f"peças/hora       : {result['pieces_per_hour']:.1f}")
+    if cycle['count']:
+        print(f"ciclo (s)        : média {cycle['mean']:.2f} | p50 {cycle['p50']:.2f} | p95 {cycle['p95']:.2f} | máx {cycle['max']:.2f}")
+    print(f"esteira ociosa   : {result['conveyor']['idle_s']:.1f} s ({result['conveyor']['idle_ratio'] * 100:.0f}%)")
+    print(f"Modbus           : {result['modbus']['total']} requisições ({result['modbus']['per_second']:.1f}/s)")
+    print(f"banco            : {result['database']}")
+    print(f"resultado gravado em {args.output}")
+
+    if args.compare:
+        compare(result, json.loads(Path(args.compare).read_text(encoding='utf-8')))
+
+
+if __name__ == '__main__':
+    main()
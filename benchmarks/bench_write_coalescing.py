@@ -0,0 +1,128 @@
+import sys
+import time
+import argparse
+import threading
+import statistics
+
+from pathlib import Path
+from pymodbus.client import ModbusTcpClient
+from pymodbus.server import StartTcpServer, ServerStop
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusSlaveContext, ModbusServerContext
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Client.WriteBatch import WriteTransaction
+from Maps.Mapping import holding_register_handling_plc
+
+
+def start_server(host: str, port: int) -> threading.Thread:
+    '''
+    Inicia um servidor Modbus TCP local (pymodbus) em uma thread separada.
+
+    Args:
+        - host (str): Endereço de escuta do servidor.
+        - port (int): Porta de escuta do servidor.
+
+    Returns:
+        threading.Thread: Thread do servidor.
+    '''
+    store = ModbusSlaveContext(
+        hr=ModbusSequentialDataBlock(0, [0] * 100),
+        ir=ModbusSequentialDataBlock(0, [0] * 100),
+    )
+    context = ModbusServerContext(slaves=store, single=True)
+
+    thread = threading.Thread(target=StartTcpServer, kwargs={'context': context, 'address': (host, port)}, daemon=True)
+    thread.start()
+    time.sleep(1)
+    return thread
+
+
+def lamps_single(client: ModbusTcpClient, values: tuple[int, int, int]):
+    ''' Atualiza as três lâmpadas com uma requisição FC06 por registrador (comportamento antigo). '''
+    client.write_register(address=holding_register_handling_plc.LAMP_GREEN, value=values[0], slave=0)
+    client.write_register(address=holding_register_handling_plc.LAMP_YELLOW, value=values[1], slave=0)
+    client.write_register(address=holding_register_handling_plc.LAMP_RED, value=values[2], slave=0)
+
+
+def lamps_coalesced(client: ModbusTcpClient, values: tuple[int, int, int]):
+    ''' Atualiza as três lâmpadas numa única requisição FC16 via WriteTransaction. '''
+    with WriteTransaction(client, 'BENCH') as transaction:
+        transaction.write(holding_register_handling_plc.LAMP_GREEN, values[0])
+        transaction.write(holding_register_handling_plc.LAMP_YELLOW, values[1])
+        transaction.write(holding_register_handling_plc.LAMP_RED, values[2])
+
+
+def stop_single(client: ModbusTcpClient):
+    ''' Zera os 20 primeiros Holding Registers com uma requisição por registrador (comportamento antigo). '''
+    for register in range(20):
+        client.write_register(address=register, value=0, slave=0)
+    client.write_register(address=0, value=0, slave=0)
+
+
+def stop_coalesced(client: ModbusTcpClient):
+    ''' Zera os 20 primeiros Holding Registers numa única requisição FC16. '''
+    with WriteTransaction(client, 'BENCH') as transaction:
+        for register in range(20):
+            transaction.write(register, 0)
+
+
+def measure(name: str, function, iterations: int) -> dict:
+    '''
+    Executa uma função repetidamente e calcula estatísticas de latência.
+
+    Args:
+        - name (str)       : Nome do cenário.
+        - function         : Função sem argumentos a ser medida.
+        - iterations (int) : Número de repetições.
+
+    Returns:
+        dict: Estatísticas do cenário (média, p95 e máximo em milissegundos).
+    '''
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        'name': name,
+        'mean_ms': statistics.mean(samples),
+        'p95_ms': samples[int(len(samples) * 0.95) - 1],
+        'max_ms': samples[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de escritas individuais vs. escritas agrupadas (FC16).')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5030)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    start_server(args.host, args.port)
+    client = ModbusTcpClient(args.host, port=args.port, timeout=3)
+    client.connect()
+
+    patterns = [(1, 0, 0), (1, 1, 0), (0, 0, 1)]
+    counter = iter(range(10 ** 9))
+
+    results = [
+        measure('lamps: 3x write_register', lambda: lamps_single(client, patterns[next(counter) % 3]), args.iterations),
+        measure('lamps: 1x write_registers', lambda: lamps_coalesced(client, patterns[next(counter) % 3]), args.iterations),
+        measure('stop: 21x write_register', lambda: stop_single(client), args.iterations),
+        measure('stop: 1x write_registers', lambda: stop_coalesced(client), args.iterations),
+    ]
+
+    print(f"{'cenário':30} | {'média (ms)':>10} | {'p95 (ms)':>10} | {'máx (ms)':>10}")
+    print('-' * 70)
+    for result in results:
+        print(f"{result['name']:30} | {result['mean_ms']:10.3f} | {result['p95_ms']:10.3f} | {result['max_ms']:10.3f}")
+
+    client.close()
+    ServerStop()
+
+
+if __name__ == '__main__':
+    main()
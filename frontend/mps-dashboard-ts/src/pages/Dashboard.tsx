@@ -59,6 +59,8 @@ interface PiecesResponse {
   page: number;
   page_size: number;
   total_pages: number;
+  has_more: boolean;
+  next_cursor: string | null;
   timestamp: number;
 }
 
@@ -70,38 +72,49 @@ const Dashboard: React.FC = () => {
   const [recentPieces, setRecentPieces] = useState<Piece[]>([]);
   const [piecesPage, setPiecesPage] = useState(1);
   const [piecesTotalPages, setPiecesTotalPages] = useState(1);
+  // Cursor de cada página já visitada (índice = página - 1); a primeira página não tem cursor
+  const [piecesCursors, setPiecesCursors] = useState<(string | null)[]>([null]);
+  const [piecesHasMore, setPiecesHasMore] = useState(false);
   const [dateFilter, setDateFilter] = useState<string>('');
+  const [piecesVersion, setPiecesVersion] = useState(0);
 
   useEffect(() => {
-    const fetchData = async () => {
+    const fetchOrders = async () => {
       try {
-        const [statusRes, statsRes, hourlyRes, ordersRes] = await Promise.all([
-          axios.get<MachineStatus>(`${API_URL}api/machine-status`),
-          axios.get<ProductionStats>(`${API_URL}api/production-stats`),
-          axios.get<{ hourly_data: HourlyDataPoint[] }>(`${API_URL}api/hourly-production`),
-          axios.get<{ orders: Order[] }>(`${API_URL}api/recent-orders`)
-        ]);
-
-        setMachineStatus(statusRes.data);
-        setProductionStats(statsRes.data);
-        setHourlyData(hourlyRes.data.hourly_data);
+        const ordersRes = await axios.get<{ orders: Order[] }>(`${API_URL}api/recent-orders`);
         setRecentOrders(ordersRes.data.orders);
       } catch (error) {
-        console.error('Erro ao buscar dados:', error);
+        console.error('Erro ao buscar ordens:', error);
       }
-    };  
+    };
+
+    fetchOrders();
+
+    // Estado da máquina e estatísticas chegam por push (SSE); as ordens são recarregadas só quando mudam
+    const events = new EventSource(`${API_URL}api/stream`);
+
+    events.addEventListener('machine-status', (event) => {
+      setMachineStatus(JSON.parse((event as MessageEvent).data));
+    });
 
-    fetchData();
-    const interval = setInterval(fetchData, 2000);
+    events.addEventListener('production-stats', (event) => {
+      const stats = JSON.parse((event as MessageEvent).data);
+      setProductionStats({ ...stats, timestamp: Date.now() / 1000 });
+      setHourlyData(stats.hourly_data);
+    });
 
-    return () => clearInterval(interval);
+    events.addEventListener('orders', fetchOrders);
+
+    events.addEventListener('piece', () => {
+      setPiecesVersion((version) => version + 1);
+    });
+
+    return () => events.close();
   }, []);
 
   useEffect(() => {
     fetchPieces();
-    const interval = setInterval(fetchPieces, 2000);
-    return () => clearInterval(interval);
-  }, [piecesPage, dateFilter]);
+  }, [piecesPage, dateFilter, piecesVersion]);
 
   const fetchPieces = async () => {
     try {
@@ -110,13 +123,24 @@ const Dashboard: React.FC = () => {
         page_size: 8
       };
 
+      const cursor = piecesCursors[piecesPage - 1];
+      if (cursor) {
+        params.cursor = cursor;
+      }
+
       if (dateFilter) {
         params.date_filter = dateFilter;
       }
 
       const response = await axios.get<PiecesResponse>(`${API_URL}api/recent-pieces`, { params });
       setRecentPieces(response.data.pieces);
-      setPiecesTotalPages(response.data.total_pages);
+      setPiecesTotalPages(Math.max(response.data.total_pages, piecesPage));
+      setPiecesHasMore(response.data.has_more);
+      setPiecesCursors((cursors) => {
+        const next = cursors.slice(0, piecesPage);
+        next[piecesPage] = response.data.next_cursor;
+        return next;
+      });
     } catch (error) {
       console.error('Erro ao buscar peças:', error);
     }
@@ -151,18 +175,20 @@ const Dashboard: React.FC = () => {
   };
 
   const handleNextPage = () => {
-    if (piecesPage < piecesTotalPages) {
+    if (piecesHasMore) {
       setPiecesPage(piecesPage + 1);
     }
   };
 
   const handleDateFilterChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     setDateFilter(e.target.value);
+    setPiecesCursors([null]);
     setPiecesPage(1);
   };
 
   const clearDateFilter = () => {
     setDateFilter('');
+    setPiecesCursors([null]);
     setPiecesPage(1);
   };
 
@@ -370,7 +396,7 @@ const Dashboard: React.FC = () => {
             </span>
             <button 
               onClick={handleNextPage} 
-              disabled={piecesPage === piecesTotalPages}
+              disabled={!piecesHasMore}
               className="pagination-btn"
             >
               Próxima
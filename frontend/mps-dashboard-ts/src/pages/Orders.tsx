@@ -38,8 +38,12 @@ const Orders: React.FC = () => {
     setIsAuthenticated(auth === 'true' && token !== null);
     
     fetchOrders();
-    const interval = setInterval(fetchOrders, 3000);
-    return () => clearInterval(interval);
+
+    // A lista é recarregada só quando o servidor avisa que as ordens mudaram
+    const events = new EventSource(`${API_URL}api/stream`);
+    events.addEventListener('orders', fetchOrders);
+    events.addEventListener('piece', fetchOrders);
+    return () => events.close();
   }, []);
 
   const fetchOrders = async () => {
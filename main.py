@@ -1,14 +1,29 @@
 import Utils.logger as loggerManager
 import uvicorn
+import argparse
+import asyncio
 import threading
 import time
-from pymodbus.client import ModbusTcpClient
+from dataclasses import replace
+from typing import Optional
+from pymodbus.client import ModbusTcpClient, AsyncModbusTcpClient
 from Server.DigitalTwin import DigitalTwin
 
-from Client.MES import MES
+from Client.MES import MES, HOST
+from Client.Robot import RobotSession
+from Client.AsyncRuntime import AsyncRuntime
+from Client.Dispatcher import ModbusDispatcher
+from Client.Supervisor import PLCUnavailableError
+from Simulator.Simulator import PlantSimulator
+from Utils.config import ConfigurationManager, PLCConfig, config
+from Utils.database import db_pool
 from api import app
 
 from api import app, set_mes_instance
+
+API_HOST = "0.0.0.0"
+API_PORT = 8000
+
 # ========================================
 # ============= LÓGICA DO MES ============
 # ========================================
@@ -44,10 +59,17 @@ def run_flow_first(mes_client: MES) -> None:
     Args:
         - mes_client (MES): Instância do cliente MES.
     '''
-    try:
-        mes_client.flow_first_plc()
-    except Exception as e:
-        print(f"Erro no flow_first_plc: {e}")
+    while True:
+        try:
+            mes_client.flow_first_plc()
+            return
+        except PLCUnavailableError as e:
+            # O fluxo recomeça quando o supervisor reconectar o PLC, sem reiniciar o processo
+            print(f"flow_first_plc interrompido: {e}")
+            mes_client.wait_connected(e.plc)
+        except Exception as e:
+            print(f"Erro no flow_first_plc: {e}")
+            return
 
 def run_flow_second(mes_client: MES) -> None:
     '''
@@ -56,15 +78,149 @@ def run_flow_second(mes_client: MES) -> None:
     Args:
         - mes_client (MES): Instância do cliente MES.
     '''
+    while True:
+        try:
+            mes_client.flow_second_plc()
+            return
+        except PLCUnavailableError as e:
+            # O fluxo recomeça quando o supervisor reconectar o PLC, sem reiniciar o processo
+            print(f"flow_second_plc interrompido: {e}")
+            mes_client.wait_connected(e.plc)
+        except Exception as e:
+            print(f"Erro no flow_second_plc: {e}")
+            return
+
+# ========================================
+# ============ RUNTIME ASYNCIO ===========
+# ========================================
+
+async def run_async_runtime(settings: ConfigurationManager, simulator: Optional[PlantSimulator] = None, pipelined: bool = False) -> None:
+    '''
+    Executa o MES no runtime asyncio: varredura, estações e API no mesmo event loop.
+
+    Args:
+        - settings (ConfigurationManager): Configuração carregada (PLCs, robô, API, supervisor, timeouts e varredura).
+        - simulator (PlantSimulator | None): Simulador da planta; se informado, os PLCs e o robô são os simulados.
+        - pipelined (bool): Alimenta a próxima peça em paralelo (ver MES).
+
+    Fluxo:
+        1. Conecta os clientes Modbus assíncronos dos PLCs.
+        2. Inicia o Digital Twin e o MES (estado, ordens, banco e robô).
+        3. Executa as tarefas do AsyncRuntime e a API (uvicorn) no mesmo loop.
+    '''
+    print("=== Iniciando conexões Modbus TCP (asyncio) ===")
+
+    modbus_clients = {
+        name: AsyncModbusTcpClient(plc.host, port = plc.port, timeout = plc.timeout)
+        for name, plc in plc_configs(settings, simulator).items()
+    }
+
     try:
-        mes_client.flow_second_plc()
+        gemeo = DigitalTwin()
+        print("Digital Twin iniciado e vinculado ao MES!")
     except Exception as e:
-        print(f"Erro no flow_second_plc: {e}")
+        print(f"Erro ao iniciar o Digital Twin: {e}")
+        gemeo = None
+
+    mes_client: MES = build_mes(settings, modbus_clients, gemeo, simulator, pipelined)
+    runtime = AsyncRuntime(mes_client, supervisor_options = settings.section('supervisor'))
+    await runtime.connect()
+
+    mes_client.state_machine = 'cycle'
+    set_mes_instance(mes_client)
+
+    print("\nIniciando tarefas do MES (asyncio)...")
+    runtime_task = asyncio.create_task(runtime.run())
+
+    api = api_options(settings)
+    print(f"\nIniciando API na porta {api['port']}...")
+    print(f"Acesse: http://localhost:{api['port']}/docs\n")
+
+    server = uvicorn.Server(uvicorn.Config(app, **api))
+
+    try:
+        await server.serve()
+    finally:
+        print("\nEncerrando aplicação...")
+        await runtime.stop()
+        await runtime_task
+        print(f"Métricas da varredura: {runtime.metrics()}")
+
+        for client in modbus_clients.values():
+            client.close()
+        mes_client.close()
 
 # ========================================
 # ================= MAIN =================
 # ========================================
 
+def parse_args() -> argparse.Namespace:
+    '''
+    Lê os argumentos de linha de comando.
+
+    Returns:
+        argparse.Namespace: config, runtime ('threads' ou 'async'), simulate, pipelined e time_scale.
+    '''
+    parser = argparse.ArgumentParser(description = "MES do MPS Festo")
+    parser.add_argument('--config', default = None,
+                        help = "arquivo de configuração da célula (padrão: config.json na raiz do projeto ou a variável MPS_CONFIG)")
+    parser.add_argument('--runtime', choices = ('threads', 'async'), default = 'threads',
+                        help = "threads: uma thread por estação (padrão); async: event loop único com clientes Modbus assíncronos")
+    parser.add_argument('--simulate', action = 'store_true',
+                        help = "conecta o MES ao simulador local da planta (PLCs e robô) em vez dos equipamentos físicos")
+    parser.add_argument('--pipelined', action = 'store_true',
+                        help = "alimenta o magazine com a próxima peça enquanto a estação de prensagem processa a atual")
+    parser.add_argument('--time-scale', type = float, default = 1.0,
+                        help = "fator de escala de tempo do simulador (e.g., 2.0 = planta duas vezes mais rápida)")
+    return parser.parse_args()
+
+def plc_configs(settings: ConfigurationManager, simulator: Optional[PlantSimulator] = None) -> dict[str, PLCConfig]:
+    '''
+    Retorna os PLCs habilitados na configuração: os equipamentos físicos ou os servidores do simulador.
+
+    Args:
+        - settings (ConfigurationManager): Configuração carregada.
+        - simulator (PlantSimulator | None): Simulador da planta já iniciado.
+
+    Returns:
+        dict[str, PLCConfig]: Nome do PLC -> endereço e timeout. Com o simulador, só os PLCs simulados,
+                              no endereço do servidor local e com o timeout configurado.
+    '''
+    plcs = settings.plcs()
+    if simulator:
+        return {
+            name: replace(plcs[name], host = host, port = port)
+            for name, (host, port) in simulator.endpoints.items()
+            if name in plcs
+        }
+
+    return plcs
+
+def api_options(settings: ConfigurationManager) -> dict:
+    ''' Host e porta da API (seção 'api' da configuração). '''
+    return {'host': API_HOST, 'port': API_PORT, **settings.section('api')}
+
+def build_mes(settings: ConfigurationManager, modbus_clients: dict, gemeo: Optional[DigitalTwin],
+              simulator: Optional[PlantSimulator] = None, pipelined: bool = False) -> MES:
+    '''
+    Cria o MES com o robô, o banco de dados, os timeouts e os perfis de varredura da configuração.
+
+    Args:
+        - settings (ConfigurationManager): Configuração carregada.
+        - modbus_clients (dict): Nome do PLC -> cliente Modbus (ModbusDispatcher ou AsyncModbusTcpClient).
+        - gemeo (DigitalTwin | None): Digital Twin vinculado ao MES.
+        - simulator (PlantSimulator | None): Com o simulador, o robô é o simulado.
+        - pipelined (bool): Alimenta a próxima peça em paralelo (ver MES).
+
+    Returns:
+        MES: Cliente MES pronto para iniciar.
+    '''
+    db_pool.configure(**settings.section('database'))
+    robot = simulator.robot if simulator else RobotSession(**settings.section('robot', {'host': HOST}))
+
+    return MES(modbus_clients, gemeo=gemeo, robot=robot, pipelined=pipelined,
+               timeouts=settings.section('timeouts'), polling_profiles=settings.section('polling'))
+
 def main() -> None:
     '''
     Entry point da aplicação de controle MPS da Festo.
@@ -75,10 +231,14 @@ def main() -> None:
 
     Fluxo:
         1. Configura o logger.
-        2. Estabelece conexões Modbus TCP com os PLCs do MPS.
+        2. Carrega a configuração e estabelece conexões Modbus TCP com os PLCs do MPS.
         3. Inicia o Digital Twin e vincula ao MES.
         4. Inicia threads para monitoramento de lâmpadas, botões e fluxos.
         5. Inicia a API FastAPI na porta 8000.
+
+    Com '--runtime async' as etapas 2 a 5 são executadas por run_async_runtime().
+    Com '--simulate' os PLCs e o robô são substituídos pelo simulador local da planta (Simulator/).
+    Endereços, timeouts e parâmetros vêm do arquivo de configuração ('--config', ver Utils/config.py).
     
     Raises:
         - KeyboardInterrupt: Permite o encerramento gracioso da aplicação via Ctrl+C.
@@ -87,33 +247,36 @@ def main() -> None:
     logger = loggerManager.LoggerManager()
     logger.set_name('MPS_Festo_Main')
 
+    args = parse_args()
+    settings = ConfigurationManager(args.config) if args.config else config
+
+    simulator = None
+    if args.simulate:
+        simulator = PlantSimulator(**settings.section('simulator'), time_scale = args.time_scale)
+        simulator.start()
+
+    if args.runtime == 'async':
+        try:
+            asyncio.run(run_async_runtime(settings, simulator, args.pipelined))
+        except KeyboardInterrupt:
+            pass
+        return
+
     try:
         print("=== Iniciando conexões Modbus TCP ===")
         
-        client_handling = ModbusTcpClient("192.168.0.31", port = 504, timeout = 3)
-        client_pressing = ModbusTcpClient("192.168.0.32", port = 502, timeout = 3)
-        client_sorting = ModbusTcpClient("192.168.0.33", port = 502, timeout = 3)
-        
-        if not client_handling.connect():
-            print("Falha ao conectar no MPS_HANDLING")
-            # return
-        print("MPS_HANDLING conectado!")
-        
-        if not client_pressing.connect():
-            print("Falha ao conectar no MPS_PRESSING")
-            # return
-        print("MPS_PRESSING conectado!")
-        
-        # if not client_sorting.connect():
-        #     print("Falha ao conectar no MPS_SORTING")
-        #     # return
-        #     print("MPS_SORTING  nao conectado!")
-        
+        # Cada PLC habilitado na configuração é atendido por um dispatcher que serializa as requisições das threads por prioridade
         modbus_clients = {
-            'MPS_HANDLING': client_handling,
-            'MPS_PRESSING': client_pressing,
-            # 'MPS_SORTING': client_sorting
+            name: ModbusDispatcher(name, ModbusTcpClient(plc.host, port = plc.port, timeout = plc.timeout))
+            for name, plc in plc_configs(settings, simulator).items()
         }
+        
+        # O supervisor de cada PLC reconecta em segundo plano (backoff exponencial) se a conexão cair ou falhar agora
+        for name, dispatcher in modbus_clients.items():
+            if dispatcher.supervise(**settings.section('supervisor')).start():
+                print(f"{name} conectado!")
+            else:
+                print(f"Falha ao conectar no {name} - reconectando em segundo plano")
 
         try:
             gemeo = DigitalTwin()
@@ -122,12 +285,14 @@ def main() -> None:
             print(f"Erro ao iniciar o Digital Twin: {e}")
             gemeo = None
         
-        mes_client: MES = MES(modbus_clients, gemeo=gemeo)
+        mes_client: MES = build_mes(settings, modbus_clients, gemeo, simulator, args.pipelined)
         mes_client.state_machine = 'cycle'
 
         set_mes_instance(mes_client)
         
         print("\nIniciando threads do MES...")
+
+        mes_client.start_scanners()
         
         lamp_thread: threading.Thread = threading.Thread(target=run_lamps, args=(mes_client,), daemon=True)
         lamp_thread.start()
@@ -146,21 +311,23 @@ def main() -> None:
         time.sleep(1)
         print("Todas as threads iniciadas!")
         
-        print("\nIniciando API na porta 8000...")
-        print("Acesse: http://localhost:8000/docs\n")
+        api = api_options(settings)
+        print(f"\nIniciando API na porta {api['port']}...")
+        print(f"Acesse: http://localhost:{api['port']}/docs\n")
+
+        uvicorn.run(app, **api)
 
-        uvicorn.run(app, host = "0.0.0.0", port = 8000)
+        print("\nEncerrando aplicação...")
+        mes_client.close()
     
     except KeyboardInterrupt:
         print("\nEncerrando aplicação...")
         
         # Fecha as conexões
-        if 'client_handling' in locals():
-            client_handling.close()
-        if 'client_pressing' in locals():
-            client_pressing.close()
-        if 'client_sorting' in locals():
-            client_sorting.close()
+        for dispatcher in locals().get('modbus_clients', {}).values():
+            dispatcher.client.close()
+        if 'mes_client' in locals():
+            mes_client.close()
             
         exit(0)
               
@@ -0,0 +1,36 @@
+import types
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('jose')
+
+import api
+
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def test_recent_pieces_rejects_page_without_cursor():
+    with pytest.raises(api.HTTPException) as error:
+        api.get_recent_pieces(page=2, page_size=8, date_filter=None, cursor=None)
+    assert error.value.status_code == 400
+
+
+def test_pieces_count_cache_expires_old_days(monkeypatch):
+    @contextmanager
+    def connection():
+        cursor = types.SimpleNamespace(execute=lambda *args: None, fetchone=lambda: types.SimpleNamespace(total=7))
+        yield types.SimpleNamespace(cursor=lambda: cursor)
+
+    now = [1000.0]
+    monkeypatch.setattr(api, 'get_db_connection', connection)
+    monkeypatch.setattr(api, 'mes_instance', None)
+    monkeypatch.setattr(api.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(api, '_pieces_count_cache', {})
+
+    api.count_pieces(datetime(2026, 1, 1), datetime(2026, 1, 2))
+    now[0] += api.PIECES_COUNT_TTL
+    api.count_pieces(datetime(2026, 1, 2), datetime(2026, 1, 3))
+
+    assert list(api._pieces_count_cache) == [datetime(2026, 1, 2)]
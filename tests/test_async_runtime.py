@@ -0,0 +1,112 @@
+import asyncio
+import types
+
+import pytest
+
+from Maps.Mapping import holding_register_pressing_plc, register_addresses
+
+
+AsyncRuntime = pytest.importorskip('Client.AsyncRuntime').AsyncRuntime
+
+
+def make_runtime(sizes):
+    '''
+    Runtime falso com um PLC por entrada de 'sizes' (quantidade de Holding Registers existentes):
+    requisições que passam do último endereço respondem com erro, como um PLC real (endereço ilegal).
+    '''
+    registers = {plc: dict.fromkeys(range(size), 1) for plc, size in sizes.items()}
+    requests = []
+
+    async def request(plc, method, address, slave=0, value=None, values=None):
+        values = [value] if values is None else values
+        requests.append((plc, method, address, len(values)))
+        error = address + len(values) > sizes[plc]
+        if not error:
+            registers[plc].update(zip(range(address, address + len(values)), values))
+        return types.SimpleNamespace(isError=lambda: error)
+
+    mes = types.SimpleNamespace(clients=dict.fromkeys(sizes), lamps=types.SimpleNamespace(invalidate=lambda: None))
+    runtime = types.SimpleNamespace(mes=mes, request=request)
+    for name in ('write_many', '_write_one'):
+        setattr(runtime, name, getattr(AsyncRuntime, name).__get__(runtime))
+    return runtime, registers, requests
+
+
+def test_stop_all_operations_writes_only_mapped_registers():
+    runtime, registers, requests = make_runtime({'MPS_PRESSING': 10})
+
+    assert asyncio.run(AsyncRuntime.stop_all_operations(runtime))
+    assert registers['MPS_PRESSING'] == dict.fromkeys(range(10), 0)
+    assert requests == [('MPS_PRESSING', 'write_registers', 0, len(register_addresses(holding_register_pressing_plc)))]
+
+
+def test_rejected_range_is_resent_register_by_register():
+    runtime, registers, requests = make_runtime({'MPS_SORTING': 4})
+
+    assert not asyncio.run(AsyncRuntime.stop_all_operations(runtime))
+    assert registers['MPS_SORTING'] == dict.fromkeys(range(4), 0)
+    assert requests[0] == ('MPS_SORTING', 'write_registers', 0, 20)
+    assert len(requests) == 21
+
+
+def test_forced_conveyor_release_times_out_instead_of_hanging():
+    # Robô não sinalizou e o sensor do fim da esteira ficou preso em 1
+    from contextlib import nullcontext
+    from Client.MES import STEP_TIMEOUTS
+
+    completed = []
+
+    class WIP(list):
+        def arrive_end(self):
+            return types.SimpleNamespace(color='preto')
+
+        def complete(self, piece):
+            completed.append(piece)
+
+    mes = types.SimpleNamespace(
+        state_machine='running', is_conveyor_available=False,
+        timeouts={**STEP_TIMEOUTS, 'robot': 0.05, 'conveyor_release': 0.05},
+        scanners={'MPS_PRESSING': types.SimpleNamespace(read=lambda address: 1)},
+        polling=types.SimpleNamespace(motion=lambda plc: nullcontext()),
+        wip=WIP(),
+        robot=types.SimpleNamespace(send_color=lambda color: None, clear_color=lambda: None, get_digital_out=lambda output: False),
+        get_active_order=lambda: {'id': 1, 'order_name': 'ordem', 'color_requested': 'preto',
+                                  'quantity_processed': 0, 'quantity_requested': 5},
+        register_piece=lambda *args: True,
+        step_metrics=types.SimpleNamespace(record=lambda *args: None),
+    )
+    runtime = types.SimpleNamespace(mes=mes, step_metrics=mes.step_metrics, logger=types.SimpleNamespace(
+        logger=types.SimpleNamespace(error=lambda message: None)))
+    for name in ('read_input', 'wait_for'):
+        setattr(runtime, name, getattr(AsyncRuntime, name).__get__(runtime))
+
+    async def dispatch():
+        runtime._tick = asyncio.Condition()
+        await asyncio.wait_for(AsyncRuntime._dispatch_to_robot(runtime), 2)
+
+    asyncio.run(dispatch())
+
+    assert mes.state_machine == 'error'
+    assert mes.is_conveyor_available is False
+    assert completed == []
+
+
+def test_state_change_publishes_without_querying_the_database():
+    # Os setters de estado rodam no event loop do runtime assíncrono: a publicação não pode ir ao banco
+    MES = pytest.importorskip('Client.MES').MES
+    from Client.OrderCache import ActiveOrderCache
+
+    loads = []
+    order = {'id': 1, 'order_name': 'ordem', 'color_requested': 'preto', 'quantity_requested': 5, 'quantity_processed': 2}
+    published = []
+    mes = types.SimpleNamespace(state_machine='running', is_conveyor_available=True, supervisors={},
+                                order_cache=ActiveOrderCache(lambda: loads.append(1) or order, reconcile_interval=0),
+                                events=types.SimpleNamespace(publish=lambda topic, data: published.append(data)))
+    mes.get_active_order = lambda: MES.get_active_order(mes)
+    mes.machine_status = lambda cached=False: MES.machine_status(mes, cached)
+
+    mes.order_cache.get()
+    MES.publish_machine_status(mes)
+
+    assert loads == [1]  # só a carga inicial, mesmo com o cache vencido
+    assert published[-1]['active_order']['quantity_remaining'] == 3
@@ -0,0 +1,80 @@
+from Client.Buttons import Button, EdgeDetector
+from Client.Scanner import RegisterSnapshot
+
+
+BUTTONS = (Button('start', 0), Button('stop', 1, active_low=True))
+
+
+def snapshot(t, start=0, stop=1):
+    return RegisterSnapshot('MPS_TEST', 0, (start, stop), t, 0)
+
+
+def make_detector(debounce=0.015):
+    detector = EdgeDetector(BUTTONS, debounce)
+    events = []
+    detector.subscribe(events.append)
+    return detector, events
+
+
+def test_first_snapshot_sets_state_without_events():
+    detector, events = make_detector()
+    detector.update(snapshot(0.0, start=1, stop=0))  # botões presos na partida
+
+    assert events == []
+    assert detector.pressed('start') is True
+    assert detector.pressed('stop') is True
+
+
+def test_press_is_confirmed_after_debounce():
+    detector, events = make_detector()
+    detector.update(snapshot(0.00))
+    detector.update(snapshot(0.02, start=1))
+    assert events == []  # leitura nova ainda não se manteve
+
+    detector.update(snapshot(0.04, start=1))
+    assert [(e.button, e.pressed, e.timestamp) for e in events] == [('start', True, 0.04)]
+    assert detector.presses['start'] == 1
+
+    detector.update(snapshot(0.06))
+    detector.update(snapshot(0.08))
+    assert [(e.button, e.pressed) for e in events][-1] == ('start', False)
+
+
+def test_single_sample_glitch_counts_as_bounce():
+    detector, events = make_detector()
+    detector.update(snapshot(0.00))
+    detector.update(snapshot(0.02, start=1))
+    detector.update(snapshot(0.04))
+
+    assert events == []
+    assert detector.bounces['start'] == 1
+    assert detector.presses['start'] == 0
+
+
+def test_active_low_button_presses_on_zero():
+    detector, events = make_detector()
+    detector.update(snapshot(0.00, stop=1))
+    detector.update(snapshot(0.02, stop=0))
+    detector.update(snapshot(0.04, stop=0))
+
+    assert [(e.button, e.pressed) for e in events] == [('stop', True)]
+
+
+def test_zero_debounce_emits_on_first_change():
+    detector, events = make_detector(debounce=0)
+    detector.update(snapshot(0.00))
+    detector.update(snapshot(0.02, start=1))
+
+    assert [(e.button, e.pressed) for e in events] == [('start', True)]
+
+
+def test_failing_listener_does_not_block_others():
+    detector, events = make_detector(debounce=0)
+    detector.unsubscribe(events.append)
+    detector.subscribe(lambda event: 1 / 0)
+    detector.subscribe(events.append)
+
+    detector.update(snapshot(0.00))
+    detector.update(snapshot(0.02, start=1))
+
+    assert len(events) == 1
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from Utils.config import ConfigurationError, ConfigurationManager, PLCConfig, DEFAULT_CONFIG_FILE, validate
+
+
+VALID = {
+    'plcs': {
+        'MPS_HANDLING': {'host': '127.0.0.1', 'port': 502},
+        'MPS_PRESSING': {'host': '127.0.0.1', 'port': 503, 'timeout': 1, 'enabled': False},
+    },
+    'supervisor': {'initial_backoff': 0.5, 'max_backoff': 10.0},
+    'polling': {'idle': {'MPS_HANDLING': 0.02}},
+}
+
+
+@pytest.fixture
+def manager_for(tmp_path):
+    ''' Carrega um arquivo temporário e restaura a instância única com o arquivo padrão no fim. '''
+    def load(config):
+        path = tmp_path / 'config.json'
+        path.write_text(json.dumps(config), encoding='utf-8')
+        return ConfigurationManager(str(path))
+
+    yield load
+    ConfigurationManager(DEFAULT_CONFIG_FILE)
+
+
+def test_shipped_config_is_valid():
+    with open(DEFAULT_CONFIG_FILE, encoding='utf-8') as file:
+        assert validate(json.load(file)) == []
+
+
+def test_valid_config_has_no_errors():
+    assert validate(VALID) == []
+
+
+@pytest.mark.parametrize('config, expected', [
+    ([], "a raiz do arquivo deve ser um objeto"),
+    ({}, "plcs: seção obrigatória com pelo menos um PLC"),
+    ({**VALID, 'robo': {}}, "robo: seção desconhecida"),
+    ({'plcs': {'A': {'host': 'x'}}}, "plcs.A.port: campo obrigatório"),
+    ({'plcs': {'A': {'host': 'x', 'port': '502'}}}, "plcs.A.port: esperado int, recebido '502'"),
+    ({'plcs': {'A': {'host': 'x', 'port': True}}}, "plcs.A.port: esperado int, recebido True"),
+    ({'plcs': {'A': {'host': 'x', 'port': 70000}}}, "plcs.A.port: fora do intervalo 1-65535"),
+    ({'plcs': {'A': {'host': 'x', 'port': 502, 'ip': 'x'}}}, "plcs.A.ip: campo desconhecido"),
+    ({**VALID, 'supervisor': {'initial_backoff': 20, 'max_backoff': 10}}, "supervisor.initial_backoff: maior que max_backoff"),
+    ({**VALID, 'simulator': {'ports': {'MPS_OTHER': 502}}}, "simulator.ports.MPS_OTHER: PLC não declarado em plcs"),
+    ({**VALID, 'timeouts': {'press': 0}}, "timeouts.press: esperado número positivo de segundos, recebido 0"),
+    ({**VALID, 'polling': {'idle': {'MPS_OTHER': 0.1}}}, "polling.idle.MPS_OTHER: PLC não declarado em plcs"),
+])
+def test_invalid_config_reports_each_problem(config, expected):
+    assert expected in validate(config)
+
+
+def test_manager_exposes_enabled_plcs_and_sections(manager_for):
+    manager = manager_for(VALID)
+
+    assert manager.plcs() == {'MPS_HANDLING': PLCConfig('MPS_HANDLING', '127.0.0.1', 502)}
+    assert manager.plcs(include_disabled=True)['MPS_PRESSING'].timeout == 1
+    assert manager.section('supervisor') == VALID['supervisor']
+    assert manager.section('robot', {'host': 'robo'}) == {'host': 'robo'}
+
+    manager.section('supervisor')['max_backoff'] = 0  # cópia: não altera a configuração carregada
+    assert manager.config['supervisor']['max_backoff'] == 10.0
+
+
+def test_manager_rejects_invalid_file(manager_for):
+    with pytest.raises(ConfigurationError) as error:
+        manager_for({'plcs': {'A': {'host': 'x'}}})
+
+    assert error.value.errors == ["plcs.A.port: campo obrigatório"]
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('pyodbc')
+
+from Utils.database import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self, healthy=True, block: threading.Event = None):
+        self.healthy = healthy
+        self.block = block
+        self.closed = False
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def execute(self, query, *args):
+                if connection.block is not None:
+                    connection.block.wait(5)
+                if not connection.healthy:
+                    raise RuntimeError("conexão quebrada")
+                return self
+
+            def fetchone(self):
+                return (1,)
+
+        return Cursor()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_connections_are_reused():
+    created = []
+    pool = ConnectionPool('dsn', max_size=2, connect=lambda dsn: created.append(FakeConnection()) or created[-1])
+
+    with pool.connection():
+        pass
+    with pool.connection():
+        pass
+
+    assert len(created) == 1
+    assert pool.metrics()['in_use'] == 0
+
+
+def test_unhealthy_idle_connection_is_replaced():
+    created = []
+    pool = ConnectionPool('dsn', max_size=1, health_check_after=0,
+                          connect=lambda dsn: created.append(FakeConnection()) or created[-1])
+
+    with pool.connection():
+        pass
+    created[0].healthy = False
+
+    with pool.connection() as conn:
+        assert conn is created[1]
+    assert created[0].closed
+
+
+def test_health_check_runs_outside_the_pool_lock():
+    block = threading.Event()
+    connections = iter([FakeConnection(block=block), FakeConnection()])
+    pool = ConnectionPool('dsn', max_size=2, health_check_after=0, connect=lambda dsn: next(connections))
+
+    slow = pool.acquire()
+    pool.release(slow)
+
+    # Thread A fica presa no health check da conexão ociosa
+    checking = threading.Thread(target=pool.acquire, daemon=True)
+    checking.start()
+    time.sleep(0.05)
+
+    # Thread B não pode esperar o health check de A para abrir a sua conexão
+    start = time.monotonic()
+    conn = pool.acquire()
+    assert time.monotonic() - start < 0.5
+    assert conn is not slow
+
+    block.set()
+    checking.join(timeout=1)
+
+
+def test_acquire_times_out_when_exhausted():
+    pool = ConnectionPool('dsn', max_size=1, acquire_timeout=0.05, connect=lambda dsn: FakeConnection())
+    pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire()
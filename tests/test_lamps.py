@@ -0,0 +1,115 @@
+import types
+import pytest
+
+from Client.Lamps import LampController, TimerWheel, LAMP_PATTERNS
+
+
+EPS = 1e-6  # A roda acumula o tick em ponto flutuante: os instantes de teste ficam logo após o vencimento
+
+
+def test_timer_wheel_fires_after_delay():
+    wheel = TimerWheel(tick=0.05, slots=8, now=0.0)
+    fired = []
+    wheel.schedule(0.2, lambda: fired.append('a'))
+
+    assert wheel.advance(0.15) == 0
+    assert wheel.advance(0.2 + EPS) == 1
+    assert fired == ['a']
+
+
+def test_timer_wheel_counts_rounds_beyond_one_turn():
+    wheel = TimerWheel(tick=0.05, slots=4, now=0.0)
+    fired = []
+    wheel.schedule(0.5, lambda: fired.append('a'))  # 10 ticks numa roda de 4 posições
+
+    wheel.advance(0.45)
+    assert fired == []
+    wheel.advance(0.5 + EPS)
+    assert fired == ['a']
+
+
+def test_timer_wheel_cancel():
+    wheel = TimerWheel(tick=0.05, slots=8, now=0.0)
+    fired = []
+    timer = wheel.schedule(0.1, lambda: fired.append('a'))
+    wheel.cancel(timer)
+
+    assert wheel.advance(1.0) == 0
+    assert fired == []
+
+
+def test_fixed_pattern_is_written_once():
+    lamps = LampController(state='stopped')
+
+    assert lamps.poll() == (0, 0, 1)
+    assert lamps.poll() is None
+    assert lamps.writes == 1
+
+
+def test_invalidate_rewrites_fixed_pattern():
+    # Após um bloco de escritas que zera as lâmpadas no PLC, o padrão fixo precisa ser reescrito
+    lamps = LampController(state='stopped')
+    lamps.poll()
+    lamps.invalidate()
+
+    assert lamps.poll() == (0, 0, 1)
+
+
+def test_blinking_pattern_changes_phase():
+    lamps = LampController(state='emergency', tick=0.05)
+    now = lamps._wheel._last
+
+    assert lamps.poll(now) == LAMP_PATTERNS['emergency'][0][0]
+    assert lamps.poll(now + 0.25) is None
+    assert lamps.poll(now + 0.5 + EPS) == LAMP_PATTERNS['emergency'][1][0]
+    assert lamps.phase_changes == 1
+
+
+def test_override_expires_back_to_state_pattern():
+    lamps = LampController(state='running', tick=0.05)
+    now = lamps._wheel._last
+    lamps.override((0, 1, 1), 0.2)
+
+    assert lamps.poll(now) == (0, 1, 1)
+    assert lamps.poll(now + 0.2 + EPS) == (1, 0, 0)
+
+
+def test_run_retries_failed_write_on_next_tick():
+    lamps = LampController(state='stopped', tick=0.01)
+    written = []
+
+    class Stop:
+        def is_set(self):
+            return len(written) >= 2
+
+    def write(green, yellow, red):
+        written.append((green, yellow, red))
+        return len(written) > 1  # a primeira escrita falha
+
+    lamps.run(write, Stop())
+    assert written == [(0, 0, 1), (0, 0, 1)]
+
+
+def test_mes_stop_all_operations_invalidates_lamps():
+    MES = pytest.importorskip('Client.MES').MES
+
+    class Transaction:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def write(self, address, value):
+            pass
+
+        def commit(self):
+            return True
+
+    lamps = LampController(state='stopped')
+    lamps.poll()
+    mes = types.SimpleNamespace(clients={'MPS_HANDLING': object()}, lamps=lamps,
+                                write_transaction=lambda plc, priority: Transaction())
+
+    assert MES.stop_all_operations(mes) is True
+    assert lamps.poll() == (0, 0, 1)
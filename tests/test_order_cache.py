@@ -0,0 +1,222 @@
+import types
+import threading
+import pytest
+
+from contextlib import contextmanager
+from datetime import datetime
+
+from Client.OrderCache import ActiveOrderCache
+
+
+class Loader:
+    def __init__(self, order):
+        self.order = order
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("banco fora do ar")
+        return dict(self.order) if self.order else None
+
+
+def test_get_serves_from_memory_until_reconcile_interval():
+    loader = Loader({'id': 1, 'quantity_processed': 0})
+    cache = ActiveOrderCache(loader, reconcile_interval=60)
+
+    cache.get()
+    cache.get()
+    assert loader.calls == 1
+    assert cache.hits == 1
+
+
+def test_reconcile_reloads_after_interval():
+    loader = Loader({'id': 1, 'quantity_processed': 0})
+    cache = ActiveOrderCache(loader, reconcile_interval=0)
+
+    cache.get()
+    loader.order['quantity_processed'] = 5
+    assert cache.get()['quantity_processed'] == 5
+
+
+def test_failed_load_keeps_last_order():
+    loader = Loader({'id': 1, 'quantity_processed': 2})
+    cache = ActiveOrderCache(loader, reconcile_interval=0)
+    cache.get()
+
+    loader.fail = True
+    assert cache.get() == {'id': 1, 'quantity_processed': 2}
+
+
+def test_update_and_finish_notify_changes():
+    changes = []
+    loader = Loader({'id': 1, 'quantity_processed': 0})
+    cache = ActiveOrderCache(loader, reconcile_interval=60, on_change=changes.append)
+
+    cache.get()
+    cache.update(1, quantity_processed=1)
+    cache.update(2, quantity_processed=9)  # outra ordem: ignorada
+    assert cache.get()['quantity_processed'] == 1
+
+    loader.order = None
+    cache.finish(1)
+    assert cache.get() is None
+    assert changes[-1] is None
+
+
+def test_finished_order_stays_closed_until_database_confirms():
+    # Gravação atrasada: o banco ainda traz a ordem sem finished_at
+    loader = Loader({'id': 1, 'quantity_processed': 5})
+    cache = ActiveOrderCache(loader, reconcile_interval=60)
+    cache.get()
+
+    cache.finish(1)
+    assert cache.get() is None
+    assert cache.get() is None
+    assert loader.calls == 3  # recarrega a cada leitura até o banco confirmar
+
+    loader.order = {'id': 2, 'quantity_processed': 0}
+    assert cache.get()['id'] == 2
+    assert cache.get()['id'] == 2
+    assert loader.calls == 4
+
+
+class FakeDatabase:
+    '''
+    Tabela production_orders com uma única ordem, com as consultas usadas pelo MES.
+    '''
+
+    def __init__(self, requested: int):
+        self.on_commit = lambda: None
+        self.on_query = lambda: None
+        self.row = types.SimpleNamespace(id=1, order_name='ordem', color_requested='preto', quantity_requested=requested,
+                                         quantity_processed=0, created_at=datetime.now())
+
+    @contextmanager
+    def connection(self):
+        database = self
+
+        class Cursor:
+            def execute(self, query, *args):
+                if 'quantity_processed = quantity_processed + 1' in query:
+                    database.row.quantity_processed += 1
+
+            def fetchone(self):
+                row = types.SimpleNamespace(**vars(database.row))
+                database.on_query()
+                return row
+
+        yield types.SimpleNamespace(cursor=Cursor, commit=lambda: database.on_commit())
+
+
+def make_mes(database):
+    MES = pytest.importorskip('Client.MES').MES
+    mes = types.SimpleNamespace(_unsaved_approvals={}, _unsaved_lock=threading.RLock(), _unsaved_version=0,
+                                _committing=0, get_db_connection=database.connection)
+    mes._count_unsaved = lambda order_id, delta: MES._count_unsaved(mes, order_id, delta)
+    return MES, mes
+
+
+def test_reload_counts_approvals_still_in_the_write_queue():
+    # Uma reconciliação com aprovações ainda não gravadas não pode fazer o progresso voltar atrás
+    database = FakeDatabase(requested=5)
+    MES, mes = make_mes(database)
+    PieceCompleted = pytest.importorskip('Client.MES').PieceCompleted
+
+    events = [PieceCompleted('preto', 1, 1, datetime.now()) for _ in range(3)]
+    for _ in events:
+        mes._count_unsaved(1, 1)
+
+    assert MES._query_active_order(mes)['quantity_processed'] == 3
+
+    MES._persist_piece_batch(mes, events[:2])
+    assert database.row.quantity_processed == 2
+    assert MES._query_active_order(mes)['quantity_processed'] == 3
+
+    MES._persist_piece_batch(mes, events[2:])
+    assert MES._query_active_order(mes)['quantity_processed'] == 3
+    assert mes._unsaved_approvals == {}
+
+
+def test_counting_a_piece_does_not_wait_for_the_database_commit():
+    # O lock dos contadores não pode ficar preso durante a transação do write-behind
+    database = FakeDatabase(requested=5)
+    MES, mes = make_mes(database)
+    PieceCompleted = pytest.importorskip('Client.MES').PieceCompleted
+    release = threading.Event()
+    database.on_commit = lambda: release.wait(2)
+
+    mes._count_unsaved(1, 1)
+    writer = threading.Thread(target=MES._persist_piece_batch, args=(mes, [PieceCompleted('preto', 1, 1, datetime.now())]))
+    writer.start()
+
+    counted = threading.Thread(target=mes._count_unsaved, args=(1, 1))
+    counted.start()
+    counted.join(0.5)
+    assert not counted.is_alive()
+
+    release.set()
+    writer.join()
+    assert mes._unsaved_approvals == {1: 1}
+
+
+def test_reload_retries_when_a_batch_commits_during_the_query():
+    # A consulta leu o banco antes do commit, mas a baixa das aprovações aconteceu logo depois
+    database = FakeDatabase(requested=5)
+    MES, mes = make_mes(database)
+    PieceCompleted = pytest.importorskip('Client.MES').PieceCompleted
+    event = PieceCompleted('preto', 1, 1, datetime.now())
+    mes._count_unsaved(1, 1)
+
+    def commit_once():
+        database.on_query = lambda: None
+        MES._persist_piece_batch(mes, [event])
+
+    database.on_query = commit_once
+
+    assert MES._query_active_order(mes)['quantity_processed'] == 1
+    assert database.row.quantity_processed == 1
+
+
+@pytest.mark.parametrize('reload', ['invalidate', 'reconcile'])
+def test_register_piece_counts_a_piece_once_when_the_cache_reloads(reload):
+    # A recarga entre contar a peça como pendente e atualizar o progresso já soma a peça
+    database = FakeDatabase(requested=5)
+    MES, mes = make_mes(database)
+    mes.order_cache = ActiveOrderCache(lambda: MES._query_active_order(mes), reconcile_interval=60)
+    mes.get_active_order = lambda: MES.get_active_order(mes)
+    mes.production_stats = types.SimpleNamespace(record=lambda *args: None, snapshot=dict)
+    mes.events = types.SimpleNamespace(publish=lambda *args, **kwargs: None)
+
+    def submit(event):
+        if reload == 'invalidate':
+            mes.order_cache.invalidate()
+            mes.order_cache.get()
+        else:
+            mes.order_cache.reconcile_interval = 0
+            mes.order_cache.get()
+            mes.order_cache.reconcile_interval = 60
+
+    mes.piece_writer = types.SimpleNamespace(submit=submit)
+
+    assert MES.register_piece(mes, 'preto', 1, order_id=1)
+    assert mes.order_cache.get()['quantity_processed'] == 1
+    assert database.row.quantity_processed == 0  # ainda na fila de gravação
+
+
+def test_dropped_approval_reopens_the_order():
+    # A última peça da ordem foi descartada pelo write-behind: o banco nunca vai finalizar a ordem
+    database = FakeDatabase(requested=1)
+    MES, mes = make_mes(database)
+    PieceCompleted = pytest.importorskip('Client.MES').PieceCompleted
+    mes.order_cache = ActiveOrderCache(lambda: MES._query_active_order(mes), reconcile_interval=60)
+
+    mes._count_unsaved(1, 1)
+    mes.order_cache.finish(1)
+    assert mes.order_cache.get() is None
+
+    MES._drop_piece(mes, PieceCompleted('preto', 1, 1, datetime.now()), RuntimeError("violação de constraint"))
+
+    assert mes._unsaved_approvals == {}
+    assert mes.order_cache.get()['quantity_processed'] == 0
@@ -0,0 +1,108 @@
+import pytest
+
+from Client.Buttons import EdgeDetector, HANDLING_BUTTONS
+from Client.Polling import PollingScheduler, POLLING_PROFILES, DEFAULT_INTERVAL
+from Client.Scanner import RegisterSnapshot
+from Maps.Mapping import input_register_handling_plc
+
+
+class FakeScanner:
+    def __init__(self):
+        self.interval = None
+
+    def set_interval(self, interval):
+        self.interval = interval
+
+
+class FakeMetrics:
+    def request_rates(self):
+        return {'MPS_HANDLING': 12.5}
+
+
+def make_scheduler(profiles=None):
+    scanners = {name: FakeScanner() for name in ('MPS_HANDLING', 'MPS_PRESSING')}
+    return PollingScheduler(scanners, profiles, FakeMetrics()), scanners
+
+
+def test_profiles_follow_state_and_order():
+    polling, scanners = make_scheduler()
+
+    assert polling.profile == 'no_order'
+    polling.set_order_active(True)
+    assert polling.profile == 'running'
+    assert scanners['MPS_PRESSING'].interval == POLLING_PROFILES['running']['MPS_PRESSING']
+
+    polling.set_state('stopped')
+    assert polling.profile == 'stopped'
+    assert scanners['MPS_PRESSING'].interval == POLLING_PROFILES['stopped']['MPS_PRESSING']
+
+    polling.set_state('emergency')  # estado sem perfil usa 'running'
+    assert polling.profile == 'running'
+
+
+def test_motion_speeds_up_only_during_the_block():
+    polling, scanners = make_scheduler()
+    polling.set_state('idle')
+    idle = scanners['MPS_PRESSING'].interval
+
+    with polling.motion('MPS_PRESSING'):
+        assert scanners['MPS_PRESSING'].interval == POLLING_PROFILES['motion']['MPS_PRESSING']
+        assert polling.report()['plcs']['MPS_PRESSING']['motions'] == 1
+
+    assert scanners['MPS_PRESSING'].interval == idle
+
+
+def test_partial_profile_overrides_only_listed_plcs():
+    polling, _ = make_scheduler({'idle': {'MPS_PRESSING': 1.0}, 'custom': {}})
+    polling.set_state('idle')
+
+    assert polling.interval('MPS_PRESSING') == 1.0
+    assert polling.interval('MPS_HANDLING') == POLLING_PROFILES['idle']['MPS_HANDLING']
+
+    polling.set_state('custom')
+    assert polling.interval('MPS_PRESSING') == DEFAULT_INTERVAL
+
+
+def test_handling_interval_is_capped_even_when_configured_slower():
+    polling, scanners = make_scheduler({'stopped': {'MPS_HANDLING': 0.5}})
+    polling.set_state('stopped')
+
+    assert scanners['MPS_HANDLING'].interval <= 0.03
+
+
+def _replay_press(interval: float, duration: float, phase: float) -> bool:
+    '''
+    Reproduz as varreduras de um toque em START de 'duration' segundos, com a primeira
+    varredura 'phase' segundos após o início do toque; retorna True se o toque foi detectado.
+    '''
+    detector = EdgeDetector(HANDLING_BUTTONS)
+    presses = []
+    detector.subscribe(lambda event: event.pressed and presses.append(event))
+
+    start = input_register_handling_plc.button_start
+    stop = input_register_handling_plc.button_stop
+    size = max(button.address for button in HANDLING_BUTTONS) + 1
+
+    t = -interval * 3 + phase
+    sequence = 0
+    while t < duration + interval * 3:
+        registers = [0] * size
+        registers[stop] = 1  # STOP é normalmente fechado
+        registers[start] = int(0 <= t < duration)
+        detector.update(RegisterSnapshot('MPS_HANDLING', 0, tuple(registers), t, sequence))
+        t += interval
+        sequence += 1
+
+    return len(presses) == 1
+
+
+@pytest.mark.parametrize('state', ['stopped', 'idle', 'no_order'])
+@pytest.mark.parametrize('duration', [0.08, 0.12, 0.15])
+def test_short_presses_are_detected_in_slow_profiles(state, duration):
+    polling, _ = make_scheduler()
+    if state != 'no_order':
+        polling.set_state(state)
+    interval = polling.interval('MPS_HANDLING')
+
+    phases = [interval * i / 10 for i in range(10)]
+    assert all(_replay_press(interval, duration, phase) for phase in phases)
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from types import SimpleNamespace
+
+from Client.Scanner import RegisterScanner, WaitResult
+
+
+class FakeClient:
+    ''' Cliente que devolve o bloco atual de 'registers' a cada leitura. '''
+
+    def __init__(self, registers):
+        self.registers = list(registers)
+        self.reads = 0
+
+    def read_input_registers(self, address, count, slave=0):
+        self.reads += 1
+        return SimpleNamespace(isError=lambda: False, registers=self.registers[address:address + count])
+
+
+def make_scanner(registers=(0, 0, 0, 0), **options):
+    client = FakeClient(registers)
+    return RegisterScanner('MPS_TEST', client, start=0, count=len(registers), **options), client
+
+
+def test_wait_for_wakes_on_published_change():
+    scanner, _ = make_scanner()
+    scanner.external = True
+    scanner.publish([0, 0, 0, 0])
+
+    threading.Timer(0.05, scanner.publish, args=([0, 0, 1, 0],)).start()
+    started = time.monotonic()
+
+    assert scanner.wait_for(2, 1, timeout=2) is WaitResult.OK
+    # Acordada pela publicação, não pelo limite de max_age
+    assert time.monotonic() - started < 0.5
+
+
+def test_wait_for_times_out_and_is_falsy():
+    scanner, _ = make_scanner()
+    scanner.external = True
+    scanner.publish([0, 0, 0, 0])
+
+    result = scanner.wait_for(1, 1, timeout=0.05)
+
+    assert result is WaitResult.TIMEOUT
+    assert not result
+
+
+def test_wait_for_cancel_is_reevaluated_on_notify():
+    scanner, _ = make_scanner()
+    scanner.external = True
+    scanner.publish([0, 0, 0, 0])
+    stop = threading.Event()
+
+    def cancel():
+        stop.set()
+        scanner.notify()
+
+    threading.Timer(0.05, cancel).start()
+
+    assert scanner.wait_for(1, 1, timeout=2, cancel=stop.is_set) is WaitResult.CANCELLED
+
+
+def test_wait_for_without_thread_scans_synchronously():
+    scanner, client = make_scanner(interval=0.01)
+    threading.Timer(0.05, client.registers.__setitem__, args=(3, 7)).start()
+
+    assert scanner.wait_for(3, 7, timeout=2) is WaitResult.OK
+    assert client.reads > 1
+
+
+def test_stale_snapshot_reads_as_missing():
+    scanner, _ = make_scanner(max_age=0.01)
+    scanner.external = True
+    scanner.publish([5, 0, 0, 0])
+    time.sleep(0.02)
+
+    assert scanner.read(0) is None
+    assert scanner.wait_for(0, 5, timeout=0.05) is WaitResult.TIMEOUT
@@ -0,0 +1,86 @@
+import pytest
+
+from Client.Supervisor import ConnectionSupervisor, HealthState, PLCUnavailableError
+
+
+def make_supervisor(connect=lambda: True, **options):
+    changes = []
+    supervisor = ConnectionSupervisor('MPS_TEST', connect, on_change=changes.append, **options)
+    return supervisor, changes
+
+
+def test_connection_error_goes_down_and_fails_fast():
+    supervisor, changes = make_supervisor()
+    supervisor.record('connection_error')
+
+    assert supervisor.state is HealthState.DOWN
+    assert changes == [HealthState.DOWN]
+    with pytest.raises(PLCUnavailableError) as error:
+        supervisor.check()
+    assert error.value.plc == 'MPS_TEST'
+
+
+@pytest.mark.parametrize('outcome', ['timeout', 'error'])
+def test_repeated_failures_degrade_then_go_down(outcome):
+    supervisor, changes = make_supervisor(failure_threshold=3)
+
+    supervisor.record(outcome)
+    assert supervisor.state is HealthState.DEGRADED
+    supervisor.record(outcome)
+    supervisor.record(outcome)
+    assert supervisor.state is HealthState.DOWN
+    assert changes == [HealthState.DEGRADED, HealthState.DOWN]
+
+
+def test_error_does_not_mark_degraded_plc_connected():
+    supervisor, _ = make_supervisor()
+    supervisor.record('timeout')
+    supervisor.record('error')
+
+    assert supervisor.state is HealthState.DEGRADED
+
+
+@pytest.mark.parametrize('outcome', ['ok', 'exception_response'])
+def test_response_resets_failures(outcome):
+    supervisor, changes = make_supervisor(failure_threshold=2)
+    supervisor.record('timeout')
+    supervisor.record(outcome)
+    supervisor.record('timeout')
+
+    assert supervisor.state is HealthState.DEGRADED
+    assert changes == [HealthState.DEGRADED, HealthState.CONNECTED, HealthState.DEGRADED]
+
+
+def test_reconnects_with_exponential_backoff():
+    attempts = []
+    results = iter([True, False, False, False, True])  # conexão inicial, 3 falhas, sucesso
+
+    supervisor, changes = make_supervisor(lambda: attempts.append(1) or next(results),
+                                          initial_backoff=0.01, max_backoff=0.02)
+    waits = []
+    wait = supervisor._stopped.wait
+    supervisor._stopped.wait = lambda timeout: waits.append(timeout) or wait(timeout)
+
+    assert supervisor.start()
+    supervisor.mark_down("teste")
+
+    assert supervisor.wait_connected(timeout=2)
+    supervisor.stop()  # aguarda a thread: a notificação da reconexão sai depois de wait_connected acordar
+
+    assert waits == [0.01, 0.02, 0.02, 0.02]
+    assert supervisor.state is HealthState.CONNECTED
+    assert changes[-1] is HealthState.CONNECTED
+
+    metrics = supervisor.metrics()
+    assert metrics['outages'] == 1
+    assert metrics['reconnect_attempts'] == 4
+    assert metrics['last_recovery_s'] > 0
+
+
+def test_initial_connection_failure_starts_down():
+    supervisor, _ = make_supervisor(lambda: False, initial_backoff=10)
+
+    assert not supervisor.start()
+    assert not supervisor.available
+    assert not supervisor.wait_connected(timeout=0.01)
+    supervisor.stop()
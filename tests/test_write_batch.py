@@ -0,0 +1,142 @@
+import pytest
+
+from types import SimpleNamespace
+
+from Client.WriteBatch import WriteTransaction, coalesce_writes
+from Maps.Mapping import holding_register_pressing_plc, register_addresses
+
+
+class FakeClient:
+    '''
+    Cliente que registra as requisições de escrita. Uma requisição que toca um endereço em 'failing'
+    ou a partir de 'size' (inexistente no PLC) responde com erro, como um PLC real (endereço ilegal).
+    '''
+
+    def __init__(self, failing=(), size=None):
+        self.requests = []
+        self.failing = set(failing)
+        self.size = size
+        self.registers = {}
+
+    def _result(self, address, values):
+        addresses = range(address, address + len(values))
+        error = any(a in self.failing or (self.size is not None and a >= self.size) for a in addresses)
+        if not error:
+            self.registers.update(zip(addresses, values))
+        return SimpleNamespace(isError=lambda: error)
+
+    def write_register(self, address, value, slave=0):
+        self.requests.append(('FC06', address, [value]))
+        return self._result(address, [value])
+
+    def write_registers(self, address, values, slave=0):
+        self.requests.append(('FC16', address, list(values)))
+        return self._result(address, list(values))
+
+
+def test_coalesce_groups_contiguous_addresses():
+    assert coalesce_writes({17: 1, 8: 1, 10: 0, 9: 0}) == [(8, [1, 0, 0]), (17, [1])]
+    assert coalesce_writes({}) == []
+
+
+def test_transaction_sends_one_request_per_run():
+    client = FakeClient()
+
+    with WriteTransaction(client, 'MPS_TEST') as tx:
+        tx.write(8, 1)
+        tx.write(9, 0)
+        tx.write(10, 0)
+        tx.write(17, 1)
+
+    assert client.requests == [('FC16', 8, [1, 0, 0]), ('FC06', 17, [1])]
+
+
+def test_last_write_to_an_address_wins():
+    client = FakeClient()
+    tx = WriteTransaction(client)
+    tx.write(5, 1)
+    tx.write(5, 0)
+
+    assert tx.commit()
+    assert client.requests == [('FC06', 5, [0])]
+    assert tx.writes == {}
+
+
+def test_rejected_run_is_resent_register_by_register():
+    client = FakeClient(failing={8})
+    tx = WriteTransaction(client, 'MPS_TEST')
+    tx.write(8, 1)
+    tx.write(9, 1)
+    tx.write(20, 1)
+
+    assert not tx.commit()
+    assert [request[:2] for request in client.requests] == [('FC16', 8), ('FC06', 8), ('FC06', 9), ('FC06', 20)]
+    assert client.registers == {9: 1, 20: 1}
+
+
+def test_with_block_keeps_the_commit_result():
+    with WriteTransaction(FakeClient(failing={3})) as tx:
+        tx.write(3, 1)
+
+    assert tx.committed is False
+
+
+def test_exception_in_block_discards_the_writes():
+    client = FakeClient()
+
+    try:
+        with WriteTransaction(client) as tx:
+            tx.write(1, 1)
+            raise RuntimeError('falha no meio da transação')
+    except RuntimeError:
+        pass
+
+    assert client.requests == []
+
+
+def stop_mes(clients):
+    MES = pytest.importorskip('Client.MES')
+    mes = SimpleNamespace(clients=clients, lamps=SimpleNamespace(invalidate=lambda: None))
+    mes.write_transaction = lambda plc, priority: WriteTransaction(clients[plc], plc)
+    return MES, mes
+
+
+def test_stop_writes_only_mapped_registers():
+    MES = pytest.importorskip('Client.MES')
+
+    assert list(MES.stop_writes('MPS_PRESSING')) == register_addresses(holding_register_pressing_plc)
+    assert list(MES.stop_writes('MPS_SORTING')) == list(range(MES.STOP_REGISTER_COUNT))
+
+
+def test_stop_all_operations_zeroes_a_pressing_plc_with_ten_registers():
+    # O PLC da prensagem só tem HR 0-9: uma FC16 até o HR 19 seria recusada por inteiro
+    pressing = FakeClient(size=10)
+    pressing.registers = dict.fromkeys(range(10), 1)
+    MES, mes = stop_mes({'MPS_PRESSING': pressing})
+
+    assert MES.MES.stop_all_operations(mes)
+    assert pressing.registers == dict.fromkeys(range(10), 0)
+    assert pressing.requests == [('FC16', 0, [0] * 10)]
+
+
+def test_stop_all_operations_reports_a_plc_that_refuses_the_writes():
+    sorting = FakeClient(size=4)  # PLC sem mapa: HR 0-19 em FC16, depois um a um
+    MES, mes = stop_mes({'MPS_SORTING': sorting})
+
+    assert not MES.MES.stop_all_operations(mes)
+    assert sorting.registers == dict.fromkeys(range(4), 0)
+
+
+def test_stop_all_operations_stops_each_plc_independently():
+    # O primeiro PLC fora do ar não pode impedir a parada dos outros
+    from Client.Supervisor import PLCUnavailableError
+
+    class DownClient(FakeClient):
+        def write_registers(self, address, values, slave=0):
+            raise PLCUnavailableError('MPS_HANDLING')
+
+    pressing = FakeClient()
+    MES, mes = stop_mes({'MPS_HANDLING': DownClient(), 'MPS_PRESSING': pressing})
+
+    assert not MES.MES.stop_all_operations(mes)
+    assert pressing.registers == dict.fromkeys(range(10), 0)
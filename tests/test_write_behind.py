@@ -0,0 +1,134 @@
+import threading
+
+from Client.WriteBehind import WriteBehindQueue
+
+
+class FlakyHandler:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.batches = []
+        self.attempts = 0
+
+    def __call__(self, batch):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise RuntimeError("banco fora do ar")
+        self.batches.append(list(batch))
+
+
+def test_flush_waits_for_batches():
+    handler = FlakyHandler(failures=0)
+    writer = WriteBehindQueue(handler, batch_size=8)
+
+    for item in range(20):
+        writer.submit(item)
+
+    assert writer.flush(timeout=2)
+    assert [item for batch in handler.batches for item in batch] == list(range(20))
+    assert writer.metrics()['written'] == 20
+    writer.close()
+
+
+def test_failed_batch_is_retried_until_written():
+    # Mais falhas seguidas do que o antigo limite de 3 tentativas: nada pode ser descartado
+    handler = FlakyHandler(failures=5)
+    writer = WriteBehindQueue(handler, retry_delay=0.01, max_retry_delay=0.02)
+
+    writer.submit('a')
+    writer.submit('b')
+
+    assert writer.flush(timeout=2)
+    assert [item for batch in handler.batches for item in batch] == ['a', 'b']
+
+    metrics = writer.metrics()
+    assert metrics['failed'] == 5
+    assert metrics['retrying'] == 0
+    assert metrics['lost'] == 0
+    writer.close()
+
+
+def test_retry_delay_backs_off():
+    delays = []
+    handler = FlakyHandler(failures=4)
+    writer = WriteBehindQueue(handler, retry_delay=0.01, max_retry_delay=0.04)
+    writer._abandon.wait = lambda delay: delays.append(delay) or False
+
+    writer.submit('a')
+    assert writer.flush(timeout=2)
+    assert delays == [0.01, 0.02, 0.04, 0.04]
+    writer.close()
+
+
+def test_flush_times_out_while_database_is_down():
+    release = threading.Event()
+
+    def handler(batch):
+        if not release.is_set():
+            raise RuntimeError("banco fora do ar")
+
+    writer = WriteBehindQueue(handler, retry_delay=0.01, max_retry_delay=0.01)
+    writer.submit('a')
+
+    assert not writer.flush(timeout=0.1)
+    assert writer.metrics()['retrying'] == 1
+
+    release.set()
+    assert writer.flush(timeout=2)
+    writer.close()
+
+
+def test_close_gives_up_and_counts_lost_events():
+    def handler(batch):
+        raise RuntimeError("banco fora do ar")
+
+    writer = WriteBehindQueue(handler, retry_delay=0.01, max_retry_delay=0.01)
+    writer.submit('a')
+    writer.close(timeout=0.1)
+
+    assert writer.flush(timeout=2)
+    assert writer.metrics()['lost'] == 1
+
+
+class PermanentError(Exception):
+    pass
+
+
+def test_permanent_error_dead_letters_only_the_bad_event():
+    # Um evento inválido não pode travar a fila: o lote é gravado um a um e só o inválido é descartado
+    written, dropped, batches = [], [], []
+    gate = threading.Event()
+
+    def handler(batch):
+        gate.wait(2)  # segura a thread até o lote inteiro estar na fila
+        batches.append(list(batch))
+        if 'ruim' in batch:
+            raise PermanentError("violação de constraint")
+        written.extend(batch)
+
+    writer = WriteBehindQueue(handler, batch_size=8, retry_delay=10, is_permanent=lambda e: isinstance(e, PermanentError),
+                              on_dead_letter=lambda item, error: dropped.append(item))
+    writer.submit('primeiro')
+    for item in ('a', 'ruim', 'b'):
+        writer.submit(item)
+    gate.set()
+
+    assert writer.flush(timeout=2)
+    assert written == ['primeiro', 'a', 'b']
+    assert dropped == ['ruim']
+    assert sum('ruim' in batch for batch in batches) == 2  # o lote inteiro e depois só o evento, sem reenvios
+
+    metrics = writer.metrics()
+    assert metrics['dead_lettered'] == 1
+    assert metrics['retrying'] == 0
+    writer.close()
+
+
+def test_transient_errors_are_not_dead_lettered():
+    handler = FlakyHandler(failures=2)
+    writer = WriteBehindQueue(handler, retry_delay=0.01, is_permanent=lambda e: False)
+
+    writer.submit('a')
+    assert writer.flush(timeout=2)
+    assert handler.batches == [['a']]
+    assert writer.metrics()['dead_lettered'] == 0
+    writer.close()